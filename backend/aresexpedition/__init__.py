@@ -1,25 +1,52 @@
 import sys
 from pathlib import Path
+from typing import Optional
 
 from dotenv import load_dotenv
 from flask import Flask
 from .views.homepage import homepage
+from .views.games import games
+from .views.metrics import metrics
+from .services.game_registry import init_game_registry
+from .services.game_store import init_game_store
+from .services.metrics import init_metrics
+from .services.move_schedulers import init_move_schedulers
+from .services.projections import init_projections
+from .services.seats import init_seats
+from .services.state_stream import init_state_stream
+from .log_queue import install_log_queue, stop_log_queue
+from .startup import FileKey, StartupTimer, file_key, load_yaml_config
 from logging.config import dictConfig
-import yaml
 from env_vars import AresEnvironmentVariables, FlaskEnvironmentVariables
 
+# Key of the logging config file applied last in this process
+_applied_logging_config: Optional[FileKey] = None
+
 
 def configure_logging() -> None:
+    """
+    Configures logging from the file in the LOG_CONFIG_FILE env var. If the process already applied
+    the same version of the file, i.e. when creating another app, the configuration is kept as it is.
+    If the file has an enabled queue section, the handlers write from a background thread.
+    """
+    global _applied_logging_config
     log_conf_file: Path = Path(AresEnvironmentVariables.LOG_CONFIG_FILE.get())
     try:
-        with open(log_conf_file, "r") as logging_conf_file:
-            logging_conf: dict = yaml.safe_load(logging_conf_file)
-            log_target_file: Path = Path(logging_conf["handlers"]["rotfile"]["filename"])
-            if not log_target_file.parent.exists():
-                print(f"Logging configuration specifies the logging path {log_target_file}, but it doesn't exist. "
-                      f"Creating missing parent directories...")
-                log_target_file.parent.mkdir(parents=True)
-            dictConfig(logging_conf)
+        key: FileKey = file_key(log_conf_file)
+        if key == _applied_logging_config:
+            return
+        logging_conf: dict = load_yaml_config(log_conf_file, key)
+        log_target_file: Path = Path(logging_conf["handlers"]["rotfile"]["filename"])
+        if not log_target_file.parent.exists():
+            print(f"Logging configuration specifies the logging path {log_target_file}, but it doesn't exist. "
+                  f"Creating missing parent directories...")
+            log_target_file.parent.mkdir(parents=True)
+        queue_options: dict = logging_conf.pop("queue", None) or dict()
+        stop_log_queue()
+        dictConfig(logging_conf)
+        if queue_options.get("enabled", False):
+            install_log_queue(queue_options)
+        _applied_logging_config = key
     except FileNotFoundError as e:
         sys.exit(f"Logging setup failed, stopping the server: {e}")
     except ValueError as e:
@@ -39,6 +66,7 @@ def create_app(test: bool = False) -> Flask:
     :return: An instance of a Flask app
     """
 
+    timer = StartupTimer()
     if test:
         # pytest doesn't load the flask environment variables, so we need to do that manually:
         load_dotenv()
@@ -47,8 +75,10 @@ def create_app(test: bool = False) -> Flask:
     if not AresEnvironmentVariables.all_defined():
         sys.exit("Application could not be properly configured. "
                  "Missing environment variable definitions. Stopping the server...")
+    timer.stage("environment")
 
     configure_logging()
+    timer.stage("logging")
 
     app = Flask(__name__, instance_relative_config=True)
 
@@ -91,7 +121,26 @@ def create_app(test: bool = False) -> Flask:
         # Otherwise it won't be obvious why the tests fail.
         app.logger.debug(f"Loading test environment settings from {config_file_envvar}")
         app.config.from_envvar(config_file_envvar.name)
+    timer.stage("configuration")
+
+    app.logger.info("Initializing game services")
+    init_game_registry(app)
+    init_game_store(app)
+    init_projections(app)
+    init_state_stream(app)
+    init_seats(app)
+    init_move_schedulers(app)
+    if app.config["METRICS_ENABLED"]:
+        init_metrics(app)
+    timer.stage("services")
 
     app.logger.info("Registering application views")
     app.register_blueprint(homepage)
+    app.register_blueprint(games)
+    if app.config["METRICS_ENABLED"]:
+        app.register_blueprint(metrics)
+    timer.stage("views")
+
+    app.extensions["startup_timings"] = timer.stages
+    app.logger.info(f"Application started in {timer.summary()}")
     return app
@@ -0,0 +1,211 @@
+import asyncio
+import io
+import json
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional
+from urllib.parse import parse_qs
+
+from flask import Flask
+
+from . import create_app
+from .models import GameException
+from .services.game_registry import GameNotFoundException
+from .services.seats import EXTENSION_NAME as SEATS, PlayerNotAuthorizedException, SeatRegistry, parse_token
+from .services.state_stream import EXTENSION_NAME as STATE_STREAM, StateStream, encode_poll_response, \
+    format_stream_cursor, parse_stream_cursor, watch_game
+from .views.games import STREAM_HEADERS
+
+Scope = dict[str, Any]
+Receive = Callable[[], Awaitable[dict]]
+Send = Callable[[dict], Awaitable[None]]
+
+
+class AsgiAdapter:
+    """
+    Serves the Flask app through ASGI, i.e. with uvicorn: `uvicorn --factory aresexpedition.asgi:create_asgi_app`.
+
+    Streaming and long-polling clients of the games are served by the event loop itself: a waiting client costs
+    a future instead of a thread, so a process can keep tens of thousands of them open. Everything that may block,
+    the game logic and all the other endpoints, runs in the Flask app on a thread pool, off the event loop.
+    """
+    # Endpoints of the games blueprint which are served natively by the adapter
+    WAITING_ENDPOINTS = re.compile(r"/games/(?P<game_id>[^/]+)/(?P<endpoint>events|poll)")
+
+    def __init__(self, app: Flask, executor: Optional[ThreadPoolExecutor] = None):
+        """
+        :param app: Flask app to serve
+        :param executor: Thread pool for the blocking work, created from the app configuration if omitted
+        """
+        self.app = app
+        self.executor = executor or ThreadPoolExecutor(max_workers=app.config["ASGI_EXECUTOR_WORKERS"],
+                                                       thread_name_prefix="ares-asgi")
+        self.stream: StateStream = app.extensions[STATE_STREAM]
+        self.seats: SeatRegistry = app.extensions[SEATS]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            match = AsgiAdapter.WAITING_ENDPOINTS.fullmatch(scope["path"])
+            if match is not None and scope["method"] == "GET":
+                await self._serve_waiting(scope, receive, send, match["game_id"], match["endpoint"])
+            else:
+                await self._serve_wsgi(scope, receive, send)
+        else:
+            # WebSockets are not supported, state changes are pushed through server-sent events
+            await send({"type": "websocket.close"})
+
+    async def _run(self, function: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _serve_wsgi(self, scope: Scope, receive: Receive, send: Send) -> None:
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+        status, headers, content = await self._run(self._call_wsgi, _build_environ(scope, bytes(body)))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": content})
+
+    def _call_wsgi(self, environ: dict) -> tuple[int, list[tuple[bytes, bytes]], bytes]:
+        response = dict()
+
+        def start_response(status: str, headers: list[tuple[str, str]], exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+
+        chunks = self.app(environ, start_response)
+        try:
+            content = b"".join(chunks)
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+        return response["status"], response["headers"], content
+
+    def _watch(self, game_id: str, player: Optional[str]) -> Optional[str]:
+        with self.app.app_context():
+            try:
+                watch_game(game_id, player)
+            except (GameNotFoundException, GameException) as e:
+                return str(e)
+        return None
+
+    async def _serve_waiting(self, scope: Scope, receive: Receive, send: Send, game_id: str, endpoint: str) -> None:
+        query = parse_qs(scope["query_string"].decode("latin-1"))
+        player = query["player"][0] if "player" in query else None
+        headers = dict(scope["headers"])
+        if player is not None:
+            authorization = headers[b"authorization"].decode("latin-1") if b"authorization" in headers else None
+            try:
+                self.seats.authorize(game_id, player, parse_token(authorization, query.get("token", [None])[0]))
+            except PlayerNotAuthorizedException as e:
+                await _send_json(send, 403, json.dumps({"error": str(e)}))
+                return
+        error = await self._run(self._watch, game_id, player)
+        if error is not None:
+            await _send_json(send, 404, json.dumps({"error": error}))
+            return
+        cursor = query["since"][0] if "since" in query else None
+        if endpoint == "events" and b"last-event-id" in headers:
+            cursor = headers[b"last-event-id"].decode("latin-1")
+        since = parse_stream_cursor(cursor, player)
+        if endpoint == "poll":
+            state_events = await self.stream.wait_async(game_id, since, self.app.config["STATE_POLL_TIMEOUT"])
+            for event in state_events:
+                since[event.player] = event.version
+            await _send_json(send, 200, encode_poll_response(state_events, format_stream_cursor(since, player)))
+        else:
+            await self._stream_events(receive, send, game_id, player, since)
+
+    async def _stream_events(self, receive: Receive, send: Send, game_id: str, player: Optional[str],
+                             since: dict[Optional[str], int]) -> None:
+        keepalive = self.app.config["STATE_STREAM_KEEPALIVE"]
+        disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+        try:
+            await send({"type": "http.response.start", "status": 200, "headers": _stream_headers("text/event-stream")})
+            while True:
+                waiting = asyncio.ensure_future(self.stream.wait_async(game_id, since, keepalive))
+                await asyncio.wait({waiting, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if disconnected.done():
+                    waiting.cancel()
+                    return
+                state_events = waiting.result()
+                chunks = list()
+                for event in state_events:
+                    since[event.player] = event.version
+                    chunks.append(event.to_sse(format_stream_cursor(since, player)))
+                message = "".join(chunks) if chunks else ": keepalive\n\n"
+                await send({"type": "http.response.body", "body": message.encode(), "more_body": True})
+        finally:
+            disconnected.cancel()
+
+
+async def _wait_for_disconnect(receive: Receive) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _send_json(send: Send, status: int, body: str) -> None:
+    await send({"type": "http.response.start", "status": status, "headers": _stream_headers("application/json")})
+    await send({"type": "http.response.body", "body": body.encode()})
+
+
+def _stream_headers(content_type: str) -> list[tuple[bytes, bytes]]:
+    return [(b"content-type", content_type.encode("latin-1"))] \
+        + [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in STREAM_HEADERS.items()]
+
+
+def _build_environ(scope: Scope, body: bytes) -> dict:
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client")
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0] if client else "",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        key = name if name in ("CONTENT_TYPE", "CONTENT_LENGTH") else f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    # The body was read in full already, chunked requests have no length of their own
+    environ.setdefault("CONTENT_LENGTH", str(len(body)))
+    return environ
+
+
+def create_asgi_app(test: bool = False) -> AsgiAdapter:
+    """
+    Creates the Flask app and wraps it for serving through ASGI.
+
+    :param test: Passed on to `create_app`
+    :return: ASGI application
+    """
+    return AsgiAdapter(create_app(test))
@@ -0,0 +1,100 @@
+"""
+Moves the writing of log records off the threads that log them. The handlers configured for the loggers
+are put behind a bounded queue, and a background thread passes the queued records on to them, so a slow disk
+or a log file rollover doesn't hold up the requests.
+"""
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from .models.instrumentation import LOG_RECORDS_DROPPED
+
+POLICIES: tuple[str, ...] = ("drop", "block")
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Queues the records for a QueueListener, up to the given capacity. Once the queue is full, the "drop" policy
+    drops the new records and counts them, while the "block" policy makes the logging thread wait for room,
+    at most for the block timeout if one is given, and drops the record after that.
+    """
+    def __init__(self, capacity: int, policy: str = "drop", block_timeout: Optional[float] = None):
+        """
+        :param capacity: Maximum number of queued records
+        :param policy: "drop" or "block"
+        :param block_timeout: Seconds the "block" policy waits for room, None to wait as long as it takes
+        :raises ValueError: if the policy is unknown
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown logging queue policy {policy}, expected one of {', '.join(POLICIES)}.")
+        super().__init__(queue.Queue(capacity))
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.dropped: int = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self.policy == "block":
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+
+
+class _Listener(QueueListener):
+    """
+    QueueListener which waits for room in a full queue to enqueue its stop marker, instead of failing
+    and leaving the background thread running.
+    """
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+# Listeners started by the last install_log_queue
+_listeners: list[_Listener] = list[_Listener]()
+
+
+def install_log_queue(options: dict, loggers: Optional[list[logging.Logger]] = None) -> None:
+    """
+    Puts the handlers of the loggers behind bounded queues. Loggers sharing the same handlers share one queue
+    and one background thread. Records keep going through the levels and filters of the loggers and handlers.
+
+    :param options: The queue section of the logging config: capacity, policy and block_timeout
+    :param loggers: Loggers to rewire, defaults to the root logger and all loggers created so far
+    :raises ValueError: if the options are invalid
+    """
+    stop_log_queue()
+    if loggers is None:
+        loggers = [logging.getLogger()] + [logger for logger in logging.root.manager.loggerDict.values()
+                                           if isinstance(logger, logging.Logger)]
+    capacity = int(options.get("capacity", 10000))
+    if capacity <= 0:
+        raise ValueError("Logging queue capacity must be positive.")
+    queue_handlers: dict[tuple[logging.Handler, ...], BoundedQueueHandler] = dict()
+    for logger in loggers:
+        handlers = tuple(logger.handlers)
+        if not handlers:
+            continue
+        queue_handler = queue_handlers.get(handlers)
+        if queue_handler is None:
+            queue_handler = queue_handlers[handlers] = BoundedQueueHandler(capacity, options.get("policy", "drop"),
+                                                                           options.get("block_timeout"))
+            listener = _Listener(queue_handler.queue, *handlers, respect_handler_level=True)
+            listener.start()
+            _listeners.append(listener)
+        logger.handlers = [queue_handler]
+
+
+def stop_log_queue() -> None:
+    """
+    Writes out the queued records and stops the background threads.
+    """
+    while _listeners:
+        _listeners.pop().stop()
+
+
+atexit.register(stop_log_queue)
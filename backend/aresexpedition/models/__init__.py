@@ -0,0 +1,10 @@
+import sys
+from pathlib import Path
+
+# The rules engine modules import each other by their bare names, which is also how pickled games refer to them
+MODELS_DIRECTORY = Path(__file__).resolve().parent
+if str(MODELS_DIRECTORY) not in sys.path:
+    sys.path.insert(0, str(MODELS_DIRECTORY))
+
+# The same class the engine raises, which a package import of the module would load a second time
+from exceptions import GameException  # noqa: E402
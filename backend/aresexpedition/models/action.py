@@ -1,5 +1,10 @@
+from __future__ import annotations
+
 from abc import abstractmethod, ABC
-from player import Player
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from player import Player
 
 
 class Action(ABC):
@@ -1,7 +1,27 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 from action import Action
 from enums import Phase
 from global_requirements import Oxygen
-from player import Player
+
+if TYPE_CHECKING:
+    from player import Player
+
+
+class StartingMegacreditsAction(Action):
+    """
+    Starting resources of a corporation which only gives megacredits.
+    """
+    def __init__(self, megacredits: int):
+        self.megacredits = megacredits
+
+    def play(self, player: Player) -> None:
+        player.board.add_megacredits(self.megacredits)
+
+    def meets_conditions(self, player: Player) -> bool:
+        return True
 
 
 class SteelworksAction(Action):
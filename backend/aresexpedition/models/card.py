@@ -1,19 +1,25 @@
-from typing import Optional
+from __future__ import annotations
+
+from typing import Optional, TYPE_CHECKING
 
 from action import Action
 from card_requirements import CardRequirements, DefaultGreenCardRequirements, DefaultRedBlueCardRequirements
 from effect import Effect
 from enums import Tag, CardColor, Phase
-from player import Player
 from abc import ABC, abstractmethod
 
+if TYPE_CHECKING:
+    from player import Player
+
 
 class Card(ABC):
     def __init__(self, name: str, tags: list[Tag], action: Optional[Action], effect: Optional[Effect]):
         self.name = name
-        self.tags = tags
+        self.tags = tags if tags is not None else []
         self.action = action
         self.effect = effect
+        # Dense integer ID, assigned when the card gets compiled into a CardCatalog
+        self.card_id: Optional[int] = None
 
     @abstractmethod
     def play(self, player: Player):
@@ -31,6 +37,8 @@ class CorporationCard(Card):
 
 
 class ProjectCard(Card, ABC):
+    DEVELOPMENT_BONUS_DISCOUNT: int = 3
+
     def __init__(self, name: str, cost: int, color: CardColor, requirements: CardRequirements, points: int = 0,
                  tags: list[Tag] = None, action: Action = None, effect: Effect = None):
         super().__init__(name, tags, action, effect)
@@ -38,14 +46,28 @@ class ProjectCard(Card, ABC):
         self.points = points
         self.requirements = requirements
         self.color = color
-        self.resources: int = 0
 
-    @abstractmethod
     def play(self, player: Player):
-        raise NotImplementedError
+        player.board.remove_megacredits(self.get_cost(player))
+
+    def get_cost(self, player: Player) -> int:
+        """
+        Returns the card cost for the player, reduced by steel and titanium discounts and the Development phase bonus.
+
+        :param player: Player that wants to play the card
+        :return: Discounted cost in megacredits, never less than 0
+        """
+        discount = 0
+        if Tag.Building in self.tags:
+            discount += player.board.building_tag_discount()
+        if Tag.Space in self.tags:
+            discount += player.board.space_tag_discount()
+        if self.color == CardColor.Green and player.is_eligible_for_bonus(Phase.Development):
+            discount += ProjectCard.DEVELOPMENT_BONUS_DISCOUNT
+        return max(0, self.cost - discount)
 
     def player_meets_conditions(self, player: Player) -> bool:
-        return self.requirements.meets_conditions(player)
+        return player.board.megacredits >= self.get_cost(player) and self.requirements.meets_conditions(player)
 
 
 class GreenProjectCard(ProjectCard, ABC):
@@ -58,11 +80,10 @@ class BlueProjectCard(ProjectCard, ABC):
     def __init__(self, name: str, cost: int, requirements: CardRequirements = DefaultRedBlueCardRequirements(),
                  points: int = 0, tags: list[Tag] = None, action: Action = None, effect: Effect = None):
         super().__init__(name, cost, CardColor.Blue, requirements, points, tags, action, effect)
-        self.action_played_this_round: bool = False
 
     def is_action_playable(self, player: Player) -> bool:
         return self.action is not None and self.action.meets_conditions(player) and \
-               (not self.action_played_this_round or player.is_eligible_for_bonus(Phase.Action))
+               (self.card_id not in player.used_card_actions or player.is_eligible_for_bonus(Phase.Action))
 
 
 class RedProjectCard(ProjectCard, ABC):
@@ -0,0 +1,195 @@
+from abc import ABC, abstractmethod
+from typing import Generic, TypeVar, Iterable, Sequence, Optional, Type
+
+import numpy as np
+
+import action_impls
+from action import Action
+from action_impls import StartingMegacreditsAction
+from card import ProjectCard, CorporationCard, GreenProjectCard, BlueProjectCard, RedProjectCard
+from card_definitions import CardArrays, PARAMETERS, NO_MINIMUM, NO_MAXIMUM, load_card_arrays
+from card_requirements import GreenThresholdRequirements, RedBlueThresholdRequirements
+from effect import Effect
+from enums import Tag, CardColor
+from exceptions import GameException
+from global_requirements import GlobalParameter
+
+T = TypeVar('T', ProjectCard, CorporationCard)
+
+
+def tag_bit(tag: Tag) -> int:
+    return 1 << (tag.value - 1)
+
+
+def tag_mask(tags: Iterable[Tag]) -> int:
+    mask = 0
+    for tag in tags:
+        mask |= tag_bit(tag)
+    return mask
+
+
+class CardCatalog(ABC, Generic[T]):
+    """
+    Compiled, read-only view of a card set. Every card gets a dense integer ID (its position in the catalog),
+    so decks, hands and ban lists can hold plain integers, while card properties used in bulk
+    are precomputed into NumPy arrays indexed by card ID.
+
+    Tags are kept twice: as a bitmask per card for membership checks and filtering,
+    and as a card x tag count matrix, because a card can carry the same tag more than once.
+
+    The catalog is built from the compiled card definitions, see card_definitions.py. Card objects
+    are only built the first time they are looked up, so startup costs no per-card construction.
+    """
+    def __init__(self, arrays: CardArrays, prefix: str):
+        """
+        :param arrays: Compiled card definitions
+        :param prefix: Prefix of the arrays of this card set, i.e. "projects_"
+        """
+        self.names: np.ndarray = arrays[prefix + "names"]
+        self._ids: dict[str, int] = {name: card_id for card_id, name in enumerate(self.names.tolist())}
+        self.tag_masks: np.ndarray = arrays[prefix + "tag_masks"]
+        self.tag_counts: np.ndarray = arrays[prefix + "tag_counts"]
+        self.actions: np.ndarray = arrays[prefix + "actions"]
+        self.effects: np.ndarray = arrays[prefix + "effects"]
+        # Cards built so far, by card ID
+        self._cards: list[Optional[T]] = [None] * len(self.names)
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    def __getitem__(self, card_id: int) -> T:
+        card = self._cards[card_id]
+        if card is None:
+            card = self._build(card_id)
+            card.card_id = card_id
+            self._cards[card_id] = card
+        return card
+
+    @abstractmethod
+    def _build(self, card_id: int) -> T:
+        raise NotImplementedError
+
+    def _tags(self, card_id: int) -> list[Tag]:
+        return [tag for tag in Tag for _ in range(self.tag_counts[card_id, tag.value - 1])]
+
+    def _action(self, card_id: int) -> Optional[Action]:
+        name = str(self.actions[card_id])
+        return getattr(action_impls, name)() if name else None
+
+    def _effect(self, card_id: int) -> Optional[Effect]:
+        name = str(self.effects[card_id])
+        return getattr(action_impls, name)() if name else None
+
+    def id_of(self, card: T) -> int:
+        return self._ids[card.name]
+
+    def id_by_name(self, name: str) -> int:
+        card_id = self._ids.get(name)
+        if card_id is None:
+            raise GameException(f"Unknown card: {name}")
+        return card_id
+
+    def ids_excluding(self, banned_ids: Iterable[int]) -> list[int]:
+        """
+        :param banned_ids: IDs of the cards to leave out
+        :return: IDs of all the other cards in the catalog, in ascending order
+        """
+        allowed = np.ones(len(self._cards), dtype=bool)
+        allowed[list(banned_ids)] = False
+        return np.flatnonzero(allowed).tolist()
+
+    def has_tag(self, card_id: int, tag: Tag) -> bool:
+        return bool(self.tag_masks[card_id] & tag_bit(tag))
+
+    def with_tags(self, card_ids: Sequence[int], tags: Iterable[Tag]) -> list[int]:
+        """
+        :param card_ids: IDs of the cards to filter
+        :param tags: Tags to look for
+        :return: IDs of the cards carrying at least one of the tags, in the original order
+        """
+        ids = np.asarray(card_ids, dtype=np.intp)
+        return ids[(self.tag_masks[ids] & tag_mask(tags)) != 0].tolist()
+
+    def count_tags(self, card_ids: Sequence[int], tag: Tag) -> int:
+        """
+        :param card_ids: IDs of the cards to count the tags on, i.e. player's played cards
+        :param tag: Tag to count
+        :return: Total number of the tags on the cards
+        """
+        if len(card_ids) == 0:
+            return 0
+        return int(self.tag_counts[np.asarray(card_ids, dtype=np.intp), tag.value - 1].sum())
+
+
+class ProjectCatalog(CardCatalog[ProjectCard]):
+    """
+    Card catalog which also precomputes the project card costs, colors, printed victory points
+    and the global parameter thresholds the cards require.
+    """
+    CARD_TYPES: dict[CardColor, type] = {CardColor.Green: GreenProjectCard,
+                                         CardColor.Blue: BlueProjectCard,
+                                         CardColor.Red: RedProjectCard}
+
+    def __init__(self, arrays: CardArrays):
+        super().__init__(arrays, "projects_")
+        self.costs: np.ndarray = arrays["projects_costs"]
+        self.colors: np.ndarray = arrays["projects_colors"]
+        self.points: np.ndarray = arrays["projects_points"]
+        # Resources a card has to hold per victory point, 0 for the cards not scored by their resources
+        self.resources_per_point: np.ndarray = arrays["projects_resources_per_point"]
+        # Lowest and highest value of every global parameter in PARAMETERS each card requires
+        self.requirement_minimums: np.ndarray = arrays["projects_requirement_minimums"]
+        self.requirement_maximums: np.ndarray = arrays["projects_requirement_maximums"]
+
+    def _build(self, card_id: int) -> ProjectCard:
+        color = CardColor(int(self.colors[card_id]))
+        properties = dict(name=str(self.names[card_id]), cost=int(self.costs[card_id]),
+                          points=int(self.points[card_id]), tags=self._tags(card_id), action=self._action(card_id),
+                          effect=self._effect(card_id))
+        thresholds = {parameter: (int(minimum), int(maximum)) for parameter, minimum, maximum
+                      in zip(PARAMETERS, self.requirement_minimums[card_id], self.requirement_maximums[card_id])
+                      if minimum != NO_MINIMUM or maximum != NO_MAXIMUM}
+        if thresholds:
+            properties["requirements"] = GreenThresholdRequirements(thresholds) if color == CardColor.Green \
+                else RedBlueThresholdRequirements(thresholds)
+        return ProjectCatalog.CARD_TYPES[color](**properties)
+
+    def requirement_thresholds(self, parameter: Type[GlobalParameter]) -> list[int]:
+        """
+        :param parameter: Global parameter, one of PARAMETERS
+        :return: Values of the parameter at which the requirement of some card starts or stops being met, ascending
+        """
+        column = PARAMETERS.index(parameter)
+        minimums = self.requirement_minimums[:, column]
+        maximums = self.requirement_maximums[:, column].astype(np.int32)
+        # Parameters only increase, so a maximum stops being met one step above it
+        values = np.concatenate([minimums[minimums != NO_MINIMUM], maximums[maximums != NO_MAXIMUM] + 1])
+        return np.unique(values).tolist()
+
+    def with_colors(self, card_ids: Sequence[int], colors: Iterable[CardColor]) -> list[int]:
+        """
+        :param card_ids: IDs of the cards to filter
+        :param colors: Card colors to keep
+        :return: IDs of the cards of given colors, in the original order
+        """
+        ids = np.asarray(card_ids, dtype=np.intp)
+        return ids[np.isin(self.colors[ids], [c.value for c in colors])].tolist()
+
+
+class CorporationCatalog(CardCatalog[CorporationCard]):
+    """
+    Card catalog which also precomputes the starting megacredits of the corporations.
+    """
+    def __init__(self, arrays: CardArrays):
+        super().__init__(arrays, "corporations_")
+        self.megacredits: np.ndarray = arrays["corporations_megacredits"]
+
+    def _build(self, card_id: int) -> CorporationCard:
+        return CorporationCard(name=str(self.names[card_id]), tags=self._tags(card_id),
+                               starting_resources=StartingMegacreditsAction(int(self.megacredits[card_id])),
+                               action=self._action(card_id), effect=self._effect(card_id))
+
+
+_CARD_ARRAYS: CardArrays = load_card_arrays()
+PROJECT_CATALOG: ProjectCatalog = ProjectCatalog(_CARD_ARRAYS)
+CORPORATION_CATALOG: CorporationCatalog = CorporationCatalog(_CARD_ARRAYS)
@@ -0,0 +1,182 @@
+"""
+Compiles the card definitions in cards.yaml into NumPy arrays, one row per card, and caches them on disk.
+
+The compiled arrays are stored as an uncompressed .npz file in the __pycache__ directory next to the definitions,
+together with the modification time, size and SHA-256 digest of the definitions they were compiled from.
+The cache is used while the modification time and size match, or else while the content digest does, so touching
+the file costs a hash once, after which the cache is rewritten with the new modification time, and only an edit
+costs a recompilation. Loading the cache needs neither the YAML parser
+nor any per-card Python objects, the cards are only built by the catalogs once they are used.
+"""
+
+import hashlib
+import os
+import zipfile
+from pathlib import Path
+from typing import Optional, Type
+
+import numpy as np
+
+import action_impls
+from enums import CardColor, Tag
+from exceptions import GameException
+from global_requirements import GlobalParameter, Temperature, Oxygen, Oceans
+
+DEFINITIONS_FILE: Path = Path(__file__).resolve().with_name("cards.yaml")
+# Bump when the compiled layout changes, so caches of older versions get recompiled
+COMPILED_FORMAT_VERSION: int = 3
+
+# Global parameters card requirements can refer to, in the column order of the requirement arrays
+PARAMETERS: tuple[Type[GlobalParameter], ...] = (Temperature, Oxygen, Oceans)
+# Requirement bounds of the cards which don't restrict the parameter
+NO_MINIMUM: int = int(np.iinfo(np.int16).min)
+NO_MAXIMUM: int = int(np.iinfo(np.int16).max)
+
+CardArrays = dict[str, np.ndarray]
+
+
+def _enum_value(enum_type, name: str, card: str) -> int:
+    try:
+        return enum_type[name].value
+    except KeyError:
+        raise GameException(f"Card {card} has an unknown {enum_type.__name__}: {name}")
+
+
+def _implementation_name(definition: dict, field: str) -> str:
+    name = definition.get(field) or ""
+    if name and not isinstance(getattr(action_impls, name, None), type):
+        raise GameException(f"Card {definition['name']} has an unknown {field}: {name}")
+    return name
+
+
+def _compile_tags(definitions: list[dict]) -> tuple[np.ndarray, np.ndarray]:
+    counts = np.zeros((len(definitions), len(Tag)), dtype=np.uint8)
+    for row, definition in enumerate(definitions):
+        for tag in definition.get("tags") or ():
+            counts[row, _enum_value(Tag, tag, definition["name"]) - 1] += 1
+    bits = np.left_shift(1, np.arange(len(Tag), dtype=np.uint16), dtype=np.uint16)
+    return counts, np.where(counts > 0, bits, 0).sum(axis=1, dtype=np.uint16)
+
+
+def _is_bound(value) -> bool:
+    # Booleans are ints too, and the bounds must leave the sentinels free
+    return isinstance(value, int) and not isinstance(value, bool) and NO_MINIMUM < value < NO_MAXIMUM
+
+
+def _compile_requirements(definitions: list[dict]) -> tuple[np.ndarray, np.ndarray]:
+    minimums = np.full((len(definitions), len(PARAMETERS)), NO_MINIMUM, dtype=np.int16)
+    maximums = np.full((len(definitions), len(PARAMETERS)), NO_MAXIMUM, dtype=np.int16)
+    names = [p.__name__ for p in PARAMETERS]
+    for row, definition in enumerate(definitions):
+        for parameter, bounds in (definition.get("requirements") or dict()).items():
+            if parameter not in names or not isinstance(bounds, dict) or not set(bounds) <= {"min", "max"}:
+                raise GameException(f"Card {definition['name']} has an invalid requirement: {parameter}")
+            if not all(_is_bound(value) for value in bounds.values()) \
+                    or bounds.get("min", NO_MINIMUM) > bounds.get("max", NO_MAXIMUM):
+                raise GameException(f"Card {definition['name']} has invalid {parameter} bounds: {bounds}")
+            column = names.index(parameter)
+            minimums[row, column] = bounds.get("min", NO_MINIMUM)
+            maximums[row, column] = bounds.get("max", NO_MAXIMUM)
+    return minimums, maximums
+
+
+def _check_names(definitions: list[dict], kind: str) -> np.ndarray:
+    names = list[str]()
+    for definition in definitions:
+        name = definition.get("name") if isinstance(definition, dict) else None
+        if not isinstance(name, str) or not name:
+            raise GameException(f"Every {kind} card needs a name.")
+        if name in names:
+            raise GameException(f"Card {name} is listed more than once.")
+        names.append(name)
+    return np.array(names, dtype=np.str_)
+
+
+def compile_definitions(definitions: dict) -> CardArrays:
+    """
+    :param definitions: Parsed card definitions, with the project and corporation card lists
+    :return: Card properties by array name, prefixed by "projects_" or "corporations_"
+    :raises GameException: if a card definition is invalid
+    """
+    projects = definitions.get("projects") or list()
+    corporations = definitions.get("corporations") or list()
+    arrays = {"projects_names": _check_names(projects, "project"),
+              "corporations_names": _check_names(corporations, "corporation")}
+
+    arrays["projects_tag_counts"], arrays["projects_tag_masks"] = _compile_tags(projects)
+    arrays["projects_colors"] = np.array([_enum_value(CardColor, d.get("color", ""), d["name"]) for d in projects],
+                                         dtype=np.int8)
+    arrays["projects_costs"] = np.array([d.get("cost", 0) for d in projects], dtype=np.int16)
+    arrays["projects_points"] = np.array([d.get("points", 0) for d in projects], dtype=np.int8)
+    arrays["projects_resources_per_point"] = np.array([d.get("resources_per_point", 0) for d in projects],
+                                                      dtype=np.uint8)
+    arrays["projects_requirement_minimums"], arrays["projects_requirement_maximums"] = \
+        _compile_requirements(projects)
+    arrays["projects_actions"] = np.array([_implementation_name(d, "action") for d in projects], dtype=np.str_)
+    arrays["projects_effects"] = np.array([_implementation_name(d, "effect") for d in projects], dtype=np.str_)
+
+    arrays["corporations_tag_counts"], arrays["corporations_tag_masks"] = _compile_tags(corporations)
+    arrays["corporations_megacredits"] = np.array([d.get("megacredits", 0) for d in corporations], dtype=np.int16)
+    arrays["corporations_actions"] = np.array([_implementation_name(d, "action") for d in corporations],
+                                              dtype=np.str_)
+    arrays["corporations_effects"] = np.array([_implementation_name(d, "effect") for d in corporations],
+                                              dtype=np.str_)
+    return arrays
+
+
+def _source_key(stat: os.stat_result) -> np.ndarray:
+    return np.array([COMPILED_FORMAT_VERSION, stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+
+def _read_cache(cache_file: Path, key: np.ndarray, path: Path) -> Optional[CardArrays]:
+    try:
+        with np.load(cache_file, allow_pickle=False) as cached:
+            arrays = {name: cached[name] for name in cached.files}
+    except (OSError, ValueError, zipfile.BadZipFile):
+        return None
+    source_key = arrays.pop("source_key", None)
+    source_digest = arrays.pop("source_sha256", None)
+    if source_key is None or source_digest is None or source_key[0] != COMPILED_FORMAT_VERSION:
+        return None
+    if np.array_equal(source_key, key):
+        return arrays
+    if source_digest.tobytes() == hashlib.sha256(path.read_bytes()).digest():
+        # Only touched, the new key spares the next load the hash
+        _write_cache(cache_file, key, source_digest, arrays)
+        return arrays
+    return None
+
+
+def _write_cache(cache_file: Path, key: np.ndarray, digest: np.ndarray, arrays: CardArrays) -> None:
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        partial_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(partial_file, "wb") as f:
+            np.savez(f, source_key=key, source_sha256=digest, **arrays)
+        os.replace(partial_file, cache_file)
+    except OSError:
+        # An unwritable cache only costs the compilation next time
+        pass
+
+
+def load_card_arrays(path: Path = DEFINITIONS_FILE, cache_directory: Optional[Path] = None) -> CardArrays:
+    """
+    Loads the compiled card definitions from the cache, compiling and caching them first if the cache is stale.
+
+    :param path: Card definitions file
+    :param cache_directory: Directory of the compiled cache, defaults to __pycache__ next to the definitions
+    :return: Card properties by array name, as returned by `compile_definitions`
+    :raises GameException: if a card definition is invalid
+    """
+    cache_directory = cache_directory or path.parent.joinpath("__pycache__")
+    cache_file = cache_directory.joinpath(path.stem + ".npz")
+    key = _source_key(path.stat())
+    arrays = _read_cache(cache_file, key, path)
+    if arrays is not None:
+        return arrays
+    content = path.read_bytes()
+    # Imported only on a cache miss, it's slow to import and slower to run
+    import yaml
+    arrays = compile_definitions(yaml.safe_load(content) or dict())
+    _write_cache(cache_file, key, np.frombuffer(hashlib.sha256(content).digest(), np.uint8), arrays)
+    return arrays
@@ -1,7 +1,13 @@
+from __future__ import annotations
+
 from abc import abstractmethod, ABC
+from typing import Type, TYPE_CHECKING
 
 from enums import Phase
-from player import Player
+
+if TYPE_CHECKING:
+    from global_requirements import GlobalParameter
+    from player import Player
 
 
 class CardRequirements(ABC):
@@ -37,3 +43,27 @@ class DefaultGreenCardRequirements(GreenCardRequirements):
 class DefaultRedBlueCardRequirements(RedBlueCardRequirements):
     def _meets_custom_conditions(self, player: Player) -> bool:
         return True
+
+
+class ThresholdRequirements(CardRequirements, ABC):
+    """
+    Requires global parameters to be within the bounds printed on the card.
+    """
+    def __init__(self, thresholds: dict[Type[GlobalParameter], tuple[int, int]]):
+        """
+        :param thresholds: Lowest and highest allowed value, by global parameter
+        """
+        self.thresholds = thresholds
+
+    def _meets_custom_conditions(self, player: Player) -> bool:
+        global_requirements = player.game.global_requirements
+        return all(minimum <= global_requirements.get_parameter(parameter).value <= maximum
+                   for parameter, (minimum, maximum) in self.thresholds.items())
+
+
+class GreenThresholdRequirements(ThresholdRequirements, GreenCardRequirements):
+    pass
+
+
+class RedBlueThresholdRequirements(ThresholdRequirements, RedBlueCardRequirements):
+    pass
@@ -1,4 +0,0 @@
-from card import CorporationCard
-
-
-ALL_CORPORATION_CARDS: list[CorporationCard] = []
@@ -1,43 +1,76 @@
 import random
-from typing import TypeVar, Generic
-from card import ProjectCard, CorporationCard
+from typing import Optional, Sequence, Callable
 from exceptions import GameException
+from instrumentation import DECK_RESHUFFLES
+from snapshot import DeckSnapshot
 
-T = TypeVar('T', ProjectCard, CorporationCard)
 
+class Deck:
+    """
+    Deck of card IDs from a CardCatalog.
+    Drawing moves a cursor over the shuffled cards instead of removing them from the front of the list,
+    so a draw costs only as much as the number of drawn cards. Once the deck runs out, the discard pile
+    becomes the new deck by swapping the two lists, and gets shuffled in place.
 
-class Deck(Generic[T]):
-    def __init__(self, cards: list[T]):
-        self._cards = cards
-        self._discard_pile: list[T] = list[T]()
+    Drawing never modifies the cards, so the deck can share them with its snapshots as a tuple,
+    until the next shuffle replaces them with a new list.
+    """
+    def __init__(self, cards: list[int], rng: Optional[random.Random] = None):
+        """
+        :param cards: IDs of the cards in the deck
+        :param rng: Random generator of the game the deck belongs to, so shuffles are reproducible per game
+        """
+        self._cards: Sequence[int] = cards
+        self._cursor: int = 0
+        self._discard_pile: list[int] = list[int]()
+        self.rng: random.Random = rng if rng is not None else random.Random()
+        # Called with the drawn cards after every draw, if set
+        self.on_draw: Optional[Callable[[list[int]], None]] = None
 
     def shuffle(self) -> None:
-        random.shuffle(self._cards)
+        # Drawn cards are dropped first, so only the cards still in the deck get shuffled
+        cards = list(self._cards[self._cursor:])
+        self.rng.shuffle(cards)
+        self._cards = cards
+        self._cursor = 0
 
     def count(self) -> int:
-        return len(self._cards)
+        return len(self._cards) - self._cursor
 
     def empty(self) -> bool:
-        return len(self._cards) == 0
+        return self.count() == 0
 
-    def draw(self, amount: int) -> list[T]:
-        drawn_cards = list[T]()
-        deck_size = self.count()
-        if deck_size < amount:
-            drawn_cards += self.draw(deck_size)
+    def draw(self, amount: int) -> list[int]:
+        drawn_cards = list(self._cards[self._cursor:self._cursor + amount])
+        self._cursor += len(drawn_cards)
+        if len(drawn_cards) < amount and self._discard_pile:
             self._restore_discard_pile()
-            if self.empty():
-                return drawn_cards[T]
-        drawn_cards += self._cards[:amount - len(drawn_cards)]
-        del self._cards[:amount - len(drawn_cards)]
+            refill = list(self._cards[:amount - len(drawn_cards)])
+            self._cursor = len(refill)
+            drawn_cards += refill
+        if self.on_draw is not None:
+            self.on_draw(drawn_cards)
         return drawn_cards
 
-    def discard(self, cards: list[T]) -> None:
+    def discard(self, cards: list[int]) -> None:
         self._discard_pile.extend(cards)
 
     def _restore_discard_pile(self) -> None:
         if not self.empty():
             raise GameException("Cannot restore discard pile until the deck is empty.")
-        self._cards.extend(self._discard_pile)
-        self._discard_pile.clear()
-        self.shuffle()
+        cards = self._discard_pile
+        self._discard_pile = list[int]()
+        self.rng.shuffle(cards)
+        self._cards = cards
+        self._cursor = 0
+        DECK_RESHUFFLES.inc()
+
+    def snapshot(self) -> DeckSnapshot:
+        if not isinstance(self._cards, tuple):
+            self._cards = tuple(self._cards)
+        return DeckSnapshot(self._cards, self._cursor, tuple(self._discard_pile))
+
+    def restore(self, snapshot: DeckSnapshot) -> None:
+        self._cards = snapshot.cards
+        self._cursor = snapshot.cursor
+        self._discard_pile = list(snapshot.discard_pile)
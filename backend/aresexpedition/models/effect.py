@@ -1,2 +1,100 @@
-class Effect:
-    pass
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Hashable, Optional, TYPE_CHECKING
+
+from enums import EffectTrigger
+
+if TYPE_CHECKING:
+    from game import Game
+    from player import Player
+
+# Events are keyed by their trigger and subject: the tag played, the type of the raised global parameter
+# or the started phase
+TriggerKey = tuple[EffectTrigger, Hashable]
+
+
+@dataclass(frozen=True)
+class TriggerEvent:
+    trigger: EffectTrigger
+    subject: Hashable
+    # Player who caused the event, None for events of the whole game, i.e. a phase starting
+    player: Optional[Player] = None
+
+
+class Effect(ABC):
+    """
+    Lasting ability of a played card, resolved whenever one of the events it reacts to happens.
+    Effects are part of the shared card definitions, so any per-game state goes on the owner, i.e. card_resources.
+    """
+    # Events the effect reacts to
+    TRIGGERS: tuple[TriggerKey, ...] = ()
+
+    @abstractmethod
+    def resolve(self, owner: Player, card_id: int, event: TriggerEvent) -> None:
+        """
+        :param owner: Player who played the card. Effects reacting to own events only compare it to `event.player`.
+        :param card_id: ID of the card carrying the effect
+        :param event: Event that happened
+        """
+        raise NotImplementedError
+
+
+class EffectIndex:
+    """
+    Effects of the cards played in a game, indexed by the events they react to. Firing an event reaches only
+    the effects subscribed to it, so the cost of an event doesn't grow with the number of played cards.
+
+    Effects are resolved in player order, and in the order their cards were played for each player,
+    which keeps the resolution order the same for a game restored from a snapshot.
+    """
+    def __init__(self, game: Game):
+        self.game = game
+        self._subscribers: dict[TriggerKey, list[tuple[Player, int, Effect]]] = dict()
+
+    def subscribe(self, owner: Player, card_id: int, effect: Effect) -> None:
+        """
+        :param owner: Player who played the card
+        :param card_id: ID of the card carrying the effect
+        :param effect: Effect of the card
+        """
+        for key in effect.TRIGGERS:
+            subscribers = self._subscribers.setdefault(key, list())
+            subscribers.append((owner, card_id, effect))
+            # Stable, so the cards of a player stay in the order they were played
+            subscribers.sort(key=lambda s: self.game.players.index(s[0]))
+
+    def rebuild(self) -> None:
+        """
+        Subscribes the effects of all the cards the players have in play, i.e. after restoring a snapshot.
+        """
+        # The catalogs import the card modules, which import this one
+        from card_catalog import PROJECT_CATALOG, CORPORATION_CATALOG
+        self._subscribers.clear()
+        for player in self.game.players:
+            cards = [(card_id, PROJECT_CATALOG[card_id]) for card_id in player.played_project_cards]
+            if player.corporation_card is not None:
+                cards.insert(0, (player.corporation_card, CORPORATION_CATALOG[player.corporation_card]))
+            for card_id, card in cards:
+                if card.effect is not None:
+                    self.subscribe(player, card_id, card.effect)
+
+    def fire(self, trigger: EffectTrigger, subject: Hashable, player: Optional[Player] = None) -> int:
+        """
+        Resolves the effects subscribed to the event.
+
+        :param trigger: Type of the event
+        :param subject: Tag, global parameter type or phase the event is about
+        :param player: Player who caused the event, if any
+        :return: Number of resolved effects
+        """
+        subscribers = self._subscribers.get((trigger, subject))
+        if not subscribers:
+            return 0
+        event = TriggerEvent(trigger, subject, player)
+        # Effects subscribed while resolving, i.e. by a card played from an effect, react from the next event on
+        subscribers = tuple(subscribers)
+        for owner, card_id, effect in subscribers:
+            effect.resolve(owner, card_id, event)
+        return len(subscribers)
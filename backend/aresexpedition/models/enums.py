@@ -1,4 +1,4 @@
-from enum import Enum, IntEnum
+from enum import Enum, IntEnum, IntFlag
 
 
 class CardColor(Enum):
@@ -42,19 +42,47 @@ class RoundStep(IntEnum):
 
 
 class PlayerAction(Enum):
-    ChooseCorporation = 1,
-    RedrawProjectCards = 2,
-    SellProjectCards = 3,
-    PlayGreenCard = 4,
-    DrawProjectCard = 5,
-    PlayRedOrBlueCard = 6,
-    ChoosePhaseCard = 7,
-    ResolveActionAbilities = 8,
-    BuildGreenery = 9,
+    ChooseCorporation = 1
+    RedrawProjectCards = 2
+    SellProjectCards = 3
+    PlayGreenCard = 4
+    DrawProjectCard = 5
+    PlayRedOrBlueCard = 6
+    ChoosePhaseCard = 7
+    ResolveActionAbilities = 8
+    BuildGreenery = 9
     RaiseTemperature = 10
-    StandardActionBuildGreenery = 11,
-    StandardActionRaiseTemperature = 12,
-    StandardActionFlipOcean = 13,
-    Produce = 14,
-    Research = 15,
+    StandardActionBuildGreenery = 11
+    StandardActionRaiseTemperature = 12
+    StandardActionFlipOcean = 13
+    Produce = 14
+    Research = 15
     DiscardDownTo10Cards = 16
+
+
+class EffectTrigger(Enum):
+    """
+    Types of the game events played card effects can react to.
+    """
+    TagPlayed = 1
+    GlobalParameterRaised = 2
+    PhaseStarted = 3
+
+
+class VictoryPointSource(Enum):
+    TerraformingRating = 1
+    GreeneryTokens = 2
+    CardPoints = 3
+    CardResources = 4
+
+
+class PlayerStateChange(IntFlag):
+    """
+    Parts of the player state that the available player actions depend on.
+    """
+    Resources = 1
+    Phase = 2
+    Hand = 4
+    PlayedCards = 8
+    GlobalParameters = 16
+    All = Resources | Phase | Hand | PlayedCards | GlobalParameters
@@ -0,0 +1,280 @@
+"""
+Append-only log of everything that happens in a game, for crash recovery, game history and batch analytics.
+
+The log file starts with a header (magic "TMEL", version u8, 3 reserved bytes), followed by length-prefixed records:
+record body length u32, record kind u8 and the body. All values are little-endian.
+
+    Snapshot        full game state, encoded by serialization.encode_snapshot
+    Move            player index u8, action u8, phase u8 (0 = none), move cards id list, drawn cards id list
+    Advance         drawn cards id list
+    Production      drawn cards id list
+
+where an id list is a count u16 followed by u16 card IDs. Drawn cards are the random outcome of the record.
+Every log starts with a Snapshot record, further ones are checkpoints which shorten the replay.
+A record cut short by a crash is ignored when reading.
+"""
+
+import mmap
+import os
+import struct
+import time
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Optional, Iterator, Union, BinaryIO
+
+from enums import PlayerAction, Phase
+from exceptions import GameException, SerializationException
+from game import Game
+from move import Move
+from player_board import BoardStore
+from serialization import encode_snapshot, decode_snapshot
+from snapshot import GameSnapshot
+
+MAGIC: bytes = b"TMEL"
+FORMAT_VERSION: int = 1
+
+_HEADER = struct.Struct("<4sB3x")
+_RECORD = struct.Struct("<IB")
+_MOVE = struct.Struct("<BBB")
+_COUNT = struct.Struct("<H")
+
+
+class EventKind(IntEnum):
+    Snapshot = 1
+    Move = 2
+    Advance = 3
+    Production = 4
+
+
+@dataclass(frozen=True)
+class Event:
+    kind: EventKind
+    # Offset of the record in the log file
+    offset: int
+    drawn_cards: tuple[int, ...] = ()
+    # Set for Move events only
+    player: Optional[int] = None
+    move: Optional[Move] = None
+    # Set for Snapshot events only
+    snapshot: Optional[GameSnapshot] = None
+
+
+class EventLog:
+    """
+    Writes the events of a single game to a log file. Attach it to a started game, and every move,
+    advance and production of the game gets appended to the log, together with the cards it drew.
+
+    Records are buffered and flushed, i.e. handed over to the operating system, after every `flush_records`
+    records, and when the oldest unflushed record is `flush_interval` seconds old by the time the next one
+    gets appended. That is the durability window: a crash of the process loses at most the records not flushed
+    yet, so with the default of flushing every record nothing but a record cut short. Flushed records survive
+    a crash of the system only with `sync`, at the cost of an fsync per flush. `close` flushes what's left.
+    """
+    def __init__(self, path: Union[str, os.PathLike], sync: bool = False, flush_records: int = 1,
+                 flush_interval: Optional[float] = None):
+        """
+        :param path: Log file, created if it doesn't exist and appended to otherwise
+        :param sync: Whether to also fsync the file on every flush, so flushed records survive a system crash
+        :param flush_records: Number of records to buffer before flushing them
+        :param flush_interval: Seconds to buffer records for at most, checked whenever a record is appended,
+        or None to flush by number of records only
+        """
+        if flush_records < 1:
+            raise ValueError("flush_records must be at least 1.")
+        self.path = path
+        self.sync = sync
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.game: Optional[Game] = None
+        self._pending: int = 0
+        # Time the oldest unflushed record was appended at, as given by time.monotonic
+        self._pending_since: float = 0.0
+        self._file: BinaryIO = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(_HEADER.pack(MAGIC, FORMAT_VERSION))
+
+    def __enter__(self) -> "EventLog":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def attach(self, game: Game) -> None:
+        """
+        Starts recording the game. The current game state is written first, so the log can be replayed on its own.
+
+        :param game: Started game to record
+        :raises GameException: if the log already records a game
+        """
+        if self.game is not None:
+            raise GameException("Event log already records a game.")
+        self.game = game
+        game.event_log = self
+        self.checkpoint()
+
+    def detach(self) -> None:
+        if self.game is not None:
+            self.game.event_log = None
+            self.game = None
+
+    def checkpoint(self) -> None:
+        """
+        Writes the full current state of the game, so a replay can start from here instead of from the beginning.
+        """
+        self._append(EventKind.Snapshot, encode_snapshot(self.game.snapshot()))
+
+    def append_move(self, player: int, move: Move, drawn_cards: list[int]) -> None:
+        self._append(EventKind.Move,
+                     _MOVE.pack(player, move.action.value, int(move.phase) if move.phase is not None else 0),
+                     _pack_ids(move.cards),
+                     _pack_ids(drawn_cards))
+
+    def append_advance(self, drawn_cards: list[int]) -> None:
+        self._append(EventKind.Advance, _pack_ids(drawn_cards))
+
+    def append_production(self, drawn_cards: list[int]) -> None:
+        self._append(EventKind.Production, _pack_ids(drawn_cards))
+
+    def flush(self) -> None:
+        self._pending = 0
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self.detach()
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def _append(self, kind: EventKind, *parts: bytes) -> None:
+        self._file.write(_RECORD.pack(sum(len(p) for p in parts), kind))
+        for part in parts:
+            self._file.write(part)
+        now = time.monotonic()
+        if self._pending == 0:
+            self._pending_since = now
+        self._pending += 1
+        if self._pending >= self.flush_records or \
+                (self.flush_interval is not None and now - self._pending_since >= self.flush_interval):
+            self.flush()
+
+
+def _pack_ids(card_ids) -> bytes:
+    return struct.pack(f"<H{len(card_ids)}H", len(card_ids), *card_ids)
+
+
+class EventLogReader:
+    """
+    Reads a log file through mmap, so even large logs are scanned without loading them into memory.
+    """
+    def __init__(self, path: Union[str, os.PathLike]):
+        """
+        :param path: Log file written by EventLog
+        :raises SerializationException: if the file is not an event log of a supported version
+        """
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < _HEADER.size:
+                raise SerializationException(f"{path} is not an event log.")
+            self._map: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise SerializationException(f"{path} is not an event log.")
+        if version != FORMAT_VERSION:
+            self.close()
+            raise SerializationException(f"Unsupported event log format version: {version}")
+
+    def __enter__(self) -> "EventLogReader":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._map.close()
+
+    def records(self, offset: int = _HEADER.size) -> Iterator[tuple[EventKind, int, int]]:
+        """
+        Walks over the record headers only, without decoding the records.
+
+        :param offset: Offset of the first record to read
+        :return: Kind, offset and total length of every complete record
+        """
+        end = len(self._map)
+        while offset + _RECORD.size <= end:
+            length, kind = _RECORD.unpack_from(self._map, offset)
+            if offset + _RECORD.size + length > end:
+                break
+            yield EventKind(kind), offset, _RECORD.size + length
+            offset += _RECORD.size + length
+
+    def events(self, offset: int = _HEADER.size, decode_snapshots: bool = True) -> Iterator[Event]:
+        """
+        :param offset: Offset of the first record to read
+        :param decode_snapshots: Whether to decode the game state of Snapshot events, which is the costly part
+        :return: Decoded events of the log
+        """
+        for kind, record_offset, length in self.records(offset):
+            body = record_offset + _RECORD.size
+            if kind == EventKind.Snapshot:
+                snapshot = None
+                if decode_snapshots:
+                    with memoryview(self._map)[body:record_offset + length] as data:
+                        snapshot = decode_snapshot(data)
+                yield Event(kind, record_offset, snapshot=snapshot)
+            elif kind == EventKind.Move:
+                player, action, phase = _MOVE.unpack_from(self._map, body)
+                cards, body = self._read_ids(body + _MOVE.size)
+                drawn_cards, _ = self._read_ids(body)
+                yield Event(kind, record_offset, drawn_cards, player,
+                            Move(PlayerAction(action), cards, Phase(phase) if phase else None))
+            else:
+                yield Event(kind, record_offset, self._read_ids(body)[0])
+
+    def replay(self, board_store: Optional[BoardStore] = None) -> Game:
+        """
+        Rebuilds the game from its last checkpoint and the events recorded after it.
+        Every event must draw the same cards it drew when recorded.
+
+        :param board_store: Optional store for the player boards of the rebuilt game
+        :return: Game in the state after the last complete record
+        :raises SerializationException: if the log holds no game state or the replay diverges from the record
+        """
+        checkpoint = None
+        for kind, offset, _ in self.records():
+            if kind == EventKind.Snapshot:
+                checkpoint = offset
+        if checkpoint is None:
+            raise SerializationException("Event log holds no game state.")
+        game = None
+        for event in self.events(checkpoint):
+            if event.kind == EventKind.Snapshot:
+                game = Game.from_snapshot(event.snapshot, board_store)
+                continue
+            if event.kind == EventKind.Move:
+                game.apply(game.players[event.player], event.move)
+            elif event.kind == EventKind.Advance:
+                game.advance()
+            else:
+                game.produce_all()
+            if tuple(game.drawn_cards) != event.drawn_cards:
+                raise SerializationException(f"Replay of the event at offset {event.offset} drew different cards.")
+        return game
+
+    def _read_ids(self, offset: int) -> tuple[tuple[int, ...], int]:
+        count = _COUNT.unpack_from(self._map, offset)[0]
+        offset += _COUNT.size
+        return struct.unpack_from(f"<{count}H", self._map, offset), offset + 2*count
+
+
+def replay(path: Union[str, os.PathLike], board_store: Optional[BoardStore] = None) -> Game:
+    """
+    Rebuilds the game recorded in the log file, i.e. after a crash.
+
+    :param path: Log file written by EventLog
+    :param board_store: Optional store for the player boards of the rebuilt game
+    :return: Game in its last recorded state
+    """
+    with EventLogReader(path) as reader:
+        return reader.replay(board_store)
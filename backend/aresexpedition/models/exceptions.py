@@ -4,3 +4,7 @@ class GlobalRequirementException(Exception):
 
 class GameException(Exception):
     pass
+
+
+class SerializationException(Exception):
+    pass
@@ -1,19 +1,23 @@
-import project_cards
-import corporation_cards
-from enums import Phase, RoundStep
+from __future__ import annotations
+
+from card_catalog import PROJECT_CATALOG, CORPORATION_CATALOG
+from enums import Phase, RoundStep, PlayerAction, PlayerStateChange, PlayerColor, EffectTrigger
 from exceptions import GameException
 from game_state import GameState
-from global_requirements import *
+from instrumentation import PLAYER_ACTIONS, PLAYER_ACTION_SECONDS, TURN_TRANSITIONS
+from global_requirements import GlobalRequirements, GlobalParameter, ParameterCrossing
 import random
-from deck import Deck, ProjectCard, CorporationCard
-from dataclasses import dataclass
-
+import time
+from typing import Optional, TYPE_CHECKING
+from deck import Deck
+from effect import EffectIndex
+from move import Move
+from player_board import BoardStore
+from snapshot import GameSnapshot
+from turn import Turn
 
-@dataclass
-class Turn:
-    round: int
-    phase: Optional[Phase]
-    step: RoundStep
+if TYPE_CHECKING:
+    from player import Player
 
 
 class TurnManager:
@@ -63,11 +67,11 @@ class TurnManager:
     def _advance_step(self) -> Turn:
         self.turn = Turn(self.turn.round,
                          self.phases[0] if self.turn.step == RoundStep.Planning else None,
-                         RoundStep((int(self.turn.step) + 1) % len(RoundStep)))
+                         RoundStep(int(self.turn.step) + 1))
         return self.turn
 
     def _advance_phase(self) -> Turn:
-        if self.turn.phase is None or self.phases.index(self.turn.phase) == self.phases[-1]:
+        if self.turn.phase is None or self._is_last_phase():
             raise GameException("Phase cannot be changed.")
         self.turn = Turn(self.turn.round,
                          self.phases[self.phases.index(self.turn.phase) + 1],
@@ -83,17 +87,43 @@ class Game:
     DEFAULT_OCEAN_MC_COST: int = 15
 
     def __init__(self, players: list[Player],
-                 banned_corporations: Optional[list[CorporationCard]],
-                 banned_projects: Optional[list[ProjectCard]]):
-        self.global_requirements: GlobalRequirements = GlobalRequirements()
+                 banned_corporations: Optional[list[int]],
+                 banned_projects: Optional[list[int]],
+                 board_store: Optional[BoardStore] = None,
+                 seed: Optional[int] = None):
+        """
+        :param players: Players taking part in the game
+        :param banned_corporations: IDs of the corporation cards left out of the corporation deck
+        :param banned_projects: IDs of the project cards left out of the project deck
+        :param board_store: If set, player boards are kept as rows of this store and
+        the production step of all players is resolved with a single vectorized operation.
+        One store can be shared by many games.
+        :param seed: Seed of the game's own random generator. All shuffles and draws of the game use it,
+        so a seeded game is reproducible, and games running in the same process don't affect each other.
+        """
+        self.seed = seed
+        self.rng: random.Random = random.Random(seed)
+        self.global_requirements: GlobalRequirements = GlobalRequirements(self.rng)
+        for parameter in self.global_requirements.parameters:
+            self.global_requirements.subscribe(type(parameter), self._on_parameter_crossing,
+                                               PROJECT_CATALOG.requirement_thresholds(type(parameter)))
         self.players = players
+        # Effects of the played cards, by the events they react to
+        self.effects: EffectIndex = EffectIndex(self)
         self._turn_manager = TurnManager()
-        self.corporation_deck: Optional[Deck[CorporationCard]] = None
-        self.project_deck: Optional[Deck[ProjectCard]] = None
-        self.banned_corporations = banned_corporations
-        self.banned_projects = banned_projects
+        self.corporation_deck: Optional[Deck] = None
+        self.project_deck: Optional[Deck] = None
+        self.banned_corporations: list[int] = banned_corporations or []
+        self.banned_projects: list[int] = banned_projects or []
         self.round_step: Optional[RoundStep] = None
         self.final_turn: Optional[Turn] = None
+        self.board_store = board_store
+        # EventLog recording the game, set by EventLog.attach
+        self.event_log = None
+        # Incremented on every state change, so observers can tell whether their copy of the state is current
+        self.version: int = 0
+        # Cards drawn from the decks by the last applied move, advance or production
+        self.drawn_cards: list[int] = list[int]()
 
     def start(self):
         self._randomize_player_order()
@@ -102,23 +132,36 @@ class Game:
         self._initialize_players()
 
     def _initialize_players(self):
+        self._link_players()
+        for p in self.players:
+            p.assign_starting_corporations(self.corporation_deck.draw(2))
+            p.assign_starting_project_cards(self.project_deck.draw(8))
+
+    def _link_players(self):
         for p in self.players:
             p.link_to_game(self)
+            if self.board_store is not None:
+                p.set_board(self.board_store.allocate())
             p.give_access_to_project_deck(self.project_deck)
             p.give_access_to_corporation_deck(self.corporation_deck)
-            p.assign_starting_corporations(self.corporation_deck.draw(2))
-            p.assign_starting_project_cards(self.project_deck.draw(8))
+        self.project_deck.on_draw = self._record_draw
+        self.corporation_deck.on_draw = self._record_draw
+
+    def _on_parameter_crossing(self, parameter: GlobalParameter, crossing: ParameterCrossing) -> None:
+        # Card requirements only change their outcome at the thresholds printed on the cards,
+        # so playable cards change just on crossings
+        for p in self.players:
+            p.invalidate_actions(PlayerStateChange.GlobalParameters)
+
+    def _record_draw(self, cards: list[int]) -> None:
+        self.drawn_cards.extend(cards)
 
     def _initialize_project_deck(self):
-        projects: list[ProjectCard] = [project for project in project_cards.ALL_PROJECT_CARDS
-                                       if project not in self.banned_projects]
-        self.project_deck = Deck[ProjectCard](projects)
+        self.project_deck = Deck(PROJECT_CATALOG.ids_excluding(self.banned_projects), self.rng)
         self.project_deck.shuffle()
 
     def _initialize_corporations_deck(self):
-        corporations: list[CorporationCard] = [corporation for corporation in corporation_cards.ALL_CORPORATION_CARDS
-                                               if corporation not in self.banned_corporations]
-        self.corporation_deck = Deck[CorporationCard](corporations)
+        self.corporation_deck = Deck(CORPORATION_CATALOG.ids_excluding(self.banned_corporations), self.rng)
         self.corporation_deck.shuffle()
 
     def get_current_turn(self) -> Turn:
@@ -136,12 +179,273 @@ class Game:
     def is_game_start(self) -> bool:
         return self._turn_manager.is_game_start
 
-    # TODO: need to set the final_turn when global requirements get maxed out
     def is_finished(self) -> bool:
-        return self.global_requirements.end_game_condition_met() and self.get_current_phase() != self.final_turn.phase
+        return self.final_turn is not None
 
     def advance(self) -> GameState:
-        raise NotImplementedError
+        """
+        Moves the game to the next Turn once all players are done with the current one.
+        Leaving the Planning step schedules the phases chosen by the players, and leaving the End step
+        of a round in which all global parameters got maxed out finishes the game.
+
+        :return: GameState after the transition
+        :raises GameException: if the game is already finished
+        """
+        if self.is_finished():
+            raise GameException("Cannot advance a finished game.")
+        self.drawn_cards.clear()
+        state = self._advance()
+        self.version += 1
+        if self.event_log is not None:
+            self.event_log.append_advance(self.drawn_cards)
+        return state
+
+    def _advance(self) -> GameState:
+        current_turn = self.get_current_turn()
+        if current_turn.step == RoundStep.End and self.global_requirements.end_game_condition_met():
+            self.final_turn = current_turn
+            for p in self.players:
+                p.invalidate_actions(PlayerStateChange.Phase)
+            return self._get_state()
+        if current_turn.step == RoundStep.Planning and not self.is_game_start():
+            self._turn_manager.set_phases(self._get_chosen_phases())
+        turn = self._turn_manager.next_turn()
+        TURN_TRANSITIONS.inc(turn.step.name)
+        for p in self.players:
+            if turn.step == RoundStep.Planning:
+                p.start_round()
+            p.invalidate_actions(PlayerStateChange.Phase)
+        if turn.phase is not None:
+            self.effects.fire(EffectTrigger.PhaseStarted, turn.phase)
+        return self._get_state()
+
+    def apply(self, player: Player, move: Move) -> None:
+        """
+        Performs the move on behalf of the player. All state changes caused by players go through here.
+
+        :param player: Player making the move
+        :param move: Move to perform
+        :raises GameException: if the player is not part of this game or the move is not allowed
+        """
+        if player.game is not self:
+            raise GameException(f"Player {player.name} is not part of this game.")
+        self.drawn_cards.clear()
+        start = time.perf_counter()
+        player.apply_move(move)
+        PLAYER_ACTION_SECONDS.observe(time.perf_counter() - start, move.action.name)
+        PLAYER_ACTIONS.inc(move.action.name)
+        self.version += 1
+        if self.event_log is not None:
+            self.event_log.append_move(self.players.index(player), move, self.drawn_cards)
+
+    def apply_all(self, player: Player, moves: list[Move]) -> None:
+        """
+        Performs the moves of the player in order, as a single transaction: if any of them is not allowed,
+        the game is rolled back to its state before the first one. Moves are recorded in the event log
+        only once all of them succeeded, and `drawn_cards` holds the cards drawn by all of them.
+
+        :param player: Player making the moves
+        :param moves: Moves to perform
+        :raises GameException: if the player is not part of this game or any of the moves is not allowed
+        """
+        if player.game is not self:
+            raise GameException(f"Player {player.name} is not part of this game.")
+        snapshot = self.snapshot()
+        version = self.version
+        private_versions = [p.private_version for p in self.players]
+        event_log, self.event_log = self.event_log, None
+        drawn_cards = list[list[int]]()
+        try:
+            for index, move in enumerate(moves):
+                try:
+                    self.apply(player, move)
+                except GameException as e:
+                    raise GameException(f"Move {index + 1} of {len(moves)} failed: {e}") from e
+                drawn_cards.append(list(self.drawn_cards))
+        except Exception:
+            # Nobody has seen the intermediate states, so the versions go back along with the state
+            self.restore(snapshot)
+            self.version = version
+            for p, private_version in zip(self.players, private_versions):
+                p.private_version = private_version
+            raise
+        finally:
+            self.event_log = event_log
+        if event_log is not None:
+            for move, cards in zip(moves, drawn_cards):
+                event_log.append_move(self.players.index(player), move, cards)
+        self.drawn_cards = [card for cards in drawn_cards for card in cards]
+
+    def get_player(self, name: str) -> Player:
+        player = next((p for p in self.players if p.name == name), None)
+        if player is None:
+            raise GameException(f"Player {name} is not part of this game.")
+        return player
+
+    def apply_dict(self, player_name: str, move: dict) -> None:
+        """
+        Performs the move given in its JSON form (see `Move.from_dict`), i.e. as received from a client.
+
+        :param player_name: Name of the player making the move
+        :param move: Move to perform
+        :raises GameException: if there is no such player, or the move is invalid or not allowed
+        """
+        self.apply(self.get_player(player_name), Move.from_dict(move))
+
+    def apply_dicts(self, player_name: str, moves: list[dict]) -> None:
+        """
+        Performs the moves given in their JSON form as a single transaction, see `apply_all`.
+        All the moves are read before any of them is performed.
+
+        :param player_name: Name of the player making the moves
+        :param moves: Moves to perform
+        :raises GameException: if there is no such player, or any of the moves is invalid or not allowed
+        """
+        self.apply_all(self.get_player(player_name), [Move.from_dict(move) for move in moves])
+
+    def to_dict(self) -> dict:
+        """
+        Public state of the game in JSON form, as seen by spectators. Players' hands are reduced to their sizes.
+
+        :return: The state, with players keyed by their names
+        """
+        turn = self.get_current_turn()
+        return {"version": self.version,
+                "round": turn.round,
+                "phase": turn.phase.name if turn.phase is not None else None,
+                "step": turn.step.name,
+                "phases": [p.name for p in self._turn_manager.phases],
+                "is_finished": self.is_finished(),
+                "global_parameters": {type(p).__name__: {"value": p.value,
+                                                         "color": p.color.name if p.color is not None else None}
+                                      for p in self.global_requirements.parameters},
+                "player_order": [p.name for p in self.players],
+                "players": {p.name: p.to_dict() for p in self.players}}
+
+    def produce_all(self) -> None:
+        """
+        Performs the production step for every player that hasn't produced yet in this Production phase.
+        Boards kept in a BoardStore are produced together, instead of one player at a time.
+        """
+        producers = [p for p in self.players if p.is_eligible_for_action(PlayerAction.Produce)]
+        self.drawn_cards.clear()
+        start = time.perf_counter()
+        if self.board_store is None:
+            for p in producers:
+                p.apply_move(Move(PlayerAction.Produce))
+        else:
+            cards = self.board_store.produce([p.board.row for p in producers],
+                                             [p.use_production_income() for p in producers])
+            # The cards are drawn in one go and dealt in player order, which is what drawing one by one would give
+            drawn_cards = self.project_deck.draw(int(cards.sum()))
+            offset = 0
+            for p, amount in zip(producers, cards.tolist()):
+                p.finish_production(drawn_cards[offset:offset + amount])
+                offset += amount
+        if producers:
+            # Players produce together, so each of them is accounted an equal share of the time
+            elapsed = (time.perf_counter() - start) / len(producers)
+            for _ in producers:
+                PLAYER_ACTION_SECONDS.observe(elapsed, PlayerAction.Produce.name)
+            PLAYER_ACTIONS.inc(PlayerAction.Produce.name, amount=len(producers))
+        self.version += 1
+        if self.event_log is not None:
+            self.event_log.append_production(self.drawn_cards)
+
+    def __getstate__(self) -> dict:
+        # Boards of a pickled game are pickled as plain boards, so the copy doesn't take the shared store along
+        state = self.__dict__.copy()
+        state["board_store"] = None
+        return state
+
+    def release_boards(self) -> None:
+        """
+        Returns the board rows of a finished game to the BoardStore, so other games can reuse them.
+        """
+        if self.board_store is None:
+            return
+        for p in self.players:
+            self.board_store.release(p.board)
+
+    def snapshot(self) -> GameSnapshot:
+        """
+        Captures the mutable state of the game. Use it with `restore` to branch or undo moves,
+        i.e. snapshot, try a move, restore, instead of deep-copying the game and its card graph.
+
+        :return: Immutable snapshot of the game state
+        """
+        turn_manager = self._turn_manager
+        return GameSnapshot(seed=self.seed,
+                            banned_corporations=tuple(self.banned_corporations),
+                            banned_projects=tuple(self.banned_projects),
+                            turn=turn_manager.turn.freeze(),
+                            phases=tuple(int(p) for p in turn_manager.phases),
+                            is_game_start=turn_manager.is_game_start,
+                            final_turn=self.final_turn.freeze() if self.final_turn is not None else None,
+                            global_requirements=self.global_requirements.snapshot(),
+                            project_deck=self.project_deck.snapshot() if self.project_deck is not None else None,
+                            corporation_deck=self.corporation_deck.snapshot()
+                            if self.corporation_deck is not None else None,
+                            rng_state=self.rng.getstate(),
+                            players=tuple(p.snapshot() for p in self.players))
+
+    def restore(self, snapshot: GameSnapshot) -> None:
+        """
+        Brings the game back to the snapshot state. The snapshot must come from this game, or from a game
+        with the same players, i.e. one created by `from_snapshot`.
+
+        :param snapshot: Snapshot to restore
+        :raises GameException: if the snapshot players don't match the game players
+        """
+        players_by_name = {p.name: p for p in self.players}
+        if set(players_by_name) != {p.name for p in snapshot.players}:
+            raise GameException("Snapshot players don't match the players of this game.")
+        self.players = [players_by_name[p.name] for p in snapshot.players]
+        turn_manager = self._turn_manager
+        turn_manager.turn = Turn.thaw(snapshot.turn)
+        turn_manager.phases = [Phase(p) for p in snapshot.phases]
+        turn_manager.is_game_start = snapshot.is_game_start
+        self.final_turn = Turn.thaw(snapshot.final_turn) if snapshot.final_turn is not None else None
+        self.global_requirements.restore(snapshot.global_requirements)
+        if snapshot.project_deck is not None:
+            self.project_deck.restore(snapshot.project_deck)
+        if snapshot.corporation_deck is not None:
+            self.corporation_deck.restore(snapshot.corporation_deck)
+        if snapshot.rng_state is not None:
+            self.rng.setstate(snapshot.rng_state)
+        for player, player_snapshot in zip(self.players, snapshot.players):
+            player.restore(player_snapshot)
+        self.effects.rebuild()
+        self.version += 1
+
+    @staticmethod
+    def from_snapshot(snapshot: GameSnapshot, board_store: Optional[BoardStore] = None) -> "Game":
+        """
+        Creates a new, independent game in the snapshot state, i.e. to continue it in another process.
+
+        :param snapshot: Snapshot to create the game from
+        :param board_store: Optional store for the player boards of the new game
+        :return: New game
+        """
+        # Players depend on the game module, so they can't be imported along with it
+        from player import Player
+        players = [Player(p.name, PlayerColor(p.color)) for p in snapshot.players]
+        game = Game(players, list(snapshot.banned_corporations), list(snapshot.banned_projects),
+                    board_store=board_store, seed=snapshot.seed)
+        game.project_deck = Deck(list[int](), game.rng)
+        game.corporation_deck = Deck(list[int](), game.rng)
+        game._link_players()
+        game.restore(snapshot)
+        return game
+
+    def _get_chosen_phases(self) -> list[Phase]:
+        return sorted({p.current_phase_card for p in self.players if p.current_phase_card is not None})
+
+    def _get_state(self) -> GameState:
+        state = GameState(self.get_current_turn())
+        state.is_game_finished = self.is_finished()
+        state.is_final_phase = self.global_requirements.end_game_condition_met()
+        return state
 
     def _randomize_player_order(self) -> None:
-        random.shuffle(self.players)
+        self.rng.shuffle(self.players)
@@ -0,0 +1,239 @@
+"""
+Columnar storage of finished games, for statistics over millions of simulated or played games.
+
+Every game is split into rows of five tables: the game itself, its players, the phase card each player chose
+every round, the project cards each player played, and the global parameters at the end of every round.
+Rows refer to the game or player they belong to by the index of its row, so the tables join with plain
+NumPy indexing. Records are collected in Python lists and sealed into NumPy arrays a chunk of games at a time,
+which keeps appending cheap, and the chunks are merged before a query. Queries work on whole columns
+and never build Python objects per game, so they take seconds even over millions of games.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional, Union
+
+import numpy as np
+
+from enums import Phase
+from exceptions import GameException
+from global_requirements import Temperature, Oxygen, Oceans
+
+if TYPE_CHECKING:
+    from simulation import GameResult
+
+# Global parameters tracked round by round, by the names GameResult uses for them
+PARAMETER_NAMES: tuple[str, ...] = tuple(t.__name__ for t in (Temperature, Oxygen, Oceans))
+
+# Columns of every table, with their types
+TABLES: dict[str, dict[str, type]] = {
+    "games": {"game_id": np.int64, "seed": np.int64, "finished": np.bool_, "rounds": np.int32,
+              "duration": np.float64},
+    "players": {"game": np.int64, "name": np.int32, "terraforming_rating": np.int32, "victory_points": np.int32,
+                "winner": np.bool_},
+    "phase_cards": {"player": np.int64, "round": np.int32, "phase": np.int8},
+    "played_cards": {"player": np.int64, "card": np.int32},
+    "rounds": {"game": np.int64, "round": np.int32, **{name: np.int32 for name in PARAMETER_NAMES}},
+}
+
+Columns = dict[str, np.ndarray]
+
+
+class CardStatistics:
+    """
+    Win statistics of the project cards, one entry per card played at least once.
+    """
+    def __init__(self, card_ids: np.ndarray, plays: np.ndarray, wins: np.ndarray):
+        self.card_ids = card_ids
+        # Number of players who played the card, and how many of them won their game
+        self.plays = plays
+        self.wins = wins
+
+    @property
+    def win_rates(self) -> np.ndarray:
+        return self.wins / self.plays
+
+
+class GameRecords:
+    """
+    Finished games in columnar tables, see the module description.
+    """
+    def __init__(self, chunk_size: int = 4096):
+        """
+        :param chunk_size: Number of games collected before their records are sealed into arrays
+        """
+        self.chunk_size = chunk_size
+        # Player names, the players table refers to them by index
+        self.names: list[str] = list[str]()
+        self._name_codes: dict[str, int] = dict[str, int]()
+        self._chunks: dict[str, list[Columns]] = {table: list[Columns]() for table in TABLES}
+        self._pending: dict[str, dict[str, list]] = self._empty_pending()
+        self._pending_games: int = 0
+        self._games: int = 0
+        self._players: int = 0
+
+    def __len__(self) -> int:
+        return self._games
+
+    @staticmethod
+    def _empty_pending() -> dict[str, dict[str, list]]:
+        return {table: {column: list() for column in columns} for table, columns in TABLES.items()}
+
+    def append(self, result: GameResult) -> None:
+        """
+        Adds the outcome of a game.
+
+        :param result: Outcome of the game, its players in player order
+        """
+        pending = self._pending
+        game = self._games
+        for column, value in (("game_id", result.game_id), ("seed", result.seed), ("finished", result.finished),
+                              ("rounds", result.rounds), ("duration", result.duration)):
+            pending["games"][column].append(value)
+        players = pending["players"]
+        for name, terraforming_rating in result.terraforming_ratings.items():
+            player = self._players
+            players["game"].append(game)
+            players["name"].append(self._name_code(name))
+            players["terraforming_rating"].append(terraforming_rating)
+            players["victory_points"].append(result.victory_points.get(name, 0))
+            players["winner"].append(name in result.winners)
+            phases = result.phase_cards.get(name, ())
+            pending["phase_cards"]["player"] += [player] * len(phases)
+            pending["phase_cards"]["round"] += range(1, len(phases) + 1)
+            pending["phase_cards"]["phase"] += phases
+            cards = result.played_cards.get(name, ())
+            pending["played_cards"]["player"] += [player] * len(cards)
+            pending["played_cards"]["card"] += cards
+            self._players += 1
+        rounds = len(next(iter(result.global_parameter_timelines.values()), ()))
+        pending["rounds"]["game"] += [game] * rounds
+        pending["rounds"]["round"] += range(1, rounds + 1)
+        for name in PARAMETER_NAMES:
+            pending["rounds"][name] += result.global_parameter_timelines.get(name, [0] * rounds)
+        self._games += 1
+        self._pending_games += 1
+        if self._pending_games >= self.chunk_size:
+            self._seal()
+
+    def extend(self, results: Iterable[GameResult]) -> None:
+        """
+        Adds the outcomes of the games as they come, i.e. straight from `Simulator.run`.
+        """
+        for result in results:
+            self.append(result)
+
+    def _name_code(self, name: str) -> int:
+        code = self._name_codes.get(name)
+        if code is None:
+            code = self._name_codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def _seal(self) -> None:
+        if not self._pending_games:
+            return
+        for table, columns in self._pending.items():
+            self._chunks[table].append({column: np.array(values, dtype=TABLES[table][column])
+                                        for column, values in columns.items()})
+        self._pending = self._empty_pending()
+        self._pending_games = 0
+
+    def table(self, name: str) -> Columns:
+        """
+        :param name: Name of the table, one of TABLES
+        :return: Columns of the table over all the games, by column name
+        :raises GameException: if there is no such table
+        """
+        if name not in TABLES:
+            raise GameException(f"Unknown game records table: {name}")
+        self._seal()
+        chunks = self._chunks[name]
+        if len(chunks) != 1:
+            # Merged once, later queries reuse the merged chunk
+            merged = {column: np.concatenate([c[column] for c in chunks]) if chunks else np.empty(0, dtype=dtype)
+                      for column, dtype in TABLES[name].items()}
+            self._chunks[name] = [merged]
+        return self._chunks[name][0]
+
+    def average_rounds(self, finished_only: bool = True) -> float:
+        """
+        :param finished_only: Leave out the games cut short by the round limit
+        :return: Average number of rounds the games lasted, 0 without games
+        """
+        games = self.table("games")
+        rounds = games["rounds"][games["finished"]] if finished_only else games["rounds"]
+        return float(rounds.mean()) if len(rounds) else 0.0
+
+    def card_statistics(self) -> CardStatistics:
+        """
+        :return: How often every project card was played and how often its player won
+        """
+        played = self.table("played_cards")
+        cards = played["card"]
+        if not len(cards):
+            none = np.empty(0, dtype=np.int64)
+            return CardStatistics(none, none, none)
+        won = self.table("players")["winner"][played["player"]]
+        plays = np.bincount(cards)
+        wins = np.bincount(cards[won], minlength=len(plays))
+        card_ids = np.flatnonzero(plays)
+        return CardStatistics(card_ids, plays[card_ids], wins[card_ids])
+
+    def phase_pick_frequencies(self, in_round: Optional[int] = None) -> dict[Phase, float]:
+        """
+        :param in_round: Only count the picks of this round, all rounds if omitted
+        :return: Share of the picks that went to every phase card
+        """
+        picks = self.table("phase_cards")
+        phases = picks["phase"] if in_round is None else picks["phase"][picks["round"] == in_round]
+        counts = np.bincount(phases, minlength=max(Phase) + 1)
+        total = max(1, len(phases))
+        return {phase: float(counts[phase]) / total for phase in Phase}
+
+    def average_timeline(self, parameter: Union[str, type]) -> np.ndarray:
+        """
+        :param parameter: Global parameter, or its name
+        :return: Average value of the parameter at the end of every round, over the games which lasted that long,
+        the first round first
+        :raises GameException: if the parameter isn't tracked
+        """
+        name = parameter if isinstance(parameter, str) else parameter.__name__
+        if name not in PARAMETER_NAMES:
+            raise GameException(f"Global parameter {name} is not tracked.")
+        rounds = self.table("rounds")
+        games = np.bincount(rounds["round"])[1:]
+        totals = np.bincount(rounds["round"], weights=rounds[name])[1:]
+        return totals / np.maximum(games, 1)
+
+    def save(self, path: Path) -> None:
+        """
+        Writes all the records to a single .npz file.
+
+        :param path: File to write
+        """
+        arrays = {f"{table}.{column}": values
+                  for table in TABLES for column, values in self.table(table).items()}
+        with open(path, "wb") as file:
+            np.savez(file, names=np.array(self.names, dtype=np.str_), **arrays)
+
+    @staticmethod
+    def load(path: Path, chunk_size: int = 4096) -> GameRecords:
+        """
+        Reads the records written by `save`, more games can be appended to them.
+
+        :param path: File to read
+        :param chunk_size: Number of games collected before their records are sealed into arrays
+        :return: The records
+        """
+        records = GameRecords(chunk_size)
+        with np.load(path, allow_pickle=False) as arrays:
+            for name in arrays["names"]:
+                records._name_code(str(name))
+            for table, columns in TABLES.items():
+                records._chunks[table].append({column: arrays[f"{table}.{column}"].astype(dtype, copy=False)
+                                               for column, dtype in columns.items()})
+        records._games = len(records._chunks["games"][0]["game_id"])
+        records._players = len(records._chunks["players"][0]["game"])
+        return records
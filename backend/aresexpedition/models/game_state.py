@@ -1,4 +1,4 @@
-from game import Turn
+from turn import Turn
 
 
 class GameState:
@@ -1,11 +1,17 @@
+from __future__ import annotations
+
 import random
 from abc import ABC, abstractmethod
+from bisect import bisect_right
 from dataclasses import dataclass
-from enum import Enum
-from typing import Type, Optional
+from enum import Enum, IntFlag
+from typing import Type, Optional, Callable, Iterable, TYPE_CHECKING
 from exceptions import GlobalRequirementException
-from game import Turn
-from player import Player
+from snapshot import GlobalRequirementsSnapshot
+from turn import Turn
+
+if TYPE_CHECKING:
+    from player import Player
 
 
 class GlobalParameterColor(Enum):
@@ -15,6 +21,16 @@ class GlobalParameterColor(Enum):
     White = 4
 
 
+class ParameterCrossing(IntFlag):
+    """
+    Thresholds a global parameter can cross when it increases.
+    """
+    Color = 1
+    Max = 2
+    # One of the values the subscriber asked to be notified of
+    Threshold = 4
+
+
 @dataclass
 class GlobalParameterPrize:
     award_tr: int = 1
@@ -34,15 +50,24 @@ class GlobalParameterPrize:
 
 
 class GlobalParameter(ABC):
+    # Lowest values of the Red, Yellow and White color bands, empty for parameters without colors
+    COLOR_BANDS: tuple[int, ...] = ()
+
     def __init__(self, minimum: int, maximum: int, step: int):
-        self.value = minimum
         self.minimum = minimum
         self.maximum = maximum
         self.step = step
         self.maxed_on_turn: Optional[Turn] = None
+        self.set_value(minimum)
+
+    def set_value(self, value: int) -> None:
+        self.value = value
+        # Colors only change on increase, so the band lookup is done here instead of on every query
+        self.color: Optional[GlobalParameterColor] = \
+            GlobalParameterColor(bisect_right(self.COLOR_BANDS, value) + 1) if self.COLOR_BANDS else None
 
     def increase(self, turn: Turn) -> GlobalParameterPrize:
-        self.value = min(self.maximum, self.value + self.step)
+        self.set_value(min(self.maximum, self.value + self.step))
         if self.is_maxed() and self.maxed_on_turn is None:
             self.maxed_on_turn = turn
         if self.is_complete(turn):
@@ -55,6 +80,18 @@ class GlobalParameter(ABC):
     def is_maxed(self) -> bool:
         return self.value == self.maximum
 
+    def get_color(self) -> Optional[GlobalParameterColor]:
+        return self.color
+
+    def compare_to_color(self, color: GlobalParameterColor) -> int:
+        """
+        :param color: color threshold to compare current parameter value to
+        :return: Returns 1 if parameter is at higher level than given color, 0 if equal or -1 if less
+        """
+        if self.color is None:
+            raise GlobalRequirementException(f"{type(self).__name__} has no color bands.")
+        return (self.color.value > color.value) - (self.color.value < color.value)
+
     @abstractmethod
     def _get_full_prize(self) -> GlobalParameterPrize:
         raise NotImplementedError
@@ -65,6 +102,8 @@ class GlobalParameter(ABC):
 
 
 class Temperature(GlobalParameter):
+    COLOR_BANDS: tuple[int, ...] = (-18, -8, 2)
+
     def __init__(self, minimum=-30, maximum=8, step=2):
         super().__init__(minimum, maximum, step)
 
@@ -74,26 +113,10 @@ class Temperature(GlobalParameter):
     def _get_residual_prize(self) -> GlobalParameterPrize:
         return GlobalParameterPrize(award_tr=False)
 
-    def get_color(self) -> GlobalParameterColor:
-        if self.value < -18:
-            return GlobalParameterColor.Purple
-        elif self.value < -8:
-            return GlobalParameterColor.Red
-        elif self.value < 2:
-            return GlobalParameterColor.Yellow
-        else:
-            return GlobalParameterColor.White
-
-    def compare_to_color(self, color: GlobalParameterColor):
-        """
-        :param color: color threshold to compare current temperature to
-        :return: Returns 1 if temperature is at higher level than given color, 0 if equal or -1 if less
-        """
-        temperature_color = self.get_color()
-        return 0 if temperature_color == color else 1 if temperature_color > color else -1
-
 
 class Oxygen(GlobalParameter):
+    COLOR_BANDS: tuple[int, ...] = (3, 7, 12)
+
     def __init__(self, minimum: int = 0, maximum: int = 14, step: int = 1):
         super().__init__(minimum, maximum, step)
 
@@ -103,24 +126,6 @@ class Oxygen(GlobalParameter):
     def _get_residual_prize(self) -> GlobalParameterPrize:
         return GlobalParameterPrize(award_tr=False)
 
-    def get_color(self) -> GlobalParameterColor:
-        if self.value < 3:
-            return GlobalParameterColor.Purple
-        elif self.value < 7:
-            return GlobalParameterColor.Red
-        elif self.value < 12:
-            return GlobalParameterColor.Yellow
-        else:
-            return GlobalParameterColor.White
-
-    def compare_to_color(self, color: GlobalParameterColor):
-        """
-        :param color: color threshold to compare current oxygen to
-        :return: Returns 1 if oxygen is at higher level than given color, 0 if equal or -1 if less
-        """
-        oxygen_color = self.get_color()
-        return 0 if oxygen_color == color else 1 if oxygen_color > color else -1
-
 
 class Oceans(GlobalParameter):
     OCEAN_PRIZES: list[GlobalParameterPrize] = [
@@ -135,14 +140,16 @@ class Oceans(GlobalParameter):
         GlobalParameterPrize(megacredits=1, plants=1)
     ]
 
-    def __init__(self, minimum: int = 0, maximum: int = 9, step: int = 1):
+    def __init__(self, minimum: int = 0, maximum: int = 9, step: int = 1, rng: Optional[random.Random] = None):
         super().__init__(minimum, maximum, step)
-        random.shuffle(Oceans.OCEAN_PRIZES)
+        # Each game draws from its own copy, so the shared class-level prize list is never exhausted
+        rng = rng if rng is not None else random.Random()
+        self.prizes: list[GlobalParameterPrize] = rng.sample(Oceans.OCEAN_PRIZES, len(Oceans.OCEAN_PRIZES))
         self.last_prize: Optional[GlobalParameterPrize] = None
 
     def _get_full_prize(self) -> GlobalParameterPrize:
-        next_prize: GlobalParameterPrize = Oceans.OCEAN_PRIZES.pop(0) \
-            if len(Oceans.OCEAN_PRIZES) > 0 \
+        next_prize: GlobalParameterPrize = self.prizes.pop(0) \
+            if len(self.prizes) > 0 \
             else self.last_prize
         self.last_prize = next_prize
         return next_prize
@@ -151,26 +158,86 @@ class Oceans(GlobalParameter):
         return GlobalParameterPrize(award_tr=False)
 
 
-class GlobalRequirements:
-    def __init__(self):
-        self.parameters: list[GlobalParameter] = [Temperature(), Oxygen(), Oceans()]
+# Called with a global parameter and the thresholds it just crossed
+ParameterCallback = Callable[[GlobalParameter, ParameterCrossing], None]
+
 
-    def _get_parameter(self, parameter_type: Type[GlobalParameter]) -> GlobalParameter:
-        parameter = next((p for p in self.parameters if isinstance(p, parameter_type)), None)
+class GlobalRequirements:
+    """
+    Global parameters of a game, looked up directly by their type.
+    Interested parties can subscribe to a parameter and get notified only when it crosses a color band,
+    reaches its maximum or reaches one of the values they are interested in, instead of polling the parameter values.
+    """
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.parameters: list[GlobalParameter] = [Temperature(), Oxygen(), Oceans(rng=rng)]
+        self._parameters: dict[Type[GlobalParameter], GlobalParameter] = {type(p): p for p in self.parameters}
+        # Callbacks by parameter, each with the ascending values it is also notified of
+        self._subscribers: dict[Type[GlobalParameter], list[tuple[ParameterCallback, tuple[int, ...]]]] = \
+            {type(p): list() for p in self.parameters}
+        self._maxed_count: int = 0
+
+    def get_parameter(self, parameter_type: Type[GlobalParameter]) -> GlobalParameter:
+        parameter = self._parameters.get(parameter_type)
         if parameter is None:
             raise GlobalRequirementException(f"Invalid global parameter type: {parameter_type}")
         return parameter
 
-    def increase_parameter(self, parameter_type: Type[GlobalParameter], turn: Turn) -> GlobalParameterPrize:
-        parameter = self._get_parameter(parameter_type)
-        return parameter.increase(turn)
+    def subscribe(self, parameter_type: Type[GlobalParameter], callback: ParameterCallback,
+                  thresholds: Iterable[int] = ()) -> None:
+        """
+        Registers a callback to be called whenever the parameter crosses into another color band, gets maxed out
+        or reaches one of the given thresholds. Restoring a snapshot doesn't notify the subscribers.
 
-    def end_game_condition_met(self):
-        for p in self.parameters:
-            if not p.is_maxed():
-                return False
-        return True
+        :param parameter_type: Type of the parameter to watch
+        :param callback: Called with the parameter and the thresholds it just crossed
+        :param thresholds: Values the callback is also notified of, once the parameter goes from below to at or above
+        :raises GlobalRequirementException: if there is no such parameter
+        """
+        self.get_parameter(parameter_type)
+        self._subscribers[parameter_type].append((callback, tuple(sorted(thresholds))))
+
+    def increase_parameter(self, parameter_type: Type[GlobalParameter], turn: Turn) -> GlobalParameterPrize:
+        parameter = self.get_parameter(parameter_type)
+        value = parameter.value
+        color = parameter.color
+        was_maxed = parameter.is_maxed()
+        prize = parameter.increase(turn)
+        crossing = ParameterCrossing(0)
+        if parameter.color != color:
+            crossing |= ParameterCrossing.Color
+        if parameter.is_maxed() and not was_maxed:
+            crossing |= ParameterCrossing.Max
+            self._maxed_count += 1
+        for callback, thresholds in self._subscribers[parameter_type]:
+            crossed = crossing
+            if bisect_right(thresholds, value) != bisect_right(thresholds, parameter.value):
+                crossed |= ParameterCrossing.Threshold
+            if crossed:
+                callback(parameter, crossed)
+        return prize
+
+    def snapshot(self) -> GlobalRequirementsSnapshot:
+        oceans = self.get_parameter(Oceans)
+        return GlobalRequirementsSnapshot(
+            values=tuple(p.value for p in self.parameters),
+            maxed_on_turns=tuple(p.maxed_on_turn.freeze() if p.maxed_on_turn is not None else None
+                                 for p in self.parameters),
+            ocean_prizes=tuple(Oceans.OCEAN_PRIZES.index(prize) for prize in oceans.prizes),
+            last_ocean_prize=Oceans.OCEAN_PRIZES.index(oceans.last_prize) if oceans.last_prize is not None else None)
+
+    def restore(self, snapshot: GlobalRequirementsSnapshot) -> None:
+        for parameter, value, maxed_on_turn in zip(self.parameters, snapshot.values, snapshot.maxed_on_turns):
+            parameter.set_value(value)
+            parameter.maxed_on_turn = Turn.thaw(maxed_on_turn) if maxed_on_turn is not None else None
+        oceans = self.get_parameter(Oceans)
+        oceans.prizes = [Oceans.OCEAN_PRIZES[i] for i in snapshot.ocean_prizes]
+        oceans.last_prize = Oceans.OCEAN_PRIZES[snapshot.last_ocean_prize] \
+            if snapshot.last_ocean_prize is not None else None
+        self._maxed_count = sum(p.is_maxed() for p in self.parameters)
+
+    def end_game_condition_met(self) -> bool:
+        return self._maxed_count == len(self.parameters)
 
     def parameter_complete(self, parameter_type: Type[GlobalParameter], turn: Turn):
-        parameter = self._get_parameter(parameter_type)
+        parameter = self.get_parameter(parameter_type)
         return parameter.is_complete(turn)
@@ -0,0 +1,210 @@
+"""
+Counters and latency histograms cheap enough to stay on in production.
+
+Every thread records into its own buckets, without taking any lock, and the buckets of all threads are only
+added up when the metrics get scraped. Buckets of finished threads are folded into a retired total on scrape,
+so short-lived request threads don't pile up.
+"""
+import bisect
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# Label values of a sample, in the order of the metric's label names
+LabelValues = tuple[str, ...]
+
+DEFAULT_BUCKETS: tuple[float, ...] = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                                      0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class _Metric:
+    TYPE: str = ""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        """
+        :param name: Metric name, as exposed to Prometheus
+        :param documentation: Help text of the metric
+        :param labels: Names of the labels
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: list[tuple[threading.Thread, dict]] = list()
+        self._retired: dict = dict()
+
+    def _values(self) -> dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = dict()
+            with self._lock:
+                self._shards.append((threading.current_thread(), values))
+            return values
+
+    def _merge(self, total: dict, values: dict) -> None:
+        raise NotImplementedError
+
+    def collect(self) -> dict:
+        """
+        :return: Values of all threads added up, by label values
+        """
+        with self._lock:
+            live = list[tuple[threading.Thread, dict]]()
+            for thread, values in self._shards:
+                if thread.is_alive():
+                    live.append((thread, values))
+                else:
+                    self._merge(self._retired, values)
+            self._shards = live
+            total = dict()
+            self._merge(total, self._retired)
+            for _, values in live:
+                # Copying a dict doesn't run any Python code, so the owning thread can't change it meanwhile
+                self._merge(total, dict(values))
+            return total
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.TYPE}"
+
+
+class Counter(_Metric):
+    TYPE = "counter"
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        values = self._values()
+        values[label_values] = values.get(label_values, 0) + amount
+
+    def _merge(self, total: dict, values: dict) -> None:
+        for key, value in values.items():
+            total[key] = total.get(key, 0) + value
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        for label_values, value in sorted(self.collect().items()):
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    TYPE = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        :param buckets: Upper bounds of the buckets in ascending order, without the implicit +Inf
+        """
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+
+    def observe(self, value: float, *label_values: str) -> None:
+        values = self._values()
+        # Counts per bucket, not cumulative, followed by the sum of the observed values
+        counts = values.get(label_values)
+        if counts is None:
+            counts = values[label_values] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    @contextmanager
+    def time(self, *label_values: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def _merge(self, total: dict, values: dict) -> None:
+        for key, counts in values.items():
+            counts = list(counts)
+            merged = total.get(key)
+            total[key] = counts if merged is None else [a + b for a, b in zip(merged, counts)]
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        for label_values, counts in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labels + ("le",), label_values + (_format_value(bound),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(counts[-1])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return f"{{{pairs}}}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = dict[str, _Metric]()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """
+        Adds the metric, or returns the already registered metric with the same name.
+        """
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        """
+        :return: All metrics in the Prometheus text exposition format
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(f"{line}\n" for metric in metrics for line in metric.render())
+
+
+def _shared_registry() -> Optional[MetricsRegistry]:
+    # The rules engine imports its modules by their bare names while the web app imports them through the package,
+    # so this module can be loaded twice. Both copies must record into the same registry.
+    for name in ("instrumentation", "aresexpedition.models.instrumentation"):
+        module = sys.modules.get(name)
+        if module is not None and hasattr(module, "REGISTRY"):
+            return module.REGISTRY
+    return None
+
+
+REGISTRY: MetricsRegistry = _shared_registry() or MetricsRegistry()
+
+PLAYER_ACTIONS: Counter = REGISTRY.counter("ares_player_actions_total", "Player actions handled by the game.",
+                                           ("action",))
+PLAYER_ACTION_SECONDS: Histogram = REGISTRY.histogram("ares_player_action_seconds",
+                                                      "Time spent applying a player action.", ("action",))
+TURN_TRANSITIONS: Counter = REGISTRY.counter("ares_turn_transitions_total",
+                                             "Transitions of the games to their next turn, by the new round step.",
+                                             ("step",))
+DECK_RESHUFFLES: Counter = REGISTRY.counter("ares_deck_reshuffles_total",
+                                            "Discard piles shuffled into empty decks.")
+HTTP_REQUESTS: Counter = REGISTRY.counter("ares_http_requests_total", "Handled HTTP requests.",
+                                          ("method", "endpoint", "status"))
+HTTP_REQUEST_SECONDS: Histogram = REGISTRY.histogram("ares_http_request_seconds",
+                                                     "Time spent handling an HTTP request.", ("endpoint",))
+LOG_RECORDS_DROPPED: Counter = REGISTRY.counter("ares_log_records_dropped_total",
+                                                "Log records dropped because the logging queue was full.")
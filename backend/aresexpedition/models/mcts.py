@@ -0,0 +1,296 @@
+import math
+import multiprocessing
+import multiprocessing.pool
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from enums import PlayerAction
+from exceptions import GameException
+from game import Game
+from move import Move
+from player import Player
+from serialization import encode_snapshot, decode_snapshot
+from simulation import MANDATORY_ACTIONS, Policy, RandomPolicy, play_rounds
+
+
+@dataclass(frozen=True)
+class SearchSettings:
+    exploration: float
+    # Rounds played by a rollout before the position is scored, finished or not
+    rollout_rounds: int
+    # Sampled argument combinations per action with too many of them to enumerate, i.e. the cards kept on research
+    samples: int
+    max_moves_per_turn: int
+
+
+@dataclass
+class RootStatistics:
+    move: Optional[Move]
+    visits: int
+    reward: float
+
+
+class _Node:
+    def __init__(self, move: Optional[Move], parent: Optional["_Node"] = None):
+        # Move leading to the node, None for passing the rest of the turn
+        self.move = move
+        self.parent = parent
+        self.children: dict[Optional[Move], _Node] = dict[Optional[Move], "_Node"]()
+        self.visits: int = 0
+        self.reward: float = 0.0
+
+    def ucb(self, exploration: float) -> float:
+        return self.reward / self.visits + exploration * math.sqrt(math.log(self.parent.visits) / self.visits)
+
+
+def candidate_moves(player: Player, actions: list[PlayerAction], rng: random.Random, samples: int) \
+        -> list[Optional[Move]]:
+    """
+    Lists the moves worth considering for the player: every card that can be played or activated,
+    every corporation and phase card that can be chosen, and a few samples of the choices that can't be enumerated.
+    Passing, listed as None, is a candidate unless an action is mandatory.
+
+    :param player: Player on the move
+    :param actions: Actions currently available to the player
+    :param rng: Random generator for the samples
+    :param samples: Maximum number of samples per action
+    :return: Candidate moves, without duplicates
+    """
+    builder = RandomPolicy(rng)
+    mandatory = any(a in MANDATORY_ACTIONS for a in actions)
+    moves = list[Optional[Move]]()
+    for action in actions:
+        if (mandatory and action not in MANDATORY_ACTIONS) or action == PlayerAction.SellProjectCards:
+            continue
+        if action in (PlayerAction.PlayGreenCard, PlayerAction.PlayRedOrBlueCard):
+            moves.extend(Move(action, cards=(c,)) for c in player.get_playable_cards())
+        elif action == PlayerAction.ResolveActionAbilities:
+            moves.extend(Move(action, cards=(c,)) for c in player.get_cards_with_playable_actions())
+        elif action == PlayerAction.ChooseCorporation:
+            moves.extend(Move(action, cards=(c,)) for c in player.starting_corporation_cards)
+        elif action == PlayerAction.ChoosePhaseCard:
+            moves.extend(Move(action, phase=p) for p in player.phase_cards if p != player.current_phase_card)
+        elif action in (PlayerAction.Research, PlayerAction.RedrawProjectCards, PlayerAction.DiscardDownTo10Cards):
+            moves.extend(builder.build_move(player, action) for _ in range(samples))
+        else:
+            moves.append(Move(action))
+    if not mandatory:
+        moves.append(None)
+    return list(dict.fromkeys(moves))
+
+
+def score(game: Game, player: Player) -> float:
+    """
+    Scores the position for the player: 1 if the player leads on victory points, shared among the players tied
+    for the lead, 0 otherwise.
+    """
+    best = max(p.get_total_vp() for p in game.players)
+    if player.get_total_vp() != best:
+        return 0.0
+    return 1.0 / sum(1 for p in game.players if p.get_total_vp() == best)
+
+
+class TreeSearch:
+    """
+    Monte Carlo tree search over the moves of one player for the rest of the current turn. Every iteration
+    restores the game to the root position, reshuffles the project deck so the search can't rely on the order
+    of the hidden cards, walks down the tree picking moves by UCB1, expands one new move, and plays the game on
+    with random moves of all players for a few rounds to score the outcome.
+
+    Moves which are not legal in the position an iteration reaches are skipped, since the reshuffled deck
+    may change what the player draws along the way.
+    """
+    def __init__(self, game: Game, player_name: str, settings: SearchSettings, seed: int):
+        """
+        :param game: Game to search, which gets modified, so it must not be the live game
+        :param player_name: Name of the player on the move
+        :param settings: Search settings
+        :param seed: Seed of the rollouts and of the move samples
+        """
+        self.game = game
+        self.player = game.get_player(player_name)
+        self.settings = settings
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.root_snapshot = game.snapshot()
+        self.root = _Node(None)
+        self.iterations: int = 0
+
+    def run(self, deadline: float) -> list[RootStatistics]:
+        """
+        Searches until the deadline, which is also checked during the rollouts, so the search doesn't overrun it
+        by more than a move.
+
+        :param deadline: Time to stop at, as given by `time.perf_counter`
+        :return: Statistics of the moves tried from the root position, empty if the deadline passed before
+        any of them got tried
+        """
+        while time.perf_counter() < deadline:
+            self.iterate(deadline)
+        return [RootStatistics(move, node.visits, node.reward) for move, node in self.root.children.items()]
+
+    def iterate(self, deadline: Optional[float] = None) -> None:
+        """
+        Runs one iteration of the search. A rollout cut short by the deadline scores the position it got to.
+
+        :param deadline: Time to stop the rollout at, as given by `time.perf_counter`
+        """
+        game, player = self.game, self.player
+        game.restore(self.root_snapshot)
+        game.rng.seed(self.rng.getrandbits(64))
+        game.project_deck.shuffle()
+        node = self.root
+        path = [node]
+        try:
+            for _ in range(self.settings.max_moves_per_turn):
+                actions = player.get_available_actions()
+                if not actions:
+                    break
+                # Sampled moves must be the same every time the node is reached, or it never stops expanding
+                candidates = candidate_moves(player, actions, random.Random(self.seed), self.settings.samples)
+                untried = [m for m in candidates if m not in node.children]
+                if untried:
+                    move = self.rng.choice(untried)
+                    child = node.children[move] = _Node(move, node)
+                    node = child
+                else:
+                    node = max((node.children[m] for m in candidates),
+                               key=lambda child: child.ucb(self.settings.exploration))
+                path.append(node)
+                if node.move is None:
+                    break
+                game.apply(player, node.move)
+                if untried:
+                    break
+            # Unless the player passed, the rest of the turn is played on with random moves like everything else
+            reward = self.rollout(node is self.root or node.move is not None, deadline)
+        except GameException:
+            # Random moves may still run into rules the candidates don't check, the position counts as lost
+            reward = 0.0
+        for node in path:
+            node.visits += 1
+            node.reward += reward
+        self.iterations += 1
+
+    def rollout(self, continue_turn: bool, deadline: Optional[float] = None) -> float:
+        game, player = self.game, self.player
+        policies = {p.name: RandomPolicy(self.rng) for p in game.players}
+        position = game.players.index(player)
+        players = game.players[position:] if continue_turn else game.players[position + 1:]
+        play_rounds(game, policies, game.get_current_round() + self.settings.rollout_rounds,
+                    self.settings.max_moves_per_turn, players, deadline)
+        return score(game, player)
+
+
+def _search(data: bytes, player_name: str, settings: SearchSettings, seed: int,
+            deadline: float) -> list[RootStatistics]:
+    # The deadline comes as wall clock time, performance counters of different processes can't be compared.
+    # Tasks which only start once the deadline passed, i.e. queued behind a slow search, give up right away.
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        return list[RootStatistics]()
+    game = Game.from_snapshot(decode_snapshot(data))
+    return TreeSearch(game, player_name, settings, seed).run(time.perf_counter() + remaining)
+
+
+class MonteCarloPolicy(Policy):
+    """
+    Bot player choosing its moves by Monte Carlo tree search within a fixed time budget per decision.
+
+    The search is parallelized at the root: every worker process searches its own tree of the same position
+    with its own random generator, and the statistics of the moves from the root are added up in the end.
+    More cores mean more rollouts in the same time, so the moves get better without taking longer.
+    Results of workers which miss the budget are left out, rather than keeping the caller waiting, and workers
+    give up on searches whose budget ran out before they got to them, so they don't delay the next decision.
+    """
+    DEFAULT_TIME_BUDGET: float = 1.0
+    # Part of the time budget kept for sending the position to the workers and collecting the results
+    POOL_OVERHEAD: float = 0.05
+
+    def __init__(self, rng: random.Random, time_budget: float = DEFAULT_TIME_BUDGET, processes: Optional[int] = None,
+                 exploration: float = math.sqrt(2), rollout_rounds: int = 10, samples: int = 4,
+                 max_moves_per_turn: int = 50):
+        """
+        :param rng: Random generator of the policy, seeding the searches
+        :param time_budget: Seconds available for each decision
+        :param processes: Number of worker processes, defaults to the number of CPUs. If set to 1,
+        or if the policy itself runs in a worker process, i.e. in the Simulator, the search runs in the current
+        process instead.
+        :param exploration: UCB1 exploration constant, higher values try more moves instead of the best ones
+        :param rollout_rounds: Rounds played by each rollout before scoring the position
+        :param samples: Sampled choices per research, redraw or discard decision
+        :param max_moves_per_turn: Safety limit for the rollout policies that never pass
+        """
+        super().__init__(rng)
+        self.time_budget = time_budget
+        if processes is None:
+            processes = 1 if multiprocessing.current_process().daemon else os.cpu_count() or 1
+        self.processes = processes
+        self.exploration = exploration
+        self.rollout_rounds = rollout_rounds
+        self.samples = samples
+        self.max_moves_per_turn = max_moves_per_turn
+        self._pool: Optional[multiprocessing.pool.Pool] = None
+
+    def choose_move(self, player: Player, actions: list[PlayerAction]) -> Optional[Move]:
+        candidates = candidate_moves(player, actions, self.rng, self.samples)
+        if len(candidates) == 1:
+            # Nothing to decide, the whole time budget is saved
+            return candidates[0]
+        statistics = self.search(player)
+        if not statistics:
+            return RandomPolicy(self.rng).choose_move(player, actions)
+        return max(statistics, key=lambda s: (s.visits, s.reward / s.visits)).move
+
+    def search(self, player: Player) -> list[RootStatistics]:
+        """
+        Searches the moves of the player, in a copy of the game the player takes part in.
+
+        :param player: Player on the move
+        :return: Statistics of the candidate moves, added up over all workers which finished in time
+        """
+        start = time.perf_counter()
+        snapshot = player.game.snapshot()
+        settings = self._settings()
+        if self.processes == 1:
+            return TreeSearch(Game.from_snapshot(snapshot), player.name, settings, self.rng.getrandbits(64)) \
+                .run(start + self.time_budget)
+        data = encode_snapshot(snapshot)
+        deadline = time.time() + self.time_budget - MonteCarloPolicy.POOL_OVERHEAD
+        pool = self._get_pool()
+        results = [pool.apply_async(_search, (data, player.name, settings, self.rng.getrandbits(64), deadline))
+                   for _ in range(self.processes)]
+        merged = dict[Optional[Move], RootStatistics]()
+        for result in results:
+            try:
+                statistics = result.get(max(0.0, start + self.time_budget - time.perf_counter()))
+            except multiprocessing.TimeoutError:
+                continue
+            for s in statistics:
+                total = merged.setdefault(s.move, RootStatistics(s.move, 0, 0.0))
+                total.visits += s.visits
+                total.reward += s.reward
+        return list(merged.values())
+
+    def close(self) -> None:
+        """
+        Stops the worker processes. The policy starts new ones if it's used again.
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    def _settings(self) -> SearchSettings:
+        return SearchSettings(exploration=self.exploration,
+                              rollout_rounds=self.rollout_rounds,
+                              samples=self.samples,
+                              max_moves_per_turn=self.max_moves_per_turn)
+
+    def _get_pool(self) -> multiprocessing.pool.Pool:
+        # Started once and kept, starting processes for every decision would eat up the time budget
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self.processes)
+        return self._pool
@@ -0,0 +1,39 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from enums import PlayerAction, Phase
+from exceptions import GameException
+
+
+@dataclass(frozen=True)
+class Move:
+    """
+    A single player decision: the PlayerAction to perform and the arguments it needs.
+    Cards are catalog IDs of the action targets (card to play, cards to sell, corporation to keep...),
+    while phase is only used when choosing the phase card.
+    """
+    action: PlayerAction
+    cards: tuple[int, ...] = ()
+    phase: Optional[Phase] = None
+
+    def to_dict(self) -> dict:
+        return {"action": self.action.name,
+                "cards": list(self.cards),
+                "phase": self.phase.name if self.phase is not None else None}
+
+    @staticmethod
+    def from_dict(data: dict) -> "Move":
+        """
+        Reads the move from its JSON form, with the action and phase given by their names.
+
+        :param data: Dictionary with the action, and optional cards and phase
+        :return: The move
+        :raises GameException: if the dictionary doesn't describe a valid move
+        """
+        try:
+            action = PlayerAction[data["action"]]
+            phase = Phase[data["phase"]] if data.get("phase") is not None else None
+            cards = tuple(int(c) for c in data.get("cards") or ())
+        except (KeyError, TypeError, ValueError) as e:
+            raise GameException(f"Invalid move: {e}")
+        return Move(action, cards, phase)
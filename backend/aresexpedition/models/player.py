@@ -1,24 +1,51 @@
+from collections import Counter
 from typing import Type, Optional
-from card import ProjectCard, CorporationCard, CardColor, BlueProjectCard
+from card import CardColor, BlueProjectCard
+from card_catalog import PROJECT_CATALOG, CORPORATION_CATALOG
 from deck import Deck
-from enums import PlayerColor, Phase, PlayerAction, RoundStep
+from enums import PlayerColor, Phase, PlayerAction, RoundStep, PlayerStateChange, EffectTrigger, VictoryPointSource
 from exceptions import GameException
 from game import Game
-from global_requirements import GlobalParameter
-from player_board import PlayerBoard
+from global_requirements import GlobalParameter, Temperature, Oxygen, Oceans
+from move import Move
+from player_board import PlayerBoard, BoardStore
+from points import Score, resource_points
+from snapshot import PlayerSnapshot
+
+# Combining IntFlag members builds a new flag on every call, which shows on the hot paths of the action cache,
+# so the masks are combined once, as plain ints
+_PLAYABLE_CARDS_DEPENDENCIES: int = int(PlayerStateChange.Resources | PlayerStateChange.Phase | PlayerStateChange.Hand
+                                        | PlayerStateChange.GlobalParameters)
+_CARD_ACTIONS_DEPENDENCIES: int = int(PlayerStateChange.Resources | PlayerStateChange.Phase
+                                      | PlayerStateChange.PlayedCards)
+_PRODUCTION_CHANGES: int = int(PlayerStateChange.Resources | PlayerStateChange.Phase | PlayerStateChange.Hand)
+_PLAYED_CARD_CHANGES: int = int(PlayerStateChange.Hand | PlayerStateChange.PlayedCards)
+_NEW_ROUND_CHANGES: int = int(PlayerStateChange.Phase | PlayerStateChange.PlayedCards)
+_RESEARCH_CHANGES: int = int(PlayerStateChange.Hand | PlayerStateChange.Phase)
 
 
 class Player:
+    HAND_LIMIT: int = 10
+    PRODUCTION_BONUS_MEGACREDITS: int = 4
+    RESEARCH_DRAW: int = 2
+    RESEARCH_KEEP: int = 1
+    RESEARCH_BONUS_DRAW: int = 5
+    RESEARCH_BONUS_KEEP: int = 2
+
     def __init__(self, name: str, color: PlayerColor):
         self.name: str = name
         self.game: Optional[Game] = None
         self.terraforming_rating: int = 5
         self.greenery_tokens: int = 0
+        # Victory points, updated along with everything they are scored from
+        self.score: Score = Score()
+        self.score.add(VictoryPointSource.TerraformingRating, self.terraforming_rating)
         self.color: PlayerColor = color
-        self.project_cards: Optional[list[ProjectCard]] = None
-        self.starting_corporation_cards: Optional[list[CorporationCard]] = None
-        self.project_deck: Optional[Deck[ProjectCard]] = None
-        self.corporation_deck: Optional[Deck[CorporationCard]] = None
+        # Cards are referenced by their IDs in PROJECT_CATALOG and CORPORATION_CATALOG
+        self.project_cards: Optional[list[int]] = None
+        self.starting_corporation_cards: Optional[list[int]] = None
+        self.project_deck: Optional[Deck] = None
+        self.corporation_deck: Optional[Deck] = None
         self.phase_cards: list[Phase] = [Phase.Development,
                                          Phase.Construction,
                                          Phase.Action,
@@ -26,9 +53,10 @@ class Player:
                                          Phase.Research]
         self.current_phase_card: Optional[Phase] = None
         self.last_phase_card: Optional[Phase] = None
-        self.corporation_card: Optional[CorporationCard] = None
+        self.corporation_card: Optional[int] = None
         self.board: PlayerBoard = PlayerBoard()
-        self.played_project_cards: list[ProjectCard] = list[ProjectCard]()
+        self.board.on_change = self._on_board_change
+        self.played_project_cards: list[int] = list[int]()
         self.redrew_starting_project_cards: bool = False
         self.has_picked_corporation: bool = False
         self.has_picked_phase_card: bool = False
@@ -42,69 +70,117 @@ class Player:
         self.temperature_heat_cost: int = Game.DEFAULT_TEMPERATURE_HEAT_COST
         self.temperature_mc_cost: int = Game.DEFAULT_TEMPERATURE_MC_COST
         self.ocean_mc_cost: int = Game.DEFAULT_OCEAN_MC_COST
+        self.research_cards: list[int] = list[int]()
+        # Per-game state of the played cards. Card objects are shared definitions and must stay unchanged.
+        self.card_resources: dict[int, int] = dict[int, int]()
+        self.used_card_actions: set[int] = set[int]()
+        # Available actions are maintained incrementally: state changes only mark the affected parts as stale
+        # (see `invalidate_actions`) and the next query recomputes just those, so polling is a plain read.
         self.available_actions: list[PlayerAction] = list[PlayerAction]()
+        self._available_actions_stale: bool = True
+        self._playable_cards: Optional[list[int]] = None
+        self._cards_with_playable_actions: Optional[list[int]] = None
+        # Incremented whenever the private state of the player (see `to_private_dict`) may have changed
+        self.private_version: int = 0
 
     def is_eligible_for_bonus(self, phase: Phase):
-        return self.current_phase_card == phase and self.used_phase_bonus
+        return self.current_phase_card == phase and not self.used_phase_bonus
 
     def use_phase_bonus(self, phase: Phase):
         if not self.is_eligible_for_bonus(phase):
             raise GameException(f"Player not eligible for {phase} bonus.")
         self.used_phase_bonus = True
+        self.invalidate_actions(PlayerStateChange.Phase)
+
+    def invalidate_actions(self, change: int) -> None:
+        """
+        Marks the parts of the available actions that depend on the changed state as stale.
+        They are recomputed on the next query.
+
+        :param change: Parts of the player state that changed, a `PlayerStateChange` or a combination as plain int
+        """
+        self._available_actions_stale = True
+        self.private_version += 1
+        change = int(change)
+        if change & _PLAYABLE_CARDS_DEPENDENCIES:
+            self._playable_cards = None
+        if change & _CARD_ACTIONS_DEPENDENCIES:
+            self._cards_with_playable_actions = None
+
+    def _on_board_change(self) -> None:
+        self.invalidate_actions(PlayerStateChange.Resources)
+
+    def set_board(self, board: PlayerBoard) -> None:
+        self.board = board
+        self.board.on_change = self._on_board_change
+        self.invalidate_actions(PlayerStateChange.Resources)
 
     def link_to_game(self, game: Game) -> None:
         self.game = game
+        self.invalidate_actions(PlayerStateChange.All)
 
-    def assign_starting_corporations(self, corporations: list[CorporationCard]) -> None:
+    def assign_starting_corporations(self, corporations: list[int]) -> None:
         self.starting_corporation_cards = corporations
+        self.invalidate_actions(PlayerStateChange.Hand)
 
-    def assign_starting_project_cards(self, project_cards: list[ProjectCard]) -> None:
+    def assign_starting_project_cards(self, project_cards: list[int]) -> None:
         self.project_cards = project_cards
+        self.invalidate_actions(PlayerStateChange.Hand)
 
-    def give_access_to_project_deck(self, deck: Deck[ProjectCard]) -> None:
+    def give_access_to_project_deck(self, deck: Deck) -> None:
         self.project_deck = deck
 
-    def give_access_to_corporation_deck(self, deck: Deck[CorporationCard]) -> None:
+    def give_access_to_corporation_deck(self, deck: Deck) -> None:
         self.corporation_deck = deck
 
-    def choose_corporation(self, card: CorporationCard) -> None:
+    def choose_corporation(self, card_id: int) -> None:
         """
         Sets the corporation card as chosen for the remainder of the game.
 
-        :param card: corporation card to keep
+        :param card_id: ID of the corporation card to keep
         """
-        self.corporation_card = card
-        self.corporation_card.play(self)
+        self.corporation_card = card_id
+        corporation = CORPORATION_CATALOG[card_id]
+        corporation.play(self)
+        if corporation.effect is not None:
+            self.game.effects.subscribe(self, card_id, corporation.effect)
         self.has_picked_corporation = True
+        self.invalidate_actions(PlayerStateChange.Phase)
 
-    def _discard_project_cards(self, cards: list[ProjectCard]) -> int:
+    def _discard_project_cards(self, cards: list[int]) -> int:
         """
         Discards the listed project cards from player's hand.
 
-        :param cards: List of project cards to discard
+        :param cards: IDs of the project cards to discard
         :return: Number of discarded cards
+        :raises GameException: if any of the cards is not in player's hand, or is listed more often than it's held
         """
+        if not _holds_all(self.project_cards, cards):
+            raise GameException("Cannot discard project cards that are not in hand.")
+        for c in cards:
+            self.project_cards.remove(c)
         self.project_deck.discard(cards)
+        self.invalidate_actions(PlayerStateChange.Hand)
         return len(cards)
 
-    def sell_project_cards(self, cards: list[ProjectCard]) -> int:
+    def sell_project_cards(self, cards: list[int]) -> int:
         """
         Sells the listed cards. Cards are discarded and player receives 3 Megacredits for each card in the list.
 
-        :param cards: list of project cards player wants to sell
+        :param cards: IDs of the project cards player wants to sell
         :return: Number of sold cards
         """
         num_cards = self._discard_project_cards(cards)
         self.board.add_megacredits(3*num_cards)
         return num_cards
 
-    def redraw_starting_project_cards(self, project_cards: list[ProjectCard]) -> int:
+    def redraw_starting_project_cards(self, project_cards: list[int]) -> int:
         """
         Listed project cards will be discarded from player's hand without receiving any prize.
         Player will then draw (receive) the same number of new project cards from deck.
         This can be done only once per game and only before choosing the starting corporation card.
 
-        :param project_cards: Project cards to discard
+        :param project_cards: IDs of the project cards to discard
         :return: Number of discarded (but also drawn) cards
         """
         if self.has_picked_corporation:
@@ -114,18 +190,22 @@ class Player:
         amount = self._discard_project_cards(project_cards)
         self.draw_project_cards(amount)
         self.redrew_starting_project_cards = True
+        self.invalidate_actions(PlayerStateChange.Phase)
         return amount
 
     def increase_global_parameter(self, parameter_type: Type[GlobalParameter]) -> None:
         prize = self.game.global_requirements.increase_parameter(parameter_type, self.game.get_current_turn())
         prize.award_to_player(self)
+        self.game.effects.fire(EffectTrigger.GlobalParameterRaised, parameter_type, self)
 
     def add_terraforming_rating(self, points: int) -> int:
         self.terraforming_rating += points
+        self.score.add(VictoryPointSource.TerraformingRating, points)
         return self.terraforming_rating
 
     def add_greenery_token(self) -> int:
         self.greenery_tokens += 1
+        self.score.add(VictoryPointSource.GreeneryTokens, 1)
         return self.greenery_tokens
 
     def deduct_terraforming_rating(self, points: int) -> int:
@@ -135,19 +215,24 @@ class Player:
         :param points: Number of TR points to deduct.
         :return: Player's total TR after deduction
         """
-        self.terraforming_rating = max(0, self.terraforming_rating - points)
+        deducted = min(points, self.terraforming_rating)
+        self.terraforming_rating -= deducted
+        self.score.add(VictoryPointSource.TerraformingRating, -deducted)
         return self.terraforming_rating
 
     def get_total_vp(self) -> int:
         """
-        Returns player's current victory point total.
+        Returns player's current victory point total. The total is kept up to date as the player scores,
+        see `score` for the points by their source.
+
         :return: Number of player's VP
         """
-        raise NotImplementedError
+        return self.score.total
 
     def produce(self) -> None:
         """
         Performs production step for the player.
+        Megacredit income equals megacredit production plus terraforming rating.
 
         :raises GameException: if outside the `Phase.Production` phase
         """
@@ -155,9 +240,34 @@ class Player:
             raise GameException(f"Cannot perform action {PlayerAction.Produce}.")
         self.board.add_heat(self.board.production_heat)
         self.board.add_plants(self.board.production_plants)
-        self.board.add_megacredits(self.board.production_megacredits)
-        self.draw_project_cards(self.board.production_cards)
+        self.board.add_megacredits(self.board.production_megacredits + self.use_production_income())
+        self.finish_production(self.project_deck.draw(self.board.production_cards))
+
+    def use_production_income(self) -> int:
+        """
+        Returns the megacredits earned in the production step on top of megacredit production:
+        terraforming rating, plus the Production phase bonus, which gets used up.
+
+        :return: Additional megacredit income
+        """
+        income = self.terraforming_rating
+        if self.is_eligible_for_bonus(Phase.Production):
+            # The phase change is marked by finish_production, together with everything else production changes
+            self.used_phase_bonus = True
+            income += Player.PRODUCTION_BONUS_MEGACREDITS
+        return income
+
+    def finish_production(self, drawn_cards: list[int]) -> None:
+        """
+        Adds the produced cards to the hand and marks the production step as done,
+        once the board resources are produced.
+
+        :param drawn_cards: Cards drawn for the card production of the player
+        """
+        self.project_cards.extend(drawn_cards)
         self.has_produced = True
+        # Vectorized production changes the board behind its back, so resources are marked here as well
+        self.invalidate_actions(_PRODUCTION_CHANGES)
 
     def draw_project_cards(self, amount: int) -> int:
         """
@@ -168,6 +278,7 @@ class Player:
         """
         drawn_cards = self.project_deck.draw(amount)
         self.project_cards.extend(drawn_cards)
+        self.invalidate_actions(PlayerStateChange.Hand)
         return len(drawn_cards)
 
     def get_project_hand_size(self) -> int:
@@ -180,43 +291,85 @@ class Player:
         :param phase_card: Chosen phase card
         :return: Chosen phase card
         :raises GameException: if player chose the same card two rounds in a row,
-        or if the player chose the phase card this round.
+        or if the player chose the phase card this round, or if the phase card is missing or unknown.
         """
+        if phase_card is None or phase_card not in self.phase_cards:
+            raise GameException("A phase card must be chosen from the player's phase cards.")
         if self.has_picked_phase_card:
             raise GameException("Player already chose the phase card this round.")
-        if phase_card == self.last_phase_card:
+        if phase_card == self.current_phase_card:
             raise GameException("Cannot play the same phase card twice in a row.")
         self.last_phase_card = self.current_phase_card
         self.current_phase_card = phase_card
         self.has_picked_phase_card = True
+        self.invalidate_actions(PlayerStateChange.Phase)
         return self.current_phase_card
 
-    def play_project_card(self, card: ProjectCard) -> None:
+    def play_project_card(self, card_id: int) -> None:
         """
         Tries to play the project card.
         If successful, player will have been deducted the cost discounted for bonuses, if any.
         Player will receive all instant card bonuses, if any.
 
-        :param card: Project card to play
+        :param card_id: ID of the project card to play
         :raises GameException: if the player doesn't meet requirements for playing the card.
         """
+        card = PROJECT_CATALOG[card_id]
+        if card_id not in self.project_cards:
+            raise GameException(f"Card {card.name} is not in player's hand.")
         if not card.player_meets_conditions(self):
-            raise GameException(f"Requirements for playing the card {card} not met.")
+            raise GameException(f"Requirements for playing the card {card.name} not met.")
         card.play(self)
+        self._use_card_color_bonus(card.color)
         self._set_played_color(card.color)
-        self.played_project_cards += card
-        self.project_cards.remove(card)
+        self.played_project_cards.append(card_id)
+        self.project_cards.remove(card_id)
+        self.score.add(VictoryPointSource.CardPoints, card.points)
+        self.invalidate_actions(_PLAYED_CARD_CHANGES)
+        effects = self.game.effects
+        for tag in card.tags:
+            effects.fire(EffectTrigger.TagPlayed, tag, self)
+        # Subscribed after its own tags, so the effect only reacts to the cards played after it
+        if card.effect is not None:
+            effects.subscribe(self, card_id, card.effect)
+
+    def _use_card_color_bonus(self, card_color: CardColor) -> None:
+        # Development bonus is the discount already applied to the cost of the green card,
+        # Construction bonus allows playing a second red or blue card
+        if card_color == CardColor.Green and self.is_eligible_for_bonus(Phase.Development):
+            self.use_phase_bonus(Phase.Development)
+        elif card_color != CardColor.Green and self.has_played_red_or_blue_card:
+            self.use_phase_bonus(Phase.Construction)
 
     def _set_played_color(self, card_color: CardColor) -> None:
         if card_color == CardColor.Green:
             self.has_played_green_card = True
         else:
             self.has_played_red_or_blue_card = True
-
-    def get_playable_cards(self) -> list[ProjectCard]:
-        return [c for c in self.project_cards if c.player_meets_conditions(self)]
+        self.invalidate_actions(PlayerStateChange.Phase)
+
+    def get_playable_cards(self) -> list[int]:
+        if self._playable_cards is None:
+            # Color is a cheap array lookup, so only the cards of colors playable in this phase are checked in full
+            candidates = PROJECT_CATALOG.with_colors(self.project_cards, self._get_playable_colors())
+            self._playable_cards = [c for c in candidates if PROJECT_CATALOG[c].player_meets_conditions(self)]
+        return self._playable_cards
+
+    def _get_playable_colors(self) -> list[CardColor]:
+        phase = self.game.get_current_phase()
+        if phase == Phase.Development:
+            return [CardColor.Green]
+        if phase == Phase.Construction:
+            return [CardColor.Red, CardColor.Blue]
+        return []
 
     def get_available_actions(self) -> list[PlayerAction]:
+        if self._available_actions_stale:
+            self.available_actions = self._compute_available_actions()
+            self._available_actions_stale = False
+        return self.available_actions
+
+    def _compute_available_actions(self) -> list[PlayerAction]:
         if self.game.is_finished():
             return []
         if self.game.is_game_start():
@@ -225,7 +378,7 @@ class Player:
         actions: list[PlayerAction] = []
         # Players can sell project cards at any time, given their hand isn't empty
         if self.get_project_hand_size() > 0:
-            actions += PlayerAction.SellProjectCards
+            actions.append(PlayerAction.SellProjectCards)
         # Other actions depend on the current step, phase and global requirements status:
         if step == RoundStep.Planning:
             actions.extend(self._get_planning_actions())
@@ -246,52 +399,56 @@ class Player:
             raise GameException("Unknown game state detected.")
         return actions
 
-    def get_cards_with_playable_actions(self) -> list[BlueProjectCard]:
-        return [card for card in self.played_project_cards
-                if isinstance(card, BlueProjectCard) and card.is_action_playable(self)]
+    def get_cards_with_playable_actions(self) -> list[int]:
+        if self._cards_with_playable_actions is None:
+            blue_cards = PROJECT_CATALOG.with_colors(self.played_project_cards, [CardColor.Blue])
+            self._cards_with_playable_actions = [c for c in blue_cards
+                                                 if PROJECT_CATALOG[c].is_action_playable(self)]
+        return self._cards_with_playable_actions
 
     def _get_action_phase_actions(self) -> list[PlayerAction]:
         actions: list[PlayerAction] = []
         if len(self.get_cards_with_playable_actions()) > 0:
-            actions += PlayerAction.ResolveActionAbilities
+            actions.append(PlayerAction.ResolveActionAbilities)
         if self.board.plants >= self.greenery_plant_cost:
-            actions += PlayerAction.BuildGreenery
+            actions.append(PlayerAction.BuildGreenery)
         if self.board.heat >= self.temperature_heat_cost:
-            actions += PlayerAction.RaiseTemperature
+            actions.append(PlayerAction.RaiseTemperature)
         if self.board.megacredits >= self.greenery_mc_cost:
-            actions += PlayerAction.StandardActionBuildGreenery
+            actions.append(PlayerAction.StandardActionBuildGreenery)
         if self.board.megacredits >= self.temperature_mc_cost:
-            actions += PlayerAction.StandardActionFlipOcean
+            actions.append(PlayerAction.StandardActionRaiseTemperature)
         if self.board.megacredits >= self.ocean_mc_cost:
-            actions += PlayerAction.StandardActionRaiseTemperature
+            actions.append(PlayerAction.StandardActionFlipOcean)
         return actions
 
     def _get_construction_phase_actions(self) -> list[PlayerAction]:
         actions: list[PlayerAction] = []
         if len(self.get_playable_cards()) > 0:
-            actions += PlayerAction.PlayRedOrBlueCard
+            actions.append(PlayerAction.PlayRedOrBlueCard)
         if self.is_eligible_for_bonus(Phase.Construction):
-            actions += PlayerAction.DrawProjectCard
+            actions.append(PlayerAction.DrawProjectCard)
         return actions
 
     def _get_development_phase_actions(self) -> list[PlayerAction]:
         actions: list[PlayerAction] = []
         if len(self.get_playable_cards()) > 0:
-            actions += PlayerAction.PlayGreenCard
+            actions.append(PlayerAction.PlayGreenCard)
         return actions
 
     def _get_planning_actions(self) -> list[PlayerAction]:
         actions: list[PlayerAction] = []
         if not self.has_picked_phase_card:
-            actions += PlayerAction.ChoosePhaseCard
+            actions.append(PlayerAction.ChoosePhaseCard)
         return actions
 
     def _get_game_start_actions(self) -> list[PlayerAction]:
         actions: list[PlayerAction] = list()
         if not self.has_picked_corporation:
-            actions += PlayerAction.ChooseCorporation
+            if self.starting_corporation_cards:
+                actions.append(PlayerAction.ChooseCorporation)
             if not self.redrew_starting_project_cards:
-                actions += PlayerAction.RedrawProjectCards
+                actions.append(PlayerAction.RedrawProjectCards)
         return actions
 
     def _get_production_phase_actions(self) -> list[PlayerAction]:
@@ -301,7 +458,287 @@ class Player:
         return [PlayerAction.Research] if not self.has_researched else []
 
     def _get_end_actions(self) -> list[PlayerAction]:
-        return [PlayerAction.DiscardDownTo10Cards] if self.get_project_hand_size() > 10 else []
+        return [PlayerAction.DiscardDownTo10Cards] if self.get_project_hand_size() > Player.HAND_LIMIT else []
 
     def is_eligible_for_action(self, player_action: PlayerAction) -> bool:
-        return player_action in self.available_actions
+        return player_action in self.get_available_actions()
+
+    def start_round(self) -> None:
+        """
+        Resets the per-round state of the player: phase card choice, phase bonus and per-phase limits.
+        """
+        self.has_picked_phase_card = False
+        self.has_played_green_card = False
+        self.has_played_red_or_blue_card = False
+        self.used_phase_bonus = False
+        self.has_produced = False
+        self.has_researched = False
+        self.used_card_actions.clear()
+        self.invalidate_actions(_NEW_ROUND_CHANGES)
+
+    def apply_move(self, move: Move) -> None:
+        """
+        Performs the player action described by the move.
+
+        :param move: Move to perform
+        :raises GameException: if the action is not available to the player at this moment,
+        or if the move is missing the cards it needs
+        """
+        action = move.action
+        if not self.is_eligible_for_action(action):
+            raise GameException(f"Cannot perform action {action}.")
+        if action in (PlayerAction.ChooseCorporation,
+                      PlayerAction.PlayGreenCard,
+                      PlayerAction.PlayRedOrBlueCard,
+                      PlayerAction.ResolveActionAbilities) and len(move.cards) != 1:
+            raise GameException(f"Action {action} requires exactly one card.")
+        if action == PlayerAction.ChooseCorporation:
+            if move.cards[0] not in self.starting_corporation_cards:
+                raise GameException("Corporation must be chosen from the starting corporation cards.")
+            self.choose_corporation(move.cards[0])
+        elif action == PlayerAction.RedrawProjectCards:
+            self.redraw_starting_project_cards(list(move.cards))
+        elif action == PlayerAction.SellProjectCards:
+            self.sell_project_cards(list(move.cards))
+        elif action in (PlayerAction.PlayGreenCard, PlayerAction.PlayRedOrBlueCard):
+            self.play_project_card(move.cards[0])
+        elif action == PlayerAction.DrawProjectCard:
+            self.draw_bonus_project_card()
+        elif action == PlayerAction.ChoosePhaseCard:
+            self.choose_phase_card(move.phase)
+        elif action == PlayerAction.ResolveActionAbilities:
+            self.resolve_card_action(move.cards[0])
+        elif action == PlayerAction.BuildGreenery:
+            self.build_greenery()
+        elif action == PlayerAction.RaiseTemperature:
+            self.raise_temperature()
+        elif action == PlayerAction.StandardActionBuildGreenery:
+            self.standard_action_build_greenery()
+        elif action == PlayerAction.StandardActionRaiseTemperature:
+            self.standard_action_raise_temperature()
+        elif action == PlayerAction.StandardActionFlipOcean:
+            self.standard_action_flip_ocean()
+        elif action == PlayerAction.Produce:
+            self.produce()
+        elif action == PlayerAction.Research:
+            if self.research_cards:
+                self.keep_research_cards(list(move.cards))
+            else:
+                self.research()
+        elif action == PlayerAction.DiscardDownTo10Cards:
+            self.discard_down_to_hand_limit(list(move.cards))
+        else:
+            raise GameException(f"Unknown action {action}.")
+
+    def draw_bonus_project_card(self) -> int:
+        """
+        Uses the Construction phase bonus to draw a project card.
+
+        :return: Number of drawn cards
+        """
+        self.use_phase_bonus(Phase.Construction)
+        return self.draw_project_cards(1)
+
+    def resolve_card_action(self, card_id: int) -> None:
+        """
+        Resolves the action of a played blue card. Using the same action twice in a round consumes the Action bonus.
+
+        :param card_id: ID of the played blue card whose action will be resolved
+        :raises GameException: if the card action can't be resolved at this moment
+        """
+        card = PROJECT_CATALOG[card_id]
+        if card_id not in self.played_project_cards or not isinstance(card, BlueProjectCard) \
+                or not card.is_action_playable(self):
+            raise GameException(f"Action of the card {card.name} cannot be resolved.")
+        if card_id in self.used_card_actions:
+            self.use_phase_bonus(Phase.Action)
+        card.action.play(self)
+        self.used_card_actions.add(card_id)
+        self.invalidate_actions(PlayerStateChange.PlayedCards)
+
+    def get_card_resources(self, card_id: int) -> int:
+        return self.card_resources.get(card_id, 0)
+
+    def add_card_resources(self, card_id: int, amount: int) -> int:
+        """
+        Adds resources to a played card, or removes them if the amount is negative.
+
+        :param card_id: ID of the played project card
+        :param amount: Number of resources to add
+        :return: Resources on the card after the change
+        :raises GameException: if the card is not played by the player, or doesn't hold enough resources to remove
+        """
+        if card_id not in self.played_project_cards:
+            raise GameException(f"Card {PROJECT_CATALOG[card_id].name} is not played by the player.")
+        resources = self.get_card_resources(card_id)
+        if resources + amount < 0:
+            raise GameException(f"Card {PROJECT_CATALOG[card_id].name} holds only {resources} resources.")
+        resources_per_point = int(PROJECT_CATALOG.resources_per_point[card_id])
+        self.score.add(VictoryPointSource.CardResources,
+                       resource_points(resources + amount, resources_per_point)
+                       - resource_points(resources, resources_per_point))
+        self.card_resources[card_id] = resources + amount
+        self.invalidate_actions(PlayerStateChange.PlayedCards)
+        return resources + amount
+
+    def to_dict(self) -> dict:
+        """
+        Public state of the player in JSON form. Cards in hand are hidden, and so is the phase card
+        chosen for the current round until the Planning step is over.
+
+        :return: The state
+        """
+        phase_card_revealed = self.game is not None and self.game.get_current_step() != RoundStep.Planning
+        return {"name": self.name,
+                "color": self.color.name,
+                "terraforming_rating": self.terraforming_rating,
+                "greenery_tokens": self.greenery_tokens,
+                "victory_points": self.score.total,
+                "victory_point_sources": {source.name: points for source, points in self.score.breakdown().items()},
+                "board": {f: getattr(self.board, f) for f in BoardStore.FIELDS},
+                "corporation_card": self.corporation_card,
+                "played_project_cards": list(self.played_project_cards),
+                "card_resources": {str(card_id): amount for card_id, amount in self.card_resources.items()},
+                "hand_size": len(self.project_cards or ()),
+                "has_picked_phase_card": self.has_picked_phase_card,
+                "current_phase_card": self.current_phase_card.name
+                if self.current_phase_card is not None and phase_card_revealed else None,
+                "last_phase_card": self.last_phase_card.name if self.last_phase_card is not None else None}
+
+    def to_private_dict(self) -> dict:
+        """
+        Private state of the player in JSON form, visible only to the player.
+        Every change of it is reflected in `private_version`.
+
+        :return: The state
+        """
+        return {"project_cards": list(self.project_cards or ()),
+                "starting_corporation_cards": list(self.starting_corporation_cards or ()),
+                "research_cards": list(self.research_cards),
+                "current_phase_card": self.current_phase_card.name if self.current_phase_card is not None else None,
+                "available_actions": [a.name for a in self.get_available_actions()],
+                "playable_cards": self.get_playable_cards() if self.game is not None else [],
+                "cards_with_playable_actions": self.get_cards_with_playable_actions() if self.game is not None else []}
+
+    def snapshot(self) -> PlayerSnapshot:
+        return PlayerSnapshot(name=self.name,
+                              color=self.color.value,
+                              terraforming_rating=self.terraforming_rating,
+                              greenery_tokens=self.greenery_tokens,
+                              board=tuple(getattr(self.board, f) for f in BoardStore.FIELDS),
+                              project_cards=tuple(self.project_cards or ()),
+                              starting_corporation_cards=tuple(self.starting_corporation_cards or ()),
+                              played_project_cards=tuple(self.played_project_cards),
+                              research_cards=tuple(self.research_cards),
+                              card_resources=tuple(sorted(self.card_resources.items())),
+                              used_card_actions=tuple(sorted(self.used_card_actions)),
+                              corporation_card=self.corporation_card,
+                              current_phase_card=int(self.current_phase_card)
+                              if self.current_phase_card is not None else None,
+                              last_phase_card=int(self.last_phase_card) if self.last_phase_card is not None else None,
+                              flags=tuple(getattr(self, f) for f in PlayerSnapshot.FLAGS),
+                              costs=tuple(getattr(self, c) for c in PlayerSnapshot.COSTS))
+
+    def restore(self, snapshot: PlayerSnapshot) -> None:
+        self.terraforming_rating = snapshot.terraforming_rating
+        self.greenery_tokens = snapshot.greenery_tokens
+        # Board counters are set directly, the board change hook would only invalidate actions nine times
+        for field, value in zip(BoardStore.FIELDS, snapshot.board):
+            setattr(self.board, field, value)
+        self.project_cards = list(snapshot.project_cards)
+        self.starting_corporation_cards = list(snapshot.starting_corporation_cards)
+        self.played_project_cards = list(snapshot.played_project_cards)
+        self.research_cards = list(snapshot.research_cards)
+        self.card_resources = dict(snapshot.card_resources)
+        self.used_card_actions = set(snapshot.used_card_actions)
+        self.corporation_card = snapshot.corporation_card
+        self.current_phase_card = Phase(snapshot.current_phase_card) if snapshot.current_phase_card else None
+        self.last_phase_card = Phase(snapshot.last_phase_card) if snapshot.last_phase_card else None
+        for flag, value in zip(PlayerSnapshot.FLAGS, snapshot.flags):
+            setattr(self, flag, value)
+        for cost, value in zip(PlayerSnapshot.COSTS, snapshot.costs):
+            setattr(self, cost, value)
+        self.score.recompute(self)
+        self.invalidate_actions(PlayerStateChange.All)
+
+    def build_greenery(self) -> None:
+        """
+        Converts plants into a greenery token, raising the oxygen.
+        """
+        self.board.remove_plants(self.greenery_plant_cost)
+        self.add_greenery_token()
+        self.increase_global_parameter(Oxygen)
+
+    def raise_temperature(self) -> None:
+        """
+        Converts heat into a temperature raise.
+        """
+        self.board.remove_heat(self.temperature_heat_cost)
+        self.increase_global_parameter(Temperature)
+
+    def standard_action_build_greenery(self) -> None:
+        self.board.remove_megacredits(self.greenery_mc_cost)
+        self.add_greenery_token()
+        self.increase_global_parameter(Oxygen)
+
+    def standard_action_raise_temperature(self) -> None:
+        self.board.remove_megacredits(self.temperature_mc_cost)
+        self.increase_global_parameter(Temperature)
+
+    def standard_action_flip_ocean(self) -> None:
+        self.board.remove_megacredits(self.ocean_mc_cost)
+        self.increase_global_parameter(Oceans)
+
+    def research(self) -> list[int]:
+        """
+        Draws the research cards. Player then has to keep some of them using `keep_research_cards`.
+
+        :return: IDs of the drawn research cards
+        """
+        amount = Player.RESEARCH_BONUS_DRAW if self.is_eligible_for_bonus(Phase.Research) else Player.RESEARCH_DRAW
+        self.research_cards = self.project_deck.draw(amount)
+        if not self.research_cards:
+            # Nothing to choose from if the deck got thinned out completely
+            self.has_researched = True
+        self.invalidate_actions(PlayerStateChange.Phase)
+        return self.research_cards
+
+    def get_research_keep_amount(self) -> int:
+        keep = Player.RESEARCH_BONUS_KEEP if self.is_eligible_for_bonus(Phase.Research) else Player.RESEARCH_KEEP
+        return min(keep, len(self.research_cards))
+
+    def keep_research_cards(self, cards: list[int]) -> None:
+        """
+        Keeps the chosen research cards in player's hand, discarding the rest.
+
+        :param cards: IDs of the research cards to keep
+        :raises GameException: if the cards weren't drawn during research, or the number of cards is wrong
+        """
+        if len(cards) != self.get_research_keep_amount() or not _holds_all(self.research_cards, cards):
+            raise GameException(f"Player has to keep {self.get_research_keep_amount()} of the drawn research cards.")
+        if self.is_eligible_for_bonus(Phase.Research):
+            self.use_phase_bonus(Phase.Research)
+        self.project_cards.extend(cards)
+        self.project_deck.discard([c for c in self.research_cards if c not in cards])
+        self.research_cards = list[int]()
+        self.has_researched = True
+        self.invalidate_actions(_RESEARCH_CHANGES)
+
+    def discard_down_to_hand_limit(self, cards: list[int]) -> int:
+        """
+        Discards the listed cards at the end of the round, so that the hand fits the hand limit.
+
+        :param cards: IDs of the project cards to discard
+        :return: Number of discarded cards
+        :raises GameException: if the hand would still exceed the hand limit
+        """
+        if self.get_project_hand_size() - len(cards) > Player.HAND_LIMIT:
+            raise GameException(f"Player has to discard down to {Player.HAND_LIMIT} cards.")
+        return self._discard_project_cards(cards)
+
+
+def _holds_all(held: list[int], cards: list[int]) -> bool:
+    """
+    :return: True if every listed card is held, as many times as it is listed
+    """
+    return not Counter(cards) - Counter(held)
@@ -1,5 +1,12 @@
+from typing import Optional, Sequence, Callable
+
+import numpy as np
+
+
 class PlayerBoard:
     def __init__(self):
+        # Called after every change of resources or production, if set
+        self.on_change: Optional[Callable[[], None]] = None
         self.megacredits = 0
         self.heat = 0
         self.plants = 0
@@ -18,36 +25,165 @@ class PlayerBoard:
 
     def add_megacredits(self, amount: int) -> None:
         self.megacredits += amount
+        self._changed()
 
     def add_heat(self, amount: int) -> None:
         self.heat += amount
+        self._changed()
 
     def add_plants(self, amount: int) -> None:
         self.plants += amount
+        self._changed()
 
     def remove_megacredits(self, amount: int) -> None:
         self.megacredits = max(0, self.megacredits - amount)
+        self._changed()
 
     def remove_heat(self, amount: int) -> None:
         self.heat = max(0, self.heat - amount)
+        self._changed()
 
     def remove_plants(self, amount: int) -> None:
         self.plants = max(0, self.plants - amount)
+        self._changed()
 
     def increase_megacredits_production(self, amount: int) -> None:
         self.production_megacredits += amount
+        self._changed()
 
     def increase_heat_production(self, amount: int) -> None:
         self.production_heat += amount
+        self._changed()
 
     def increase_plants_production(self, amount: int) -> None:
         self.production_plants += amount
+        self._changed()
 
     def increase_cards_production(self, amount: int) -> None:
         self.production_cards += amount
+        self._changed()
 
     def increase_steel_production(self, amount: int) -> None:
         self.production_steel += amount
+        self._changed()
 
     def increase_titanium_production(self, amount: int) -> None:
         self.production_titanium += amount
+        self._changed()
+
+    def _changed(self) -> None:
+        if self.on_change is not None:
+            self.on_change()
+
+
+class BoardStore:
+    """
+    Struct-of-arrays storage for player boards. Every board is a row of a single NumPy matrix,
+    so one store can hold the boards of all players across many games,
+    and the production of any set of boards is a couple of vectorized additions.
+    """
+    FIELDS: tuple[str, ...] = ("megacredits", "heat", "plants",
+                               "production_megacredits", "production_cards", "production_steel",
+                               "production_titanium", "production_heat", "production_plants")
+    # Resources and the productions feeding them, column by column
+    RESOURCE_COLUMNS: list[int] = [FIELDS.index("megacredits"), FIELDS.index("heat"), FIELDS.index("plants")]
+    PRODUCTION_COLUMNS: list[int] = [FIELDS.index("production_megacredits"),
+                                     FIELDS.index("production_heat"),
+                                     FIELDS.index("production_plants")]
+    CARDS_COLUMN: int = FIELDS.index("production_cards")
+
+    def __init__(self, capacity: int = 64):
+        self.rows: np.ndarray = np.zeros((max(1, capacity), len(BoardStore.FIELDS)), dtype=np.int32)
+        self._size: int = 0
+        self._free_rows: list[int] = list[int]()
+
+    def count(self) -> int:
+        return self._size - len(self._free_rows)
+
+    def allocate(self) -> "PlayerBoardView":
+        """
+        Reserves an empty row and returns a PlayerBoard backed by it. Released rows are reused first,
+        otherwise the matrix doubles in size when it runs out of rows.
+
+        :return: New player board stored in this store
+        """
+        if self._free_rows:
+            return PlayerBoardView(self, self._free_rows.pop())
+        if self._size == len(self.rows):
+            grown = np.zeros((2*len(self.rows), len(BoardStore.FIELDS)), dtype=self.rows.dtype)
+            grown[:self._size] = self.rows
+            self.rows = grown
+        self._size += 1
+        return PlayerBoardView(self, self._size - 1)
+
+    def release(self, board: "PlayerBoardView") -> None:
+        """
+        Returns the board row to the store once its game is over. The board must not be used afterwards.
+
+        :param board: Board allocated from this store
+        """
+        self.rows[board.row] = 0
+        self._free_rows.append(board.row)
+
+    def produce(self, rows: Optional[Sequence[int]] = None,
+                extra_megacredits: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        Adds megacredit, heat and plant production to the matching resources of the given boards at once.
+        Card production can't be resolved on the board itself, so it is returned for the caller to draw.
+
+        :param rows: Rows of the boards to produce for, all allocated rows if omitted
+        :param extra_megacredits: Additional income per row, i.e. terraforming rating and production bonus
+        :return: Number of cards each of the boards should draw, in the order of rows
+        """
+        if rows is None:
+            rows = np.arange(self._size)
+        rows = np.asarray(rows, dtype=np.intp)
+        resources = np.ix_(rows, BoardStore.RESOURCE_COLUMNS)
+        self.rows[resources] += self.rows[np.ix_(rows, BoardStore.PRODUCTION_COLUMNS)]
+        if extra_megacredits is not None:
+            self.rows[rows, BoardStore.RESOURCE_COLUMNS[0]] += np.asarray(extra_megacredits, dtype=self.rows.dtype)
+        return self.rows[rows, BoardStore.CARDS_COLUMN].copy()
+
+
+def _board_field(column: int) -> property:
+    def get_field(board: "PlayerBoardView") -> int:
+        return int(board.store.rows[board.row, column])
+
+    def set_field(board: "PlayerBoardView", value: int) -> None:
+        board.store.rows[board.row, column] = value
+
+    return property(get_field, set_field)
+
+
+class PlayerBoardView(PlayerBoard):
+    """
+    PlayerBoard backed by a BoardStore row instead of its own attributes.
+    It goes through the store on every access, so it stays valid when the store grows.
+    """
+    megacredits = _board_field(BoardStore.FIELDS.index("megacredits"))
+    heat = _board_field(BoardStore.FIELDS.index("heat"))
+    plants = _board_field(BoardStore.FIELDS.index("plants"))
+    production_megacredits = _board_field(BoardStore.FIELDS.index("production_megacredits"))
+    production_cards = _board_field(BoardStore.FIELDS.index("production_cards"))
+    production_steel = _board_field(BoardStore.FIELDS.index("production_steel"))
+    production_titanium = _board_field(BoardStore.FIELDS.index("production_titanium"))
+    production_heat = _board_field(BoardStore.FIELDS.index("production_heat"))
+    production_plants = _board_field(BoardStore.FIELDS.index("production_plants"))
+
+    def __init__(self, store: BoardStore, row: int):
+        # PlayerBoard.__init__ is skipped on purpose, the row is already zeroed by the store
+        self.on_change: Optional[Callable[[], None]] = None
+        self.store = store
+        self.row = row
+
+    def __reduce__(self):
+        # Pickled as a plain board, the store is shared with other games and would be pickled along with it
+        return _plain_board, (tuple(getattr(self, field) for field in BoardStore.FIELDS), self.on_change)
+
+
+def _plain_board(values: tuple[int, ...], on_change: Optional[Callable[[], None]]) -> PlayerBoard:
+    board = PlayerBoard()
+    for field, value in zip(BoardStore.FIELDS, values):
+        setattr(board, field, value)
+    board.on_change = on_change
+    return board
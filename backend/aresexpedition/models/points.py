@@ -1,14 +1,30 @@
+from __future__ import annotations
+
 from abc import ABC
-from math import floor
+from typing import TYPE_CHECKING
 
 from card import ProjectCard
+from card_catalog import PROJECT_CATALOG
+from enums import VictoryPointSource
+
+if TYPE_CHECKING:
+    from player import Player
+
+
+def resource_points(resources: int, resources_per_point: int) -> int:
+    """
+    :param resources: Resources on the card
+    :param resources_per_point: Resources the card has to hold per victory point, 0 if it isn't scored by them
+    :return: Victory points the resources are worth
+    """
+    return resources // resources_per_point if resources_per_point else 0
 
 
 class Points(ABC):
     def __init__(self, card: ProjectCard):
         self.card = card
 
-    def get(self):
+    def get(self, player: Player):
         raise NotImplementedError
 
 
@@ -17,5 +33,43 @@ class ResourcesOnCard(Points):
         super().__init__(card)
         self.n = n_for_point
 
-    def get(self):
-        return floor(self.card.resources/self.n)
+    def get(self, player: Player):
+        return resource_points(player.get_card_resources(self.card.card_id), self.n)
+
+
+class Score:
+    """
+    Victory points of a player, kept up to date by the player as terraforming rating, greenery tokens,
+    played cards and card resources change, so reading the total or the breakdown costs no recomputation.
+    """
+    def __init__(self):
+        self.total: int = 0
+        self._points: dict[VictoryPointSource, int] = dict.fromkeys(VictoryPointSource, 0)
+
+    def add(self, source: VictoryPointSource, points: int) -> None:
+        self._points[source] += points
+        self.total += points
+
+    def get(self, source: VictoryPointSource) -> int:
+        return self._points[source]
+
+    def breakdown(self) -> dict[VictoryPointSource, int]:
+        """
+        :return: Victory points by their source, summing up to the total
+        """
+        return dict(self._points)
+
+    def recompute(self, player: Player) -> None:
+        """
+        Scores the player from scratch, i.e. after the player state got restored from a snapshot.
+
+        :param player: Player to score
+        """
+        played = player.played_project_cards
+        self._points[VictoryPointSource.TerraformingRating] = player.terraforming_rating
+        self._points[VictoryPointSource.GreeneryTokens] = player.greenery_tokens
+        self._points[VictoryPointSource.CardPoints] = int(PROJECT_CATALOG.points[played].sum()) if played else 0
+        self._points[VictoryPointSource.CardResources] = \
+            sum(resource_points(amount, int(PROJECT_CATALOG.resources_per_point[card_id]))
+                for card_id, amount in player.card_resources.items())
+        self.total = sum(self._points.values())
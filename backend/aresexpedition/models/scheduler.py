@@ -0,0 +1,153 @@
+"""
+Resolution of the moves players submit at the same time, i.e. during a phase all players act in.
+
+Moves of different players only interact through the state they share, the global parameters and the decks:
+which ocean prize a player gets or which cards a player draws depends on the moves resolved before.
+Applying the moves as they happen to arrive would make that a matter of timing, and taking the game lock
+for each of them would queue every player behind the others.
+
+MoveScheduler collects the moves submitted while the game is busy into a batch instead. The submitter who gets
+the game resolves the whole batch under a single checkout, on behalf of all the others, who just wait for the outcome
+of their own moves. A submitter resolves one batch only, the one with its own move: the moves submitted meanwhile
+are resolved by the first of their submitters, so nobody waits for more than the batch after its own.
+Within a batch the moves are resolved in ticks: the first move of every player in player order, then the second
+ones, and so on. The shared state therefore changes in the same order for the same batch, however the submitting
+threads got scheduled.
+
+The module doesn't depend on the rest of the rules engine, games are used through `players` and `apply_dict`,
+so the web app can use it with the games it holds.
+"""
+
+import logging
+import threading
+from contextlib import AbstractContextManager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Submission:
+    player: str
+    move: dict
+    # Set once the move is resolved, or once its submitter is to resolve the next batch
+    wake: threading.Event = field(default_factory=threading.Event)
+    resolves: bool = False
+    # Version of the game after the move, or the error the move failed with
+    version: Optional[int] = None
+    error: Optional[BaseException] = None
+
+
+def order_batch(player_order: list[str], submissions: list[_Submission]) -> list[_Submission]:
+    """
+    Orders simultaneous moves into ticks: the first move of every player, in player order, then the second moves.
+    Moves of the same player keep their submission order.
+
+    :param player_order: Names of the players, in player order
+    :param submissions: Submitted moves, in arrival order
+    :return: The moves in resolution order
+    """
+    positions = {name: index for index, name in enumerate(player_order)}
+    ticks = dict[str, int]()
+    keyed = list[tuple[int, int, int, _Submission]]()
+    for arrival, submission in enumerate(submissions):
+        tick = ticks.get(submission.player, 0)
+        ticks[submission.player] = tick + 1
+        # Unknown players are left for the game to reject, after everyone else
+        keyed.append((tick, positions.get(submission.player, len(positions)), arrival, submission))
+    keyed.sort(key=lambda k: k[:3])
+    return [submission for *_, submission in keyed]
+
+
+class MoveScheduler:
+    """
+    Applies the moves of several players submitted at once to a single game, see the module description.
+    """
+    def __init__(self, checkout: Callable[[], AbstractContextManager],
+                 resolved: Optional[Callable[[Any, list[tuple[str, dict]]], None]] = None):
+        """
+        :param checkout: Gives exclusive access to the game for the duration of a with block
+        :param resolved: Called with the game, still checked out, and the moves applied to it, as player names
+        and moves in the order they were applied, after every batch of moves that changed the game,
+        i.e. to publish the new state once per batch instead of once per move. Errors it raises are logged,
+        the moves count as applied all the same.
+        """
+        self._checkout = checkout
+        self._resolved = resolved
+        self._lock = threading.Lock()
+        self._pending: list[_Submission] = list[_Submission]()
+        self._resolving: bool = False
+
+    def pending(self) -> int:
+        """
+        :return: Number of submitted moves waiting for the next batch
+        """
+        with self._lock:
+            return len(self._pending)
+
+    def submit(self, player: str, move: dict) -> int:
+        """
+        Applies the move of the player, together with the moves other players submit in the meantime.
+        Returns once the move is resolved.
+
+        :param player: Name of the player making the move
+        :param move: Move in its JSON form, as accepted by `Game.apply_dict`
+        :return: Version of the game right after the move
+        :raises Exception: whatever the game or the checkout raised for the move, i.e. GameException
+        """
+        submission = _Submission(player, move)
+        with self._lock:
+            self._pending.append(submission)
+            if not self._resolving:
+                self._resolving = True
+                submission.resolves = True
+        if not submission.resolves:
+            submission.wake.wait()
+        if submission.resolves:
+            self._resolve()
+        if submission.error is not None:
+            raise submission.error
+        return submission.version
+
+    def _resolve(self) -> None:
+        """
+        Resolves the moves pending once the game is checked out, the resolver's own move among them,
+        then hands the next batch over to the first move submitted in the meantime.
+        """
+        batch = list[_Submission]()
+        try:
+            with self._checkout() as game:
+                # Taken only once the game is ours, so the moves submitted in the meantime join the batch
+                with self._lock:
+                    batch, self._pending = self._pending, list[_Submission]()
+                applied = list[tuple[str, dict]]()
+                for submission in order_batch([p.name for p in game.players], batch):
+                    try:
+                        game.apply_dict(submission.player, submission.move)
+                        submission.version = game.version
+                        applied.append((submission.player, submission.move))
+                    except Exception as e:
+                        submission.error = e
+                if self._resolved is not None and applied:
+                    try:
+                        self._resolved(game, applied)
+                    except Exception:
+                        logger.exception("Could not report the resolved moves, they are applied nonetheless.")
+        except Exception as e:
+            if not batch:
+                # The game couldn't be checked out, which fails everything waiting for it
+                with self._lock:
+                    batch, self._pending = self._pending, list[_Submission]()
+            for submission in batch:
+                if submission.version is None and submission.error is None:
+                    submission.error = e
+        for submission in batch:
+            submission.wake.set()
+        with self._lock:
+            if self._pending:
+                successor = self._pending[0]
+                successor.resolves = True
+                successor.wake.set()
+            else:
+                self._resolving = False
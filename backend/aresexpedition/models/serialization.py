@@ -0,0 +1,384 @@
+"""
+Compact, versioned binary encoding of the full game state.
+
+All values are little-endian. The state is encoded from a GameSnapshot, so cards are stored as their catalog IDs.
+Layout of version 1:
+
+    header          magic "TMAE", version u8, flags u8, player count u8, reserved u8
+    seed            i64, if FLAG_SEED
+    turn            round u16, phase u8, step u8 (phase 0 = no phase)
+    final turn      as turn, if FLAG_FINAL_TURN
+    phases          count u8, phases u8[]
+    banned cards    corporations id list, projects id list
+    requirements    count u8, values i8[], maxed on turns (round 0 = not maxed),
+                    remaining ocean prizes u8 list, last ocean prize u8 (255 = none)
+    decks           project deck, corporation deck, if FLAG_PROJECT_DECK / FLAG_CORPORATION_DECK:
+                    cards id list, cursor u16, discard pile id list
+    rng state       version u8, 625 x u32, if FLAG_RNG
+    players         name (length u8 + utf-8), color u8, terraforming rating u16, greenery tokens u16,
+                    board i32[9], hand, starting corporations, played cards, research cards id lists,
+                    card resources (count u16 + pairs of id u16 and amount u16), used card actions id list,
+                    corporation card u16 (65535 = none), current and last phase card u8, flags u8 bitfield,
+                    costs u8[5]
+
+where an id list is a count u16 followed by u16 card IDs.
+"""
+
+import random
+import struct
+from typing import Iterable, Optional, Sized, Union
+
+from card_catalog import PROJECT_CATALOG, CORPORATION_CATALOG
+from enums import Phase, RoundStep, PlayerColor
+from exceptions import SerializationException
+from game import Game
+from global_requirements import GlobalRequirements, Oceans
+from player_board import BoardStore
+from snapshot import GameSnapshot, DeckSnapshot, GlobalRequirementsSnapshot, PlayerSnapshot, FrozenTurn
+
+
+MAGIC: bytes = b"TMAE"
+FORMAT_VERSION: int = 1
+
+FLAG_SEED: int = 1
+FLAG_FINAL_TURN: int = 2
+FLAG_GAME_START: int = 4
+FLAG_PROJECT_DECK: int = 8
+FLAG_CORPORATION_DECK: int = 16
+FLAG_RNG: int = 32
+
+_HEADER = struct.Struct("<4sBBBx")
+_SEED = struct.Struct("<q")
+_TURN = struct.Struct("<HBB")
+_U8 = struct.Struct("<B")
+_U16 = struct.Struct("<H")
+_PLAYER_COUNTERS = struct.Struct("<BHH")
+_BOARD = struct.Struct(f"<{len(BoardStore.FIELDS)}i")
+_PLAYER_CHOICES = struct.Struct("<HBBB")
+_COSTS = struct.Struct(f"<{len(PlayerSnapshot.COSTS)}B")
+_RNG_WORDS: int = 625
+_NONE_U8: int = 0xFF
+_NONE_U16: int = 0xFFFF
+
+_PHASES: frozenset[int] = frozenset(int(p) for p in Phase)
+_ROUND_STEPS: frozenset[int] = frozenset(int(s) for s in RoundStep)
+_COLORS: frozenset[int] = frozenset(c.value for c in PlayerColor)
+_GLOBAL_PARAMETER_COUNT: int = len(GlobalRequirements(random.Random(0)).parameters)
+
+
+class _Writer:
+    def __init__(self):
+        self.parts: list[bytes] = list[bytes]()
+
+    def pack(self, fmt: struct.Struct, *values) -> None:
+        self.parts.append(fmt.pack(*values))
+
+    def u8_list(self, values: tuple[int, ...]) -> None:
+        self.parts.append(struct.pack(f"<B{len(values)}B", len(values), *values))
+
+    def id_list(self, values: tuple[int, ...]) -> None:
+        self.parts.append(struct.pack(f"<H{len(values)}H", len(values), *values))
+
+    def turn(self, turn: Optional[FrozenTurn]) -> None:
+        self.pack(_TURN, *(turn if turn is not None else (0, 0, 0)))
+
+
+class _Reader:
+    """
+    Reads values straight from the underlying buffer with struct.unpack_from, without slicing copies.
+    """
+    def __init__(self, data: Union[bytes, bytearray, memoryview]):
+        self.data = data
+        self.offset: int = 0
+
+    def unpack(self, fmt: struct.Struct) -> tuple:
+        values = fmt.unpack_from(self.data, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def u8(self) -> int:
+        return self.unpack(_U8)[0]
+
+    def u16(self) -> int:
+        return self.unpack(_U16)[0]
+
+    def array(self, code: str, count: int) -> tuple[int, ...]:
+        values = struct.unpack_from(f"<{count}{code}", self.data, self.offset)
+        self.offset += struct.calcsize(f"<{count}{code}")
+        return values
+
+    def u8_list(self) -> tuple[int, ...]:
+        return self.array("B", self.u8())
+
+    def id_list(self) -> tuple[int, ...]:
+        return self.array("H", self.u16())
+
+    def turn(self) -> Optional[FrozenTurn]:
+        turn = self.unpack(_TURN)
+        return turn if turn[0] != 0 else None
+
+    def text(self) -> str:
+        length = self.u8()
+        text = bytes(self.data[self.offset:self.offset + length]).decode("utf-8")
+        self.offset += length
+        return text
+
+
+def encode_snapshot(snapshot: GameSnapshot, include_rng: bool = True) -> bytes:
+    """
+    Encodes the game snapshot into the binary format.
+
+    :param snapshot: Snapshot to encode
+    :param include_rng: Whether to store the state of the game random generator. It takes about 2.5 kB,
+    which is most of the encoded size. Without it, the decoded game continues with a freshly seeded generator.
+    :return: Encoded game state
+    :raises SerializationException: if some of the values don't fit the format
+    """
+    flags = 0
+    flags |= FLAG_SEED if snapshot.seed is not None else 0
+    flags |= FLAG_FINAL_TURN if snapshot.final_turn is not None else 0
+    flags |= FLAG_GAME_START if snapshot.is_game_start else 0
+    flags |= FLAG_PROJECT_DECK if snapshot.project_deck is not None else 0
+    flags |= FLAG_CORPORATION_DECK if snapshot.corporation_deck is not None else 0
+    flags |= FLAG_RNG if include_rng and snapshot.rng_state is not None else 0
+    writer = _Writer()
+    try:
+        writer.pack(_HEADER, MAGIC, FORMAT_VERSION, flags, len(snapshot.players))
+        if flags & FLAG_SEED:
+            writer.pack(_SEED, snapshot.seed)
+        writer.turn(snapshot.turn)
+        if flags & FLAG_FINAL_TURN:
+            writer.turn(snapshot.final_turn)
+        writer.u8_list(snapshot.phases)
+        writer.id_list(snapshot.banned_corporations)
+        writer.id_list(snapshot.banned_projects)
+        _encode_global_requirements(writer, snapshot.global_requirements)
+        for deck in (snapshot.project_deck, snapshot.corporation_deck):
+            if deck is not None:
+                writer.id_list(deck.cards)
+                writer.pack(_U16, deck.cursor)
+                writer.id_list(deck.discard_pile)
+        if flags & FLAG_RNG:
+            rng_version, internal_state, _ = snapshot.rng_state
+            writer.pack(_U8, rng_version)
+            writer.parts.append(struct.pack(f"<{_RNG_WORDS}I", *internal_state))
+        for player in snapshot.players:
+            _encode_player(writer, player)
+    except struct.error as e:
+        raise SerializationException(f"Game state doesn't fit the binary format: {e}")
+    return b"".join(writer.parts)
+
+
+def _encode_global_requirements(writer: _Writer, requirements: GlobalRequirementsSnapshot) -> None:
+    writer.pack(_U8, len(requirements.values))
+    writer.parts.append(struct.pack(f"<{len(requirements.values)}b", *requirements.values))
+    for turn in requirements.maxed_on_turns:
+        writer.turn(turn)
+    writer.u8_list(requirements.ocean_prizes)
+    writer.pack(_U8, requirements.last_ocean_prize if requirements.last_ocean_prize is not None else _NONE_U8)
+
+
+def _encode_player(writer: _Writer, player: PlayerSnapshot) -> None:
+    name = player.name.encode("utf-8")
+    writer.pack(_U8, len(name))
+    writer.parts.append(name)
+    writer.pack(_PLAYER_COUNTERS, player.color, player.terraforming_rating, player.greenery_tokens)
+    writer.pack(_BOARD, *player.board)
+    writer.id_list(player.project_cards)
+    writer.id_list(player.starting_corporation_cards)
+    writer.id_list(player.played_project_cards)
+    writer.id_list(player.research_cards)
+    writer.pack(_U16, len(player.card_resources))
+    for card_id, amount in player.card_resources:
+        writer.parts.append(struct.pack("<HH", card_id, amount))
+    writer.id_list(player.used_card_actions)
+    flags = 0
+    for i, flag in enumerate(player.flags):
+        flags |= int(flag) << i
+    writer.pack(_PLAYER_CHOICES,
+                player.corporation_card if player.corporation_card is not None else _NONE_U16,
+                player.current_phase_card or 0,
+                player.last_phase_card or 0,
+                flags)
+    writer.pack(_COSTS, *player.costs)
+
+
+def decode_snapshot(data: Union[bytes, bytearray, memoryview]) -> GameSnapshot:
+    """
+    Decodes the game snapshot from the binary format. Values are read in place from the given buffer,
+    so a memoryview over a larger buffer (i.e. a memory-mapped file) can be decoded without copying it.
+
+    :param data: Encoded game state
+    :return: Decoded snapshot
+    :raises SerializationException: if the data is not a valid encoded game state of a supported version
+    """
+    reader = _Reader(data)
+    try:
+        magic, version, flags, player_count = reader.unpack(_HEADER)
+        if magic != MAGIC:
+            raise SerializationException("Data is not an encoded game state.")
+        if version != FORMAT_VERSION:
+            raise SerializationException(f"Unsupported game state format version: {version}")
+        seed = reader.unpack(_SEED)[0] if flags & FLAG_SEED else None
+        turn = reader.turn()
+        final_turn = reader.turn() if flags & FLAG_FINAL_TURN else None
+        phases = reader.u8_list()
+        banned_corporations = reader.id_list()
+        banned_projects = reader.id_list()
+        requirements = _decode_global_requirements(reader)
+        project_deck = _decode_deck(reader) if flags & FLAG_PROJECT_DECK else None
+        corporation_deck = _decode_deck(reader) if flags & FLAG_CORPORATION_DECK else None
+        rng_state = None
+        if flags & FLAG_RNG:
+            rng_version = reader.u8()
+            rng_state = (rng_version, reader.array("I", _RNG_WORDS), None)
+        players = tuple(_decode_player(reader) for _ in range(player_count))
+    except (struct.error, UnicodeDecodeError) as e:
+        raise SerializationException(f"Encoded game state is malformed: {e}")
+    snapshot = GameSnapshot(seed=seed,
+                            banned_corporations=banned_corporations,
+                            banned_projects=banned_projects,
+                            turn=turn,
+                            phases=phases,
+                            is_game_start=bool(flags & FLAG_GAME_START),
+                            final_turn=final_turn,
+                            global_requirements=requirements,
+                            project_deck=project_deck,
+                            corporation_deck=corporation_deck,
+                            rng_state=rng_state,
+                            players=players)
+    _validate_snapshot(snapshot)
+    return snapshot
+
+
+def _validate_snapshot(snapshot: GameSnapshot) -> None:
+    """
+    Checks the decoded values the game can't be restored from, so corrupt data fails to decode
+    instead of failing later, somewhere in the game.
+
+    :raises SerializationException: if a value is out of range
+    """
+    if snapshot.turn is None:
+        raise SerializationException("Encoded game state has no turn.")
+    for turn in (snapshot.turn, snapshot.final_turn) + snapshot.global_requirements.maxed_on_turns:
+        if turn is not None:
+            _validate_turn(turn)
+    for phase in snapshot.phases:
+        _validate_phase(phase)
+    _validate_ids(snapshot.banned_projects, PROJECT_CATALOG, "project")
+    _validate_ids(snapshot.banned_corporations, CORPORATION_CATALOG, "corporation")
+    requirements = snapshot.global_requirements
+    if len(requirements.values) != _GLOBAL_PARAMETER_COUNT:
+        raise SerializationException(f"Expected {_GLOBAL_PARAMETER_COUNT} global parameters, "
+                                     f"got {len(requirements.values)}.")
+    prizes = requirements.ocean_prizes + ((requirements.last_ocean_prize,)
+                                          if requirements.last_ocean_prize is not None else ())
+    if any(prize >= len(Oceans.OCEAN_PRIZES) for prize in prizes):
+        raise SerializationException("Unknown ocean prize.")
+    for deck, catalog, kind in ((snapshot.project_deck, PROJECT_CATALOG, "project"),
+                                (snapshot.corporation_deck, CORPORATION_CATALOG, "corporation")):
+        if deck is None:
+            continue
+        _validate_ids(deck.cards + deck.discard_pile, catalog, kind)
+        if deck.cursor > len(deck.cards):
+            raise SerializationException(f"Cursor of the {kind} deck is past its end.")
+    if snapshot.rng_state is not None:
+        rng_version, internal_state, _ = snapshot.rng_state
+        # The last word is the position in the Mersenne Twister state, which has 624 words before it
+        if rng_version != random.Random.VERSION or internal_state[-1] > _RNG_WORDS - 1:
+            raise SerializationException("Random generator state is invalid.")
+    if len({p.name for p in snapshot.players}) != len(snapshot.players):
+        raise SerializationException("Player names are not unique.")
+    for player in snapshot.players:
+        _validate_player(player)
+
+
+def _validate_player(player: PlayerSnapshot) -> None:
+    if player.color not in _COLORS:
+        raise SerializationException(f"Unknown player color: {player.color}")
+    for phase in (player.current_phase_card, player.last_phase_card):
+        if phase is not None:
+            _validate_phase(phase)
+    _validate_ids(player.project_cards + player.played_project_cards + player.research_cards
+                  + player.used_card_actions + tuple(card_id for card_id, _ in player.card_resources),
+                  PROJECT_CATALOG, "project")
+    corporations = player.starting_corporation_cards
+    if player.corporation_card is not None:
+        corporations += (player.corporation_card,)
+    _validate_ids(corporations, CORPORATION_CATALOG, "corporation")
+
+
+def _validate_turn(turn: FrozenTurn) -> None:
+    _, phase, step = turn
+    if phase:
+        _validate_phase(phase)
+    if step not in _ROUND_STEPS:
+        raise SerializationException(f"Unknown round step: {step}")
+
+
+def _validate_phase(phase: int) -> None:
+    if phase not in _PHASES:
+        raise SerializationException(f"Unknown phase: {phase}")
+
+
+def _validate_ids(card_ids: Iterable[int], catalog: Sized, kind: str) -> None:
+    size = len(catalog)
+    unknown = [card_id for card_id in card_ids if card_id >= size]
+    if unknown:
+        raise SerializationException(f"Unknown {kind} card IDs: {unknown}")
+
+
+def _decode_global_requirements(reader: _Reader) -> GlobalRequirementsSnapshot:
+    count = reader.u8()
+    values = reader.array("b", count)
+    maxed_on_turns = tuple(reader.turn() for _ in range(count))
+    ocean_prizes = reader.u8_list()
+    last_ocean_prize = reader.u8()
+    return GlobalRequirementsSnapshot(values=values,
+                                      maxed_on_turns=maxed_on_turns,
+                                      ocean_prizes=ocean_prizes,
+                                      last_ocean_prize=last_ocean_prize if last_ocean_prize != _NONE_U8 else None)
+
+
+def _decode_deck(reader: _Reader) -> DeckSnapshot:
+    cards = reader.id_list()
+    cursor = reader.u16()
+    return DeckSnapshot(cards=cards, cursor=cursor, discard_pile=reader.id_list())
+
+
+def _decode_player(reader: _Reader) -> PlayerSnapshot:
+    name = reader.text()
+    color, terraforming_rating, greenery_tokens = reader.unpack(_PLAYER_COUNTERS)
+    board = reader.unpack(_BOARD)
+    project_cards = reader.id_list()
+    starting_corporation_cards = reader.id_list()
+    played_project_cards = reader.id_list()
+    research_cards = reader.id_list()
+    card_resources = tuple(reader.unpack(struct.Struct("<HH")) for _ in range(reader.u16()))
+    used_card_actions = reader.id_list()
+    corporation_card, current_phase_card, last_phase_card, flags = reader.unpack(_PLAYER_CHOICES)
+    costs = reader.unpack(_COSTS)
+    return PlayerSnapshot(name=name,
+                          color=color,
+                          terraforming_rating=terraforming_rating,
+                          greenery_tokens=greenery_tokens,
+                          board=board,
+                          project_cards=project_cards,
+                          starting_corporation_cards=starting_corporation_cards,
+                          played_project_cards=played_project_cards,
+                          research_cards=research_cards,
+                          card_resources=card_resources,
+                          used_card_actions=used_card_actions,
+                          corporation_card=corporation_card if corporation_card != _NONE_U16 else None,
+                          current_phase_card=current_phase_card or None,
+                          last_phase_card=last_phase_card or None,
+                          flags=tuple(bool(flags >> i & 1) for i in range(len(PlayerSnapshot.FLAGS))),
+                          costs=costs)
+
+
+def encode_game(game: Game, include_rng: bool = True) -> bytes:
+    return encode_snapshot(game.snapshot(), include_rng)
+
+
+def decode_game(data: Union[bytes, bytearray, memoryview], board_store: Optional[BoardStore] = None) -> Game:
+    return Game.from_snapshot(decode_snapshot(data), board_store)
@@ -0,0 +1,260 @@
+import multiprocessing
+import random
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Iterator, Optional, Type
+
+from enums import PlayerAction, PlayerColor, Phase
+from exceptions import GameException
+from game import Game
+from global_requirements import Temperature, Oxygen, Oceans
+from move import Move
+from player import Player
+from player_board import BoardStore
+
+# Actions a player can't pass on. Everything else is optional and the policy may stop acting instead.
+MANDATORY_ACTIONS: frozenset[PlayerAction] = frozenset({PlayerAction.ChooseCorporation,
+                                                        PlayerAction.ChoosePhaseCard,
+                                                        PlayerAction.Produce,
+                                                        PlayerAction.Research,
+                                                        PlayerAction.DiscardDownTo10Cards})
+
+
+class Policy(ABC):
+    """
+    Decides the moves of a single simulated player.
+    """
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    @abstractmethod
+    def choose_move(self, player: Player, actions: list[PlayerAction]) -> Optional[Move]:
+        """
+        Picks the next move for the player.
+
+        :param player: Player on the move
+        :param actions: Actions currently available to the player, never empty
+        :return: Move to perform, or None if the player is done for the current turn
+        """
+        raise NotImplementedError
+
+
+class RandomPolicy(Policy):
+    """
+    Plays uniformly random legal moves. Cards are never sold voluntarily, otherwise the hand drains in a few turns.
+    """
+    PASS_PROBABILITY: float = 0.2
+
+    def choose_move(self, player: Player, actions: list[PlayerAction]) -> Optional[Move]:
+        mandatory = [a for a in actions if a in MANDATORY_ACTIONS]
+        if mandatory:
+            return self.build_move(player, self.rng.choice(mandatory))
+        optional = [a for a in actions if a != PlayerAction.SellProjectCards]
+        if not optional or self.rng.random() < RandomPolicy.PASS_PROBABILITY:
+            return None
+        return self.build_move(player, self.rng.choice(optional))
+
+    def build_move(self, player: Player, action: PlayerAction) -> Move:
+        """
+        Completes the action with random, but legal, arguments.
+
+        :param player: Player on the move
+        :param action: Action to perform
+        :return: Move ready to be applied
+        """
+        if action == PlayerAction.ChooseCorporation:
+            return Move(action, cards=(self.rng.choice(player.starting_corporation_cards),))
+        if action == PlayerAction.RedrawProjectCards:
+            amount = self.rng.randint(0, player.get_project_hand_size())
+            return Move(action, cards=tuple(self.rng.sample(player.project_cards, amount)))
+        if action in (PlayerAction.PlayGreenCard, PlayerAction.PlayRedOrBlueCard):
+            return Move(action, cards=(self.rng.choice(player.get_playable_cards()),))
+        if action == PlayerAction.ResolveActionAbilities:
+            return Move(action, cards=(self.rng.choice(player.get_cards_with_playable_actions()),))
+        if action == PlayerAction.ChoosePhaseCard:
+            phases = [p for p in player.phase_cards if p != player.current_phase_card]
+            return Move(action, phase=self.rng.choice(phases))
+        if action == PlayerAction.Research and player.research_cards:
+            kept = self.rng.sample(player.research_cards, player.get_research_keep_amount())
+            return Move(action, cards=tuple(kept))
+        if action == PlayerAction.DiscardDownTo10Cards:
+            excess = player.get_project_hand_size() - Player.HAND_LIMIT
+            return Move(action, cards=tuple(self.rng.sample(player.project_cards, excess)))
+        if action == PlayerAction.SellProjectCards:
+            return Move(action, cards=(self.rng.choice(player.project_cards),))
+        return Move(action)
+
+
+@dataclass(frozen=True)
+class SimulationTask:
+    game_id: int
+    seed: int
+    player_count: int
+    policy_type: Type[Policy]
+    max_rounds: int
+    max_moves_per_turn: int
+    array_boards: bool = False
+
+
+@dataclass
+class GameResult:
+    game_id: int
+    seed: int
+    finished: bool
+    rounds: int
+    winners: list[str] = field(default_factory=list)
+    terraforming_ratings: dict[str, int] = field(default_factory=dict)
+    victory_points: dict[str, int] = field(default_factory=dict)
+    global_parameters: dict[str, int] = field(default_factory=dict)
+    duration: float = 0.0
+    # Phase card every player chose, round by round
+    phase_cards: dict[str, list[Phase]] = field(default_factory=dict)
+    # Project cards every player played, in play order
+    played_cards: dict[str, list[int]] = field(default_factory=dict)
+    # Value of every global parameter at the end of each round
+    global_parameter_timelines: dict[str, list[int]] = field(default_factory=dict)
+
+
+def play_game(task: SimulationTask) -> GameResult:
+    """
+    Plays a complete headless game, from dealing the starting hands until the end of the final round.
+    Games that don't finish within the round limit are cut short and reported as unfinished.
+
+    :param task: Description of the game to play
+    :return: Outcome of the game
+    """
+    start = time.perf_counter()
+    players = [Player(name=f"Player {i + 1}", color=color)
+               for i, color in zip(range(task.player_count), PlayerColor)]
+    policies: dict[str, Policy] = {p.name: task.policy_type(random.Random(task.seed * len(players) + i))
+                                   for i, p in enumerate(players)}
+    board_store = BoardStore(capacity=task.player_count) if task.array_boards else None
+    game = Game(players, banned_corporations=[], banned_projects=[], board_store=board_store, seed=task.seed)
+    game.start()
+    parameters = (Temperature, Oxygen, Oceans)
+    phase_cards: dict[str, list[Phase]] = {p.name: list[Phase]() for p in players}
+    timelines: dict[str, list[int]] = {t.__name__: list[int]() for t in parameters}
+    # Played round by round, to sample the game at the end of each
+    while not game.is_finished() and game.get_current_round() <= task.max_rounds:
+        play_rounds(game, policies, game.get_current_round(), task.max_moves_per_turn)
+        for player in players:
+            phase_cards[player.name].append(player.current_phase_card)
+        for parameter in parameters:
+            timelines[parameter.__name__].append(game.global_requirements.get_parameter(parameter).value)
+    best_vp = max(p.get_total_vp() for p in game.players)
+    return GameResult(game_id=task.game_id,
+                      seed=task.seed,
+                      finished=game.is_finished(),
+                      rounds=game.get_current_round(),
+                      winners=[p.name for p in game.players if p.get_total_vp() == best_vp],
+                      terraforming_ratings={p.name: p.terraforming_rating for p in game.players},
+                      victory_points={p.name: p.get_total_vp() for p in game.players},
+                      global_parameters={t.__name__: game.global_requirements.get_parameter(t).value
+                                         for t in parameters},
+                      duration=time.perf_counter() - start,
+                      phase_cards=phase_cards,
+                      played_cards={p.name: list(p.played_project_cards) for p in game.players},
+                      global_parameter_timelines=timelines)
+
+
+def play_rounds(game: Game, policies: dict[str, Policy], max_round: int, max_moves_per_turn: int,
+                players: Optional[list[Player]] = None, deadline: Optional[float] = None) -> bool:
+    """
+    Plays the game on until it finishes or moves past the given round.
+
+    :param game: Game to play, already started
+    :param policies: Policy of each player, by player name
+    :param max_round: Last round to play
+    :param max_moves_per_turn: Safety limit for policies that never pass
+    :param players: Players still to act in the current phase, when resuming a phase midway.
+    If omitted, the current phase is played from its start, including the production.
+    :param deadline: Time to stop at, as given by `time.perf_counter`, checked before every move.
+    The game is left wherever it got to, possibly in the middle of a turn.
+    :return: False if the deadline stopped the game early, True otherwise
+    """
+    while not game.is_finished() and game.get_current_round() <= max_round:
+        if players is None:
+            if game.get_current_phase() == Phase.Production:
+                game.produce_all()
+            players = game.players
+        for player in players:
+            if not _play_turn(game, player, policies[player.name], max_moves_per_turn, deadline):
+                return False
+        players = None
+        game.advance()
+    return True
+
+
+def _play_turn(game: Game, player: Player, policy: Policy, max_moves: int, deadline: Optional[float]) -> bool:
+    for _ in range(max_moves):
+        if deadline is not None and time.perf_counter() >= deadline:
+            return False
+        actions = player.get_available_actions()
+        if not actions:
+            return True
+        move = policy.choose_move(player, actions)
+        if move is None:
+            if any(a in MANDATORY_ACTIONS for a in actions):
+                raise GameException(f"{type(policy).__name__} passed on a mandatory action for {player.name}.")
+            return True
+        game.apply(player, move)
+    return True
+
+
+class Simulator:
+    """
+    Plays batches of headless games across a pool of worker processes and streams the results back
+    as soon as each game finishes, so the throughput grows with the number of cores.
+    """
+    DEFAULT_MAX_ROUNDS: int = 100
+    DEFAULT_MAX_MOVES_PER_TURN: int = 50
+
+    def __init__(self, policy_type: Type[Policy] = RandomPolicy, player_count: int = 2,
+                 processes: Optional[int] = None, chunksize: int = 8,
+                 max_rounds: int = DEFAULT_MAX_ROUNDS, max_moves_per_turn: int = DEFAULT_MAX_MOVES_PER_TURN,
+                 array_boards: bool = False):
+        """
+        :param policy_type: Policy class used for every player, instantiated once per player and game
+        :param player_count: Number of players in each game
+        :param processes: Number of worker processes, defaults to the number of CPUs.
+        If set to 1, games are played in the current process, which is handy for debugging and profiling.
+        :param chunksize: Number of games sent to a worker at once
+        :param max_rounds: Games still running after this many rounds are cut short
+        :param max_moves_per_turn: Safety limit for policies that never pass
+        :param array_boards: Keep player boards in a BoardStore and resolve production with vectorized operations
+        """
+        if not 1 <= player_count <= len(PlayerColor):
+            raise GameException(f"Games can be simulated with 1 to {len(PlayerColor)} players.")
+        self.policy_type = policy_type
+        self.player_count = player_count
+        self.processes = processes
+        self.chunksize = chunksize
+        self.max_rounds = max_rounds
+        self.max_moves_per_turn = max_moves_per_turn
+        self.array_boards = array_boards
+
+    def tasks(self, games: int, seed: int = 0) -> Iterator[SimulationTask]:
+        for game_id in range(games):
+            yield SimulationTask(game_id=game_id,
+                                 seed=seed + game_id,
+                                 player_count=self.player_count,
+                                 policy_type=self.policy_type,
+                                 max_rounds=self.max_rounds,
+                                 max_moves_per_turn=self.max_moves_per_turn,
+                                 array_boards=self.array_boards)
+
+    def run(self, games: int, seed: int = 0) -> Iterator[GameResult]:
+        """
+        Plays the games and yields their results in completion order, not in game_id order.
+        Game seeds are consecutive starting from `seed`, so the same batch can be replayed exactly.
+
+        :param games: Number of games to play
+        :param seed: Seed of the first game
+        :return: Iterator over game results
+        """
+        if self.processes == 1:
+            yield from map(play_game, self.tasks(games, seed))
+            return
+        with multiprocessing.Pool(self.processes) as pool:
+            yield from pool.imap_unordered(play_game, self.tasks(games, seed), chunksize=self.chunksize)
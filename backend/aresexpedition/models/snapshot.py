@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+from typing import Optional, Any
+
+# Turns are frozen as (round, phase, step) with phase 0 standing for no phase
+FrozenTurn = tuple[int, int, int]
+
+
+@dataclass(frozen=True)
+class DeckSnapshot:
+    # Shared with the live deck until the deck gets reshuffled, so taking a snapshot doesn't copy the cards
+    cards: tuple[int, ...]
+    cursor: int
+    discard_pile: tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class GlobalRequirementsSnapshot:
+    values: tuple[int, ...]
+    maxed_on_turns: tuple[Optional[FrozenTurn], ...]
+    # Positions of the remaining ocean prizes in Oceans.OCEAN_PRIZES
+    ocean_prizes: tuple[int, ...]
+    last_ocean_prize: Optional[int]
+
+
+@dataclass(frozen=True)
+class PlayerSnapshot:
+    FLAGS = ("redrew_starting_project_cards", "has_picked_corporation", "has_picked_phase_card",
+             "has_played_green_card", "has_played_red_or_blue_card", "used_phase_bonus",
+             "has_produced", "has_researched")
+    COSTS = ("greenery_plant_cost", "greenery_mc_cost", "temperature_heat_cost", "temperature_mc_cost",
+             "ocean_mc_cost")
+
+    name: str
+    color: int
+    terraforming_rating: int
+    greenery_tokens: int
+    # Board counters in BoardStore.FIELDS order
+    board: tuple[int, ...]
+    project_cards: tuple[int, ...]
+    starting_corporation_cards: tuple[int, ...]
+    played_project_cards: tuple[int, ...]
+    research_cards: tuple[int, ...]
+    card_resources: tuple[tuple[int, int], ...]
+    used_card_actions: tuple[int, ...]
+    corporation_card: Optional[int]
+    current_phase_card: Optional[int]
+    last_phase_card: Optional[int]
+    # Values of the FLAGS and COSTS attributes, in the same order
+    flags: tuple[bool, ...]
+    costs: tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class GameSnapshot:
+    """
+    Flat, immutable copy of the mutable state of a Game. Card definitions are not part of it,
+    cards are referenced only by their catalog IDs. Snapshots share their unchanged parts
+    (i.e. deck contents) with the live game, so taking one costs next to nothing.
+    """
+    seed: Optional[int]
+    banned_corporations: tuple[int, ...]
+    banned_projects: tuple[int, ...]
+    turn: FrozenTurn
+    phases: tuple[int, ...]
+    is_game_start: bool
+    final_turn: Optional[FrozenTurn]
+    global_requirements: GlobalRequirementsSnapshot
+    project_deck: Optional[DeckSnapshot]
+    corporation_deck: Optional[DeckSnapshot]
+    # None if the snapshot was stored without the random generator state
+    rng_state: Any
+    players: tuple[PlayerSnapshot, ...]
@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from enums import Phase, RoundStep
+from snapshot import FrozenTurn
+
+
+@dataclass
+class Turn:
+    round: int
+    phase: Optional[Phase]
+    step: RoundStep
+
+    def freeze(self) -> FrozenTurn:
+        return self.round, int(self.phase) if self.phase is not None else 0, int(self.step)
+
+    @staticmethod
+    def thaw(frozen: FrozenTurn) -> "Turn":
+        return Turn(frozen[0], Phase(frozen[1]) if frozen[1] else None, RoundStep(frozen[2]))
@@ -0,0 +1,266 @@
+import logging
+import os
+import pickle
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from math import ceil
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+from flask import Flask, current_app
+
+from ..startup import private_directory
+
+EXTENSION_NAME: str = "game_registry"
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class GameNotFoundException(Exception):
+    pass
+
+
+class _Shard:
+    """
+    Part of the registry holding the games whose IDs hash to it. The shard lock only guards the bookkeeping,
+    and is never held while a game is being used, loaded or spilled.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        # Games kept in memory, least recently used first
+        self.resident: OrderedDict[str, Any] = OrderedDict()
+        # Lock of every registered game, resident or spilled to disk
+        self.game_locks: dict[str, threading.Lock] = dict[str, threading.Lock]()
+
+    def take_evictions(self, keep: str) -> list[tuple[str, Any, threading.Lock]]:
+        """
+        Removes the least recently used games over the capacity from memory. Games in use are skipped.
+        Must be called with the shard lock held.
+
+        :param keep: ID of the game which must stay resident
+        :return: Evicted games together with their acquired locks, to be spilled and released by the caller
+        """
+        evicted = list[tuple[str, Any, threading.Lock]]()
+        excess = len(self.resident) - self.capacity
+        if excess <= 0:
+            return evicted
+        for game_id in list(self.resident):
+            if len(evicted) == excess:
+                break
+            lock = self.game_locks[game_id]
+            if game_id == keep or not lock.acquire(blocking=False):
+                continue
+            evicted.append((game_id, self.resident.pop(game_id), lock))
+        return evicted
+
+
+class GameRegistry:
+    """
+    Holds the live games of the server process, keyed by game ID.
+
+    Every game has its own lock, taken for the whole time the game is checked out, so requests to different games
+    never wait on each other. Registry bookkeeping is split into shards with separate locks, held only for
+    a few dictionary operations. Memory is bounded by the capacity: once it is exceeded, the least recently used
+    games are spilled to files in the spill directory, and loaded back transparently on their next checkout.
+    A game that fails to spill stays in memory, so the capacity may be exceeded for as long as the disk fails.
+
+    Spilled games are unpickled by default, so the spill directory is created private to the user running
+    the server, and must not be writable by anyone else.
+
+    Games the registry doesn't know of are asked from the loader, if it has one, i.e. the game store
+    holding the games of previous processes, and registered if found.
+    """
+    GAME_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+    SPILL_FILE_SUFFIX: str = ".game"
+
+    def __init__(self, spill_directory: Path,
+                 capacity: int = 2048,
+                 shards: int = 64,
+                 dump: Callable[[Any], bytes] = pickle.dumps,
+                 load: Callable[[bytes], Any] = pickle.loads):
+        """
+        :param spill_directory: Directory for the evicted games. Games spilled by a previous process are
+        registered again, so they survive a restart.
+        :param capacity: Maximum number of games kept in memory, split evenly among the shards
+        :param shards: Number of independently locked registry parts
+        :param dump: Serializes a game for spilling
+        :param load: Deserializes a spilled game
+        :raises PermissionError: if the spill directory is accessible to other users and can't be made private
+        """
+        self.spill_directory = private_directory(Path(spill_directory))
+        self.capacity = capacity
+        self._shards: list[_Shard] = [_Shard(max(1, ceil(capacity / shards))) for _ in range(shards)]
+        self._dump = dump
+        self._load = load
+        # Called with the game ID once a game is removed, or spilled to disk, to drop what is kept about it elsewhere
+        self.removal_listeners: list[Callable[[str], None]] = list[Callable[[str], None]]()
+        self.eviction_listeners: list[Callable[[str], None]] = list[Callable[[str], None]]()
+        # Called with the ID of an unknown game, returns the game, or None if it doesn't exist either
+        self.loader: Optional[Callable[[str], Any]] = None
+        for file in self.spill_directory.iterdir():
+            if file.suffix == GameRegistry.SPILL_FILE_SUFFIX and GameRegistry.GAME_ID_PATTERN.fullmatch(file.stem):
+                self._shard(file.stem).game_locks[file.stem] = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(s.game_locks) for s in self._shards)
+
+    def __contains__(self, game_id: str) -> bool:
+        return self._game_lock(game_id) is not None
+
+    def resident_count(self) -> int:
+        return sum(len(s.resident) for s in self._shards)
+
+    def add(self, game: Any, game_id: Optional[str] = None) -> str:
+        """
+        Registers a new game. It may cause the least recently used games to be spilled to disk.
+
+        :param game: Game to register
+        :param game_id: ID to register the game under, a random one is generated if omitted
+        :return: ID of the game
+        :raises ValueError: if the ID is not valid or already taken
+        """
+        game_id = game_id if game_id is not None else uuid.uuid4().hex
+        if not GameRegistry.GAME_ID_PATTERN.fullmatch(game_id):
+            raise ValueError(f"Invalid game ID: {game_id}")
+        shard = self._shard(game_id)
+        with shard.lock:
+            if game_id in shard.game_locks:
+                raise ValueError(f"Game {game_id} already exists.")
+            shard.game_locks[game_id] = threading.Lock()
+            shard.resident[game_id] = game
+            evicted = shard.take_evictions(keep=game_id)
+        self._spill(evicted)
+        return game_id
+
+    @contextmanager
+    def checkout(self, game_id: str) -> Iterator[Any]:
+        """
+        Gives exclusive access to the game for the duration of the with block, loading it from disk if needed.
+        Checkouts are not reentrant: checking out the same game again in the block deadlocks.
+
+        :param game_id: ID of the game
+        :return: The game
+        :raises GameNotFoundException: if there is no such game
+        """
+        shard = self._shard(game_id)
+        lock = self._game_lock(game_id)
+        if lock is None:
+            raise GameNotFoundException(f"Game {game_id} does not exist.")
+        with lock:
+            with shard.lock:
+                if game_id not in shard.game_locks:
+                    # Removed while we were waiting for it
+                    raise GameNotFoundException(f"Game {game_id} does not exist.")
+                game = shard.resident.get(game_id)
+                if game is not None:
+                    shard.resident.move_to_end(game_id)
+            if game is None:
+                game = self._restore(game_id)
+                with shard.lock:
+                    shard.resident[game_id] = game
+                    evicted = shard.take_evictions(keep=game_id)
+                self._spill(evicted)
+            yield game
+
+    def remove(self, game_id: str) -> None:
+        """
+        Unregisters the game, i.e. once it is finished. Waits for the game to be checked in first.
+        The removal listeners are called before the game lock is released.
+
+        :param game_id: ID of the game
+        :raises GameNotFoundException: if there is no such game
+        """
+        shard = self._shard(game_id)
+        with shard.lock:
+            lock = shard.game_locks.get(game_id)
+        if lock is None:
+            raise GameNotFoundException(f"Game {game_id} does not exist.")
+        with lock:
+            with shard.lock:
+                shard.game_locks.pop(game_id, None)
+                resident = shard.resident.pop(game_id, None) is not None
+            if not resident:
+                self._spill_file(game_id).unlink(missing_ok=True)
+            for listener in self.removal_listeners:
+                listener(game_id)
+
+    def _game_lock(self, game_id: str) -> Optional[threading.Lock]:
+        """
+        :param game_id: ID of the game
+        :return: Lock of the game, registering the game from the loader if needed. None if there is no such game.
+        """
+        shard = self._shard(game_id)
+        with shard.lock:
+            lock = shard.game_locks.get(game_id)
+        if lock is not None or self.loader is None or not GameRegistry.GAME_ID_PATTERN.fullmatch(game_id):
+            return lock
+        game = self.loader(game_id)
+        if game is None:
+            return None
+        try:
+            self.add(game, game_id)
+        except ValueError:
+            # Loaded concurrently, the game registered first is kept
+            pass
+        with shard.lock:
+            return shard.game_locks.get(game_id)
+
+    def _shard(self, game_id: str) -> _Shard:
+        return self._shards[hash(game_id) % len(self._shards)]
+
+    def _spill_file(self, game_id: str) -> Path:
+        return self.spill_directory.joinpath(game_id + GameRegistry.SPILL_FILE_SUFFIX)
+
+    def _spill(self, evicted: list[tuple[str, Any, threading.Lock]]) -> None:
+        for game_id, game, lock in evicted:
+            file = self._spill_file(game_id)
+            temporary_file = file.with_suffix(".tmp")
+            try:
+                temporary_file.write_bytes(self._dump(game))
+                # Replacing is atomic, so a crash never leaves a partially written game behind
+                os.replace(temporary_file, file)
+                # Still holding the game lock, so nothing gets published for the game in the meantime
+                for listener in self.eviction_listeners:
+                    listener(game_id)
+            except Exception:
+                logger.exception(f"Could not spill game {game_id}, keeping it in memory.")
+                temporary_file.unlink(missing_ok=True)
+                shard = self._shard(game_id)
+                with shard.lock:
+                    # Still registered, removing the game waits for its lock. It stays first in line for eviction.
+                    shard.resident[game_id] = game
+                    shard.resident.move_to_end(game_id, last=False)
+            finally:
+                lock.release()
+
+    def _restore(self, game_id: str) -> Any:
+        file = self._spill_file(game_id)
+        game = self._load(file.read_bytes())
+        file.unlink()
+        return game
+
+
+def init_game_registry(app: Flask) -> GameRegistry:
+    """
+    Creates the game registry from the app configuration and attaches it to the app.
+
+    :param app: Flask app
+    :return: The game registry
+    """
+    spill_directory = app.config.get("GAME_REGISTRY_SPILL_DIRECTORY") or Path(app.instance_path).joinpath("games")
+    registry = GameRegistry(spill_directory,
+                            capacity=app.config["GAME_REGISTRY_CAPACITY"],
+                            shards=app.config["GAME_REGISTRY_SHARDS"])
+    app.extensions[EXTENSION_NAME] = registry
+    return registry
+
+
+def get_game_registry() -> GameRegistry:
+    """
+    :return: Game registry of the current app
+    """
+    return current_app.extensions[EXTENSION_NAME]
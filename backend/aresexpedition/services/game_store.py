@@ -0,0 +1,371 @@
+"""
+Persists the games in a local SQLite database, so they survive a restart of the server.
+
+A game is stored as a checkpoint of its whole state, followed by the log of the moves made since. Recording a move
+only queues it: a background thread commits everything queued within the durability window in a single
+transaction, so the disk is never part of a request, and a burst of moves costs one commit instead of one per move.
+A crash loses at most the moves recorded within the last durability window. A new checkpoint is taken every
+`checkpoint_interval` moves of a game, which bounds the moves replayed when the game is loaded, and the moves
+it covers are deleted.
+
+Games are loaded lazily, the first time their ID is asked for after a restart, by replaying the logged moves
+on top of the last checkpoint. Checkpoints are unpickled by default, so the database directory is created private
+to the user running the server.
+
+The digests of the seat tokens are stored along with the games, so the seats of a reloaded game stay with the clients
+who took them. They are committed before the token is handed out: a seat lost in a crash could be taken by anyone.
+"""
+
+import atexit
+import json
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from flask import Flask, current_app
+
+from ..startup import private_directory
+from .game_registry import EXTENSION_NAME as GAME_REGISTRY
+
+EXTENSION_NAME: str = "game_store"
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    game_id TEXT PRIMARY KEY,
+    -- Number of the game's moves the state includes
+    sequence INTEGER NOT NULL,
+    state BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS moves (
+    game_id TEXT NOT NULL,
+    sequence INTEGER NOT NULL,
+    player TEXT NOT NULL,
+    move TEXT NOT NULL,
+    PRIMARY KEY (game_id, sequence)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS seats (
+    game_id TEXT NOT NULL,
+    player TEXT NOT NULL,
+    token_digest BLOB NOT NULL,
+    PRIMARY KEY (game_id, player)
+) WITHOUT ROWID;
+"""
+
+# Player name and move in its JSON form
+RecordedMove = tuple[str, dict]
+
+
+class _Checkpoint:
+    def __init__(self, sequence: int, state: bytes, first: bool):
+        self.sequence = sequence
+        self.state = state
+        # First checkpoint of the game taken by this process, which replaces whatever is stored for the game
+        self.first = first
+
+
+class _Writes:
+    """
+    Writes queued for the next transaction.
+    """
+    def __init__(self):
+        self.checkpoints: dict[str, _Checkpoint] = dict[str, _Checkpoint]()
+        self.moves: list[tuple[str, int, str, str]] = list[tuple[str, int, str, str]]()
+        self.seats: list[tuple[str, str, bytes]] = list[tuple[str, str, bytes]]()
+        self.deleted: set[str] = set[str]()
+        # Time the oldest queued write was recorded at, as given by time.monotonic
+        self.since: float = 0.0
+
+    def __bool__(self) -> bool:
+        return bool(self.checkpoints or self.moves or self.seats or self.deleted)
+
+    def merge(self, newer: "_Writes") -> None:
+        """
+        Adds the writes queued after these, i.e. to retry a failed transaction together with them.
+        """
+        for game_id in newer.deleted:
+            self.forget(game_id)
+        self.deleted |= newer.deleted
+        for game_id, checkpoint in newer.checkpoints.items():
+            older = self.checkpoints.get(game_id)
+            checkpoint.first = checkpoint.first or (older is not None and older.first)
+            self.checkpoints[game_id] = checkpoint
+            # Moves queued before are part of the newer checkpoint
+            self.moves = [m for m in self.moves if m[0] != game_id]
+        self.moves += newer.moves
+        self.seats += newer.seats
+
+    def forget(self, game_id: str) -> None:
+        self.checkpoints.pop(game_id, None)
+        self.moves = [m for m in self.moves if m[0] != game_id]
+        self.seats = [seat for seat in self.seats if seat[0] != game_id]
+
+
+class GameStore:
+    """
+    SQLite database of the games, written behind by a background thread, see the module description.
+    """
+    FILE_NAME: str = "games.sqlite3"
+
+    def __init__(self, path: Path,
+                 durability_window: float = 0.2,
+                 checkpoint_interval: int = 32,
+                 dump: Callable[[Any], bytes] = pickle.dumps,
+                 load: Callable[[bytes], Any] = pickle.loads):
+        """
+        :param path: Database file, created if it doesn't exist
+        :param durability_window: Seconds a recorded move may wait for its transaction at most
+        :param checkpoint_interval: Number of moves of a game between two checkpoints of its state
+        :param dump: Serializes a game for a checkpoint
+        :param load: Deserializes a checkpoint
+        """
+        if checkpoint_interval < 1:
+            raise ValueError("checkpoint_interval must be at least 1.")
+        self.path = path
+        self.durability_window = durability_window
+        self.checkpoint_interval = checkpoint_interval
+        self._dump = dump
+        self._load = load
+        self._condition = threading.Condition()
+        self._queued = _Writes()
+        # Moves recorded so far, by game ID, for the games recorded or loaded by this process
+        self._sequences: dict[str, int] = dict[str, int]()
+        self._checkpoint_sequences: dict[str, int] = dict[str, int]()
+        # Numbers of the transactions requested and committed, to wait for a flush
+        self._requested: int = 0
+        self._committed: int = 0
+        self._closed: bool = False
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+        self._thread = threading.Thread(target=self._write_behind, name="game-store", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        # Every transaction is synced, the write-behind keeps them few
+        connection.execute("PRAGMA synchronous=FULL")
+        return connection
+
+    def record(self, game_id: str, game: Any, moves: list[RecordedMove]) -> None:
+        """
+        Queues the moves just made in the game. Must be called while the game is checked out from the registry,
+        as the game state may get serialized for a checkpoint.
+
+        :param game_id: ID of the game
+        :param game: The game, after the moves
+        :param moves: Moves made, in the order they were made. Without moves, the current state is checkpointed.
+        """
+        with self._condition:
+            sequence = self._sequences.get(game_id)
+            first = sequence is None
+            sequence = (sequence or 0) + len(moves)
+            self._sequences[game_id] = sequence
+            checkpoint = first or not moves \
+                or sequence - self._checkpoint_sequences[game_id] >= self.checkpoint_interval
+        # Pickled outside the store lock, the game lock keeps the state still
+        state = self._dump(game) if checkpoint else None
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Game store is closed.")
+            queued = self._queued
+            if not queued:
+                queued.since = time.monotonic()
+            queued.deleted.discard(game_id)
+            if checkpoint:
+                self._checkpoint_sequences[game_id] = sequence
+                older = queued.checkpoints.get(game_id)
+                queued.checkpoints[game_id] = _Checkpoint(sequence, state, first or (older is not None and older.first))
+                # Moves queued so far are part of the checkpoint
+                queued.moves = [m for m in queued.moves if m[0] != game_id]
+            else:
+                queued.moves += [(game_id, sequence - len(moves) + i + 1, player, json.dumps(move))
+                                 for i, (player, move) in enumerate(moves)]
+            self._condition.notify()
+
+    def record_seat(self, game_id: str, player: str, token_digest: bytes) -> None:
+        """
+        Stores the digest of the token issued for the player's seat, committed by the time this returns.
+
+        :param game_id: ID of the game
+        :param player: Name of the player
+        :param token_digest: Digest of the seat token
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Game store is closed.")
+            if not self._queued:
+                self._queued.since = time.monotonic()
+            self._queued.seats.append((game_id, player, token_digest))
+        self.flush()
+
+    def load_seats(self, game_id: str) -> dict[str, bytes]:
+        """
+        :param game_id: ID of the game
+        :return: Digests of the tokens of the seats taken in the game, by player name
+        """
+        with self._condition:
+            pending = game_id in self._queued.deleted
+        if pending:
+            self.flush()
+        connection = self._connect()
+        try:
+            return dict(connection.execute("SELECT player, token_digest FROM seats WHERE game_id = ?", (game_id,)))
+        finally:
+            connection.close()
+
+    def delete(self, game_id: str) -> None:
+        """
+        Queues the removal of the game from the database.
+
+        :param game_id: ID of the game
+        """
+        with self._condition:
+            self._sequences.pop(game_id, None)
+            self._checkpoint_sequences.pop(game_id, None)
+            if not self._queued:
+                self._queued.since = time.monotonic()
+            self._queued.forget(game_id)
+            self._queued.deleted.add(game_id)
+            self._condition.notify()
+
+    def load(self, game_id: str) -> Optional[Any]:
+        """
+        Loads the game from the database, replaying its moves since the last checkpoint.
+
+        :param game_id: ID of the game
+        :return: The game, None if the database doesn't have it
+        """
+        with self._condition:
+            pending = game_id in self._queued.deleted or game_id in self._queued.checkpoints \
+                or any(m[0] == game_id for m in self._queued.moves)
+        if pending:
+            self.flush()
+        connection = self._connect()
+        try:
+            row = connection.execute("SELECT sequence, state FROM checkpoints WHERE game_id = ?",
+                                     (game_id,)).fetchone()
+            if row is None:
+                return None
+            checkpoint_sequence, state = row
+            moves = connection.execute("SELECT sequence, player, move FROM moves "
+                                       "WHERE game_id = ? AND sequence > ? ORDER BY sequence",
+                                       (game_id, checkpoint_sequence)).fetchall()
+        finally:
+            connection.close()
+        game = self._load(state)
+        sequence = checkpoint_sequence
+        for sequence, player, move in moves:
+            game.apply_dict(player, json.loads(move))
+        with self._condition:
+            # A concurrent load of the same game may have been registered and moved on already
+            if game_id not in self._sequences:
+                self._sequences[game_id] = sequence
+                self._checkpoint_sequences[game_id] = checkpoint_sequence
+        return game
+
+    def flush(self) -> None:
+        """
+        Commits everything queued so far, without waiting for the durability window to pass.
+        """
+        with self._condition:
+            self._requested += 1
+            target = self._requested
+            self._condition.notify()
+            while self._committed < target and self._thread.is_alive():
+                self._condition.wait()
+
+    def close(self) -> None:
+        """
+        Commits everything queued and stops the background thread.
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _write_behind(self) -> None:
+        while True:
+            with self._condition:
+                while not (self._queued or self._closed or self._requested > self._committed):
+                    self._condition.wait()
+                # Writes recorded within the window join the transaction
+                while self._queued and not self._closed and self._requested == self._committed:
+                    remaining = self._queued.since + self.durability_window - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                writes, self._queued = self._queued, _Writes()
+                requested, closed = self._requested, self._closed
+            if writes:
+                try:
+                    self._commit(writes)
+                except Exception:
+                    logger.exception("Could not store the games, retrying.")
+                    with self._condition:
+                        writes.merge(self._queued)
+                        self._queued = writes
+                        if not closed:
+                            self._condition.wait(self.durability_window)
+                            continue
+            with self._condition:
+                self._committed = requested
+                self._condition.notify_all()
+            if closed:
+                return
+
+    def _commit(self, writes: _Writes) -> None:
+        connection = self._connect()
+        try:
+            with connection:
+                for game_id in writes.deleted:
+                    connection.execute("DELETE FROM checkpoints WHERE game_id = ?", (game_id,))
+                    connection.execute("DELETE FROM moves WHERE game_id = ?", (game_id,))
+                    connection.execute("DELETE FROM seats WHERE game_id = ?", (game_id,))
+                for game_id, checkpoint in writes.checkpoints.items():
+                    connection.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)",
+                                       (game_id, checkpoint.sequence, checkpoint.state))
+                    # Moves stored by a previous process don't follow on the first checkpoint of this one
+                    connection.execute("DELETE FROM moves WHERE game_id = ? AND (? OR sequence <= ?)",
+                                       (game_id, checkpoint.first, checkpoint.sequence))
+                connection.executemany("INSERT OR REPLACE INTO moves VALUES (?, ?, ?, ?)", writes.moves)
+                connection.executemany("INSERT OR REPLACE INTO seats VALUES (?, ?, ?)", writes.seats)
+        finally:
+            connection.close()
+
+
+def init_game_store(app: Flask) -> Optional[GameStore]:
+    """
+    Creates the game store from the app configuration, if enabled, and attaches it to the app.
+    The game registry must be initialized first: it loads the games it doesn't know of from the store,
+    and the games it removes are deleted from the store.
+    """
+    if not app.config["GAME_STORE_ENABLED"]:
+        return None
+    directory = app.config.get("GAME_STORE_DIRECTORY") or Path(app.instance_path).joinpath("store")
+    store = GameStore(private_directory(Path(directory)).joinpath(GameStore.FILE_NAME),
+                      durability_window=app.config["GAME_STORE_DURABILITY_WINDOW"],
+                      checkpoint_interval=app.config["GAME_STORE_CHECKPOINT_INTERVAL"])
+    registry = app.extensions[GAME_REGISTRY]
+    registry.loader = store.load
+    registry.removal_listeners.append(store.delete)
+    atexit.register(store.close)
+    app.extensions[EXTENSION_NAME] = store
+    return store
+
+
+def record_moves(game_id: str, game: Any, moves: list[RecordedMove]) -> None:
+    """
+    Records the moves in the game store of the current app, if it has one.
+    Must be called while the game is checked out from the registry.
+    """
+    store = current_app.extensions.get(EXTENSION_NAME)
+    if store is not None:
+        store.record(game_id, game, moves)
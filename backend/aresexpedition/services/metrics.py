@@ -0,0 +1,27 @@
+import time
+
+from flask import Flask, Response, g, request
+
+from ..models.instrumentation import HTTP_REQUEST_SECONDS, HTTP_REQUESTS
+
+
+def _start_timer() -> None:
+    g.request_start = time.perf_counter()
+
+
+def _record_request(response: Response) -> Response:
+    start = g.pop("request_start", None)
+    endpoint = request.endpoint or "unmatched"
+    if start is not None:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint)
+    HTTP_REQUESTS.inc(request.method, endpoint, str(response.status_code))
+    return response
+
+
+def init_metrics(app: Flask) -> None:
+    """
+    Records the number and handling time of the requests, by endpoint. Streamed responses are timed
+    until they start streaming.
+    """
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
@@ -0,0 +1,71 @@
+import threading
+from functools import partial
+from typing import Any, Callable
+
+from flask import Flask, current_app
+
+from ..models.scheduler import MoveScheduler
+from .game_registry import EXTENSION_NAME as GAME_REGISTRY, GameNotFoundException, GameRegistry
+from .game_store import RecordedMove, record_moves
+from .state_stream import publish_game
+
+EXTENSION_NAME: str = "move_schedulers"
+
+
+class MoveSchedulers:
+    """
+    Move scheduler of every game players submit moves to, so the moves submitted at the same time are resolved
+    together, in one checkout of the game, see models/scheduler.py.
+    """
+    def __init__(self, registry: GameRegistry, resolved: Callable[[str, Any, list[RecordedMove]], None]):
+        """
+        :param registry: Registry holding the games
+        :param resolved: Called with the game ID, the game and the moves applied after every batch of moves
+        that changed the game
+        """
+        self.registry = registry
+        self.resolved = resolved
+        self._lock = threading.Lock()
+        self._schedulers: dict[str, MoveScheduler] = dict[str, MoveScheduler]()
+
+    def submit(self, game_id: str, player: str, move: dict) -> int:
+        """
+        :param game_id: ID of the game
+        :param player: Name of the player making the move
+        :param move: Move in its JSON form
+        :return: Version of the game right after the move
+        :raises GameNotFoundException: if there is no such game
+        :raises GameException: if the move is not allowed
+        """
+        with self._lock:
+            scheduler = self._schedulers.get(game_id)
+            if scheduler is None:
+                if game_id not in self.registry:
+                    raise GameNotFoundException(f"Game {game_id} does not exist.")
+                scheduler = self._schedulers[game_id] = \
+                    MoveScheduler(partial(self.registry.checkout, game_id), partial(self.resolved, game_id))
+        return scheduler.submit(player, move)
+
+    def forget(self, game_id: str) -> None:
+        with self._lock:
+            self._schedulers.pop(game_id, None)
+
+
+def _resolved(game_id: str, game: Any, moves: list[RecordedMove]) -> None:
+    record_moves(game_id, game, moves)
+    publish_game(game_id, game)
+
+
+def init_move_schedulers(app: Flask) -> MoveSchedulers:
+    """
+    Creates the move schedulers and attaches them to the app. The game registry, the game store and the state
+    stream must be initialized first, every resolved batch of moves gets recorded and published to the stream.
+    """
+    schedulers = MoveSchedulers(app.extensions[GAME_REGISTRY], _resolved)
+    app.extensions[GAME_REGISTRY].removal_listeners.append(schedulers.forget)
+    app.extensions[EXTENSION_NAME] = schedulers
+    return schedulers
+
+
+def get_move_schedulers() -> MoveSchedulers:
+    return current_app.extensions[EXTENSION_NAME]
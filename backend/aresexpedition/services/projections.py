@@ -0,0 +1,122 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from flask import Flask, current_app
+
+from .game_registry import EXTENSION_NAME as GAME_REGISTRY
+
+EXTENSION_NAME: str = "projections"
+
+
+class Projection:
+    """
+    A part of the game state as seen by someone, together with the version it was built from.
+    The JSON encoding is done on first use and kept, so it is shared by all clients receiving the projection.
+    """
+    def __init__(self, version: int, data: dict):
+        self.version = version
+        self.data = data
+        self._json: Optional[str] = None
+
+    def to_json(self) -> str:
+        if self._json is None:
+            self._json = json.dumps(self.data)
+        return self._json
+
+
+class _GameProjections:
+    def __init__(self):
+        self.public: Optional[Projection] = None
+        # Private state of each player, reused for as long as only the public state changes
+        self.private: dict[str, Projection] = dict[str, Projection]()
+
+
+class ProjectionCache:
+    """
+    Builds the per-player views of the games and caches them. A view is made of the public state of the game,
+    shared by all players and spectators and cached by game version, and the private state of the viewing player,
+    cached by the player's private version. A move that changes only the public state doesn't rebuild
+    any private state, and rendering a game for many clients builds and encodes every part once.
+
+    The game must be checked out from the registry while its projections are built.
+    """
+    def __init__(self, capacity: int = 2048):
+        """
+        :param capacity: Maximum number of games to keep the projections of, least recently used ones are dropped
+        """
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._games: OrderedDict[str, _GameProjections] = OrderedDict()
+
+    def _projections(self, game_id: str) -> _GameProjections:
+        with self._lock:
+            projections = self._games.get(game_id)
+            if projections is None:
+                projections = self._games[game_id] = _GameProjections()
+                if len(self._games) > self.capacity:
+                    self._games.popitem(last=False)
+            else:
+                self._games.move_to_end(game_id)
+            return projections
+
+    def public(self, game_id: str, game: Any) -> Projection:
+        """
+        :param game_id: ID of the game
+        :param game: Game providing its `version` and public state through `to_dict()`
+        :return: Public state of the game
+        """
+        projections = self._projections(game_id)
+        if projections.public is None or projections.public.version != game.version:
+            projections.public = Projection(game.version, game.to_dict())
+        return projections.public
+
+    def private(self, game_id: str, game: Any, player_name: str) -> Projection:
+        """
+        :param game_id: ID of the game
+        :param game: Game providing its players through `get_player(name)`
+        :param player_name: Name of the player
+        :return: Private state of the player
+        """
+        player = game.get_player(player_name)
+        projections = self._projections(game_id)
+        private = projections.private.get(player_name)
+        if private is None or private.version != player.private_version:
+            private = projections.private[player_name] = Projection(player.private_version, player.to_private_dict())
+        return private
+
+    def view_json(self, game_id: str, game: Any, viewer: Optional[str] = None) -> str:
+        """
+        Encodes the view of the game for the viewer: the public state, and the private state of the viewer
+        if the viewer is a player. Cached encodings of both parts are spliced together, so nothing is re-encoded.
+
+        :param game_id: ID of the game
+        :param game: The game
+        :param viewer: Name of the viewing player, None for spectators
+        :return: JSON object with the public and private state
+        """
+        public = self.public(game_id, game).to_json()
+        private = self.private(game_id, game, viewer).to_json() if viewer is not None else "null"
+        return f'{{"public": {public}, "private": {private}}}'
+
+    def forget(self, game_id: str) -> None:
+        with self._lock:
+            self._games.pop(game_id, None)
+
+
+def init_projections(app: Flask) -> ProjectionCache:
+    """
+    Creates the projection cache and attaches it to the app. The game registry must be initialized first,
+    the cache forgets the games it removes or spills.
+    """
+    projections = ProjectionCache(app.config["PROJECTION_CACHE_CAPACITY"])
+    registry = app.extensions[GAME_REGISTRY]
+    registry.removal_listeners.append(projections.forget)
+    registry.eviction_listeners.append(projections.forget)
+    app.extensions[EXTENSION_NAME] = projections
+    return projections
+
+
+def get_projections() -> ProjectionCache:
+    return current_app.extensions[EXTENSION_NAME]
@@ -0,0 +1,140 @@
+import hashlib
+import hmac
+import secrets
+import threading
+from typing import Callable, Optional
+
+from flask import Flask, current_app
+
+from .game_registry import EXTENSION_NAME as GAME_REGISTRY, GameRegistry
+from .game_store import EXTENSION_NAME as GAME_STORE
+
+EXTENSION_NAME: str = "seats"
+
+
+class SeatTakenException(Exception):
+    pass
+
+
+class PlayerNotAuthorizedException(Exception):
+    pass
+
+
+def parse_token(authorization: Optional[str], query_token: Optional[str]) -> Optional[str]:
+    """
+    Seat tokens come in the Authorization header as bearer tokens, or in the token query parameter
+    for the clients which can't set headers, i.e. browsers opening an event stream.
+
+    :param authorization: Value of the Authorization header
+    :param query_token: Value of the token query parameter
+    :return: The token, None if the request has none
+    """
+    if authorization is not None:
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token.strip():
+            return token.strip()
+    return query_token or None
+
+
+def _digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class SeatRegistry:
+    """
+    Binds the players of the games to the clients who took their seats. Taking a seat issues a random token,
+    which the client presents from then on to move as the player, and to see the private state of the player.
+    Only digests of the tokens are kept.
+
+    Seats are kept in memory, for as long as their game is registered. To survive a restart of the server,
+    the digests are handed to the recorder as seats are taken, and the seats of a game with none in memory
+    are asked from the loader, i.e. the game store, so the seats of a reloaded game can't be taken again.
+    """
+    TOKEN_BYTES: int = 32
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Token digests by game ID and player name
+        self._seats: dict[str, dict[str, bytes]] = dict[str, dict[str, bytes]]()
+        # Token digests of the seats taken in a game before a restart, by player name
+        self.loader: Optional[Callable[[str], dict[str, bytes]]] = None
+        # Keeps the token digest of a seat just taken, by game ID and player name
+        self.recorder: Optional[Callable[[str, str, bytes], None]] = None
+
+    def _game_seats(self, game_id: str) -> Optional[dict[str, bytes]]:
+        """
+        :return: Token digests of the seats taken in the game by player name, loaded from the loader if needed.
+        None if no seat of the game was taken.
+        """
+        with self._lock:
+            seats = self._seats.get(game_id)
+        if seats is not None or self.loader is None or not GameRegistry.GAME_ID_PATTERN.fullmatch(game_id):
+            return seats
+        loaded = self.loader(game_id)
+        if not loaded:
+            return None
+        with self._lock:
+            # A concurrent load of the same seats may have been kept already
+            return self._seats.setdefault(game_id, loaded)
+
+    def take(self, game_id: str, player: str) -> str:
+        """
+        Issues the token of the player's seat. The player must be checked to be part of the game beforehand.
+
+        :param game_id: ID of the game
+        :param player: Name of the player
+        :return: Token of the seat
+        :raises SeatTakenException: if the seat was taken already
+        """
+        token = secrets.token_urlsafe(SeatRegistry.TOKEN_BYTES)
+        digest = _digest(token)
+        self._game_seats(game_id)
+        with self._lock:
+            seats = self._seats.setdefault(game_id, dict[str, bytes]())
+            if player in seats:
+                raise SeatTakenException(f"Seat of {player} is already taken.")
+            seats[player] = digest
+        if self.recorder is not None:
+            try:
+                self.recorder(game_id, player, digest)
+            except Exception:
+                # Nobody got the token, so the seat is free again
+                with self._lock:
+                    seats.pop(player, None)
+                raise
+        return token
+
+    def authorize(self, game_id: str, player: str, token: Optional[str]) -> None:
+        """
+        :param game_id: ID of the game
+        :param player: Name of the player the client acts as
+        :param token: Token presented by the client
+        :raises PlayerNotAuthorizedException: if the token is not the one issued for the player's seat
+        """
+        expected = (self._game_seats(game_id) or dict()).get(player)
+        # Compared in constant time, so the digest can't be guessed byte by byte from the response times
+        if expected is None or token is None or not hmac.compare_digest(expected, _digest(token)):
+            raise PlayerNotAuthorizedException(f"Not authorized to act as {player}.")
+
+    def forget(self, game_id: str) -> None:
+        with self._lock:
+            self._seats.pop(game_id, None)
+
+
+def init_seats(app: Flask) -> SeatRegistry:
+    """
+    Creates the seat registry and attaches it to the app. The game registry must be initialized first,
+    the seats of the games it removes are dropped. So must the game store, if enabled, which keeps the seats.
+    """
+    seats = SeatRegistry()
+    store = app.extensions.get(GAME_STORE)
+    if store is not None:
+        seats.loader = store.load_seats
+        seats.recorder = store.record_seat
+    app.extensions[GAME_REGISTRY].removal_listeners.append(seats.forget)
+    app.extensions[EXTENSION_NAME] = seats
+    return seats
+
+
+def get_seats() -> SeatRegistry:
+    return current_app.extensions[EXTENSION_NAME]
@@ -0,0 +1,330 @@
+import asyncio
+import json
+import threading
+from collections import deque
+from typing import Any, Optional
+
+from flask import Flask, current_app
+
+from .game_registry import EXTENSION_NAME as GAME_REGISTRY, get_game_registry
+from .projections import Projection, get_projections
+
+EXTENSION_NAME: str = "state_stream"
+
+
+def diff_state(old: dict, new: dict) -> dict:
+    """
+    Computes the changes between two JSON states as a JSON Merge Patch (RFC 7396): only the changed fields are kept,
+    nested objects are diffed recursively, lists are replaced as a whole, and removed fields are set to None.
+
+    :param old: Previous state
+    :param new: Current state
+    :return: Patch turning the previous state into the current one, empty if nothing changed
+    """
+    delta = dict()
+    for key, value in new.items():
+        if key not in old:
+            delta[key] = value
+            continue
+        previous = old[key]
+        if isinstance(value, dict) and isinstance(previous, dict):
+            nested = diff_state(previous, value)
+            if nested:
+                delta[key] = nested
+        elif value != previous:
+            delta[key] = value
+    for key in old.keys() - new.keys():
+        delta[key] = None
+    return delta
+
+
+class StateEvent:
+    """
+    Message for the stream subscribers, already encoded, so it is serialized once no matter the number of subscribers.
+    """
+    def __init__(self, kind: str, version: int, data: str, player: Optional[str] = None):
+        """
+        :param kind: "state" or "delta", prefixed with "private_" for the private state of a player
+        :param version: Version of the state after the event
+        :param data: Encoded full state or delta
+        :param player: Player whose private state the event carries, None for the public state
+        """
+        self.kind = kind
+        self.version = version
+        self.data = data
+        self.player = player
+
+    def to_sse(self, event_id: str) -> str:
+        return f"id: {event_id}\nevent: {self.kind}\ndata: {self.data}\n\n"
+
+
+class _Topic:
+    """
+    Published versions of one part of a game state: the public state, or the private state of a player.
+    """
+    def __init__(self, history: int, player: Optional[str]):
+        self.player = player
+        self.prefix = "private_" if player is not None else ""
+        self.state: Optional[Projection] = None
+        # Most recent deltas, each one leading from the version of the previous one to its own
+        self.deltas: deque[tuple[int, StateEvent]] = deque(maxlen=history)
+
+    @property
+    def version(self) -> int:
+        return self.state.version if self.state is not None else -1
+
+    def events_since(self, version: int) -> list[StateEvent]:
+        if version == self.version or self.state is None:
+            return list()
+        # Deltas only help if the chain starts right at the subscriber's version
+        for i, (base, _) in enumerate(self.deltas):
+            if base == version:
+                return [event for _, event in list(self.deltas)[i:]]
+        # Behind the kept history, or ahead of a game reloaded without the moves made last before a restart
+        return [StateEvent(self.prefix + "state", self.version, self.state.to_json(), self.player)]
+
+    def update(self, state: Projection) -> None:
+        if self.state is not None:
+            delta = json.dumps(diff_state(self.state.data, state.data))
+            self.deltas.append((self.version, StateEvent(self.prefix + "delta", state.version, delta, self.player)))
+        self.state = state
+
+
+class _Channel:
+    def __init__(self, history: int):
+        self.history = history
+        # One condition for all topics of the game, so a subscriber waits for any of its topics at once
+        self.condition = threading.Condition()
+        self.topics: dict[Optional[str], _Topic] = {None: _Topic(history, None)}
+        # Futures of the subscribers waiting in event loops, resolved on the next publish
+        self.async_waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = list()
+        # Set once the channel is dropped, its subscribers go on waiting in a new one
+        self.closed: bool = False
+
+    def events_since(self, since: dict[Optional[str], int]) -> list[StateEvent]:
+        return [event for player, version in since.items() for event in self.topic(player).events_since(version)]
+
+    def wake_up(self) -> None:
+        self.condition.notify_all()
+        for loop, future in self.async_waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+        self.async_waiters.clear()
+
+    def topic(self, player: Optional[str]) -> _Topic:
+        topic = self.topics.get(player)
+        if topic is None:
+            topic = self.topics[player] = _Topic(self.history, player)
+        return topic
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class StateStream:
+    """
+    Pushes the changes of game states to the subscribers, i.e. through server-sent events.
+    The public state is streamed to everyone, the private state of a player only to that player.
+    Each published state is diffed against the previous one once, and the encoded delta is shared by all subscribers.
+    Subscribers that fall behind by more than the kept history get the full state instead, and so do subscribers
+    ahead of the published state, whose cursors outlived the game's channel, i.e. across a restart.
+    """
+    def __init__(self, history: int = 64):
+        """
+        :param history: Number of recent deltas kept per game and topic for subscribers catching up
+        """
+        self.history = history
+        self._lock = threading.Lock()
+        self._channels: dict[str, _Channel] = dict[str, _Channel]()
+
+    def _channel(self, game_id: str) -> _Channel:
+        with self._lock:
+            channel = self._channels.get(game_id)
+            if channel is None:
+                channel = self._channels[game_id] = _Channel(self.history)
+            return channel
+
+    def watch(self, game_id: str, player: Optional[str] = None) -> None:
+        """
+        Makes sure the private state of the player gets published from now on.
+        Private states are only published for the players who are watching.
+
+        :param game_id: ID of the game
+        :param player: Name of the player, None for the public state only
+        """
+        channel = self._channel(game_id)
+        with channel.condition:
+            channel.topic(player)
+
+    def watched_players(self, game_id: str) -> list[str]:
+        channel = self._channel(game_id)
+        with channel.condition:
+            return [p for p in channel.topics if p is not None]
+
+    def version(self, game_id: str, player: Optional[str] = None) -> int:
+        """
+        :return: Last published version of the public state, or of the private state of the player,
+        -1 if none was published yet
+        """
+        channel = self._channel(game_id)
+        with channel.condition:
+            return channel.topic(player).version
+
+    def publish(self, game_id: str, state: Projection, player: Optional[str] = None) -> None:
+        """
+        Publishes a new version of the state and wakes up the subscribers. Older versions are ignored.
+
+        :param game_id: ID of the game
+        :param state: Public state of the game, or private state of the player
+        :param player: Name of the player for private states
+        """
+        channel = self._channel(game_id)
+        with channel.condition:
+            topic = channel.topic(player)
+            if state.version <= topic.version:
+                return
+            topic.update(state)
+            channel.wake_up()
+
+    def wait(self, game_id: str, since: dict[Optional[str], int], timeout: Optional[float] = None) -> list[StateEvent]:
+        """
+        Waits until any of the watched states moves past the given version, or doesn't reach it any more.
+
+        :param game_id: ID of the game
+        :param since: Last version the subscriber knows of the public state (key None) and of the private state
+        of a player (key player name), -1 if it knows none
+        :param timeout: Maximum number of seconds to wait
+        :return: Events bringing the subscriber up to date, empty if the wait timed out
+        """
+        channel = self._channel(game_id)
+        with channel.condition:
+            channel.condition.wait_for(lambda: channel.closed or channel.events_since(since), timeout)
+            return channel.events_since(since)
+
+    async def wait_async(self, game_id: str, since: dict[Optional[str], int],
+                         timeout: Optional[float] = None) -> list[StateEvent]:
+        """
+        Same as `wait`, but waits in the running event loop instead of blocking a thread,
+        so an idle subscriber costs no more than a future.
+        """
+        channel = self._channel(game_id)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with channel.condition:
+            state_events = channel.events_since(since)
+            if state_events or channel.closed:
+                return state_events
+            channel.async_waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with channel.condition:
+                if (loop, future) in channel.async_waiters:
+                    channel.async_waiters.remove((loop, future))
+        with channel.condition:
+            return channel.events_since(since)
+
+    def close(self, game_id: str) -> None:
+        """
+        Drops the kept state of the game, once it was removed from the registry or spilled to disk.
+        Waiting subscribers are woken up without any events, the next wait starts over with the next published state.
+        """
+        with self._lock:
+            channel = self._channels.pop(game_id, None)
+        if channel is not None:
+            with channel.condition:
+                channel.closed = True
+                channel.wake_up()
+
+
+def publish_game(game_id: str, game: Any) -> None:
+    """
+    Publishes the current public state of the game, and the private states of the watching players,
+    to the state stream of the current app. States which didn't change are not published again.
+    Must be called while the game is checked out from the registry.
+
+    :param game_id: ID of the game
+    :param game: Game providing its `version`, public state and players' private states
+    """
+    stream = get_state_stream()
+    projections = get_projections()
+    if stream.version(game_id) < game.version:
+        stream.publish(game_id, projections.public(game_id, game))
+    for player in stream.watched_players(game_id):
+        private = projections.private(game_id, game, player)
+        if stream.version(game_id, player) < private.version:
+            stream.publish(game_id, private, player)
+
+
+def parse_stream_cursor(cursor: Optional[str], player: Optional[str]) -> dict[Optional[str], int]:
+    """
+    Stream cursors are the last known public state version, followed by the private state version of the player
+    if the stream includes it, i.e. "12" or "12.7".
+
+    :param cursor: Cursor received from the client, None if the client knows nothing yet
+    :param player: Name of the player, None for spectators
+    :return: Last known version of each watched state, keyed by the player name or None for the public state
+    """
+    versions = [-1, -1]
+    for i, version in enumerate((cursor or "").split(".")[:2]):
+        try:
+            versions[i] = int(version)
+        except ValueError:
+            pass
+    since = {None: versions[0]}
+    if player is not None:
+        since[player] = versions[1]
+    return since
+
+
+def format_stream_cursor(since: dict[Optional[str], int], player: Optional[str]) -> str:
+    return f"{since[None]}.{since[player]}" if player is not None else str(since[None])
+
+
+def encode_poll_response(state_events: list[StateEvent], cursor: str) -> str:
+    """
+    Encodes the events for long-polling clients, splicing in the already encoded event data.
+
+    :param state_events: Events to send, possibly none if the poll timed out
+    :param cursor: Stream cursor after the events
+    :return: JSON object with the cursor and the events
+    """
+    encoded = ", ".join(f'{{"event": "{e.kind}", "data": {e.data}}}' for e in state_events)
+    return f'{{"cursor": "{cursor}", "events": [{encoded}]}}'
+
+
+def watch_game(game_id: str, player: Optional[str] = None) -> None:
+    """
+    Prepares the state stream of the current app for a new subscriber of the game, publishing its current state.
+
+    :param game_id: ID of the game
+    :param player: Name of the player whose private state to stream, None for spectators
+    :raises GameNotFoundException: if there is no such game
+    :raises GameException: if the game has no such player
+    """
+    stream = get_state_stream()
+    with get_game_registry().checkout(game_id) as game:
+        if player is not None:
+            game.get_player(player)
+        stream.watch(game_id, player)
+        publish_game(game_id, game)
+
+
+def init_state_stream(app: Flask) -> StateStream:
+    """
+    Creates the state stream and attaches it to the app. The game registry must be initialized first,
+    the stream drops the channels of the games it removes or spills.
+    """
+    stream = StateStream(app.config["STATE_STREAM_HISTORY"])
+    registry = app.extensions[GAME_REGISTRY]
+    registry.removal_listeners.append(stream.close)
+    registry.eviction_listeners.append(stream.close)
+    app.extensions[EXTENSION_NAME] = stream
+    return stream
+
+
+def get_state_stream() -> StateStream:
+    return current_app.extensions[EXTENSION_NAME]
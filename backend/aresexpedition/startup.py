@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+# Identifies a version of a config file: its resolved path, modification time in nanoseconds and size
+FileKey = tuple[str, int, int]
+
+# In the instance folder of the app, which logging gets configured before it exists
+CACHE_DIRECTORY: Path = Path(__file__).resolve().parents[1].joinpath("instance", "config-cache")
+
+
+class StartupTimer:
+    """
+    Measures the stages of the app startup, so a slow start can be traced to its cause.
+    """
+    def __init__(self):
+        self.stages: dict[str, float] = dict[str, float]()
+        self._start = self._last = time.perf_counter()
+
+    def stage(self, name: str) -> None:
+        """
+        Ends the current stage, which started when the previous one ended.
+
+        :param name: Name of the stage that just ended
+        """
+        now = time.perf_counter()
+        self.stages[name] = (now - self._last) * 1000
+        self._last = now
+
+    @property
+    def total(self) -> float:
+        return (self._last - self._start) * 1000
+
+    def summary(self) -> str:
+        stages = ", ".join(f"{name} {ms:.1f} ms" for name, ms in self.stages.items())
+        return f"{self.total:.1f} ms ({stages})"
+
+
+def private_directory(path: Path) -> Path:
+    """
+    Creates the directory accessible to the current user only, or makes an existing one so.
+    Meant for directories whose files get loaded back without further checks.
+
+    :param path: Directory to create
+    :return: The directory
+    :raises PermissionError: if the directory belongs to another user
+    """
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    stat = path.stat()
+    # Ownership and modes don't protect anything on Windows, there's no getuid there
+    if hasattr(os, "getuid"):
+        if stat.st_uid != os.getuid():
+            raise PermissionError(f"Directory {path} belongs to another user.")
+        if stat.st_mode & 0o077:
+            path.chmod(0o700)
+    return path
+
+
+def file_key(path: Path) -> FileKey:
+    """
+    :raises FileNotFoundError: if the file doesn't exist
+    """
+    stat = path.stat()
+    return str(path.resolve()), stat.st_mtime_ns, stat.st_size
+
+
+def load_yaml_config(path: Path, key: Optional[FileKey] = None) -> dict:
+    """
+    Loads a YAML config file through a JSON cache in the private config-cache directory of the instance folder.
+    The cache entry is used for as long as the file keeps its content, checked by its SHA-256 digest,
+    so workers starting after the first one don't need to import and run the YAML parser at all.
+    The cache directory is created accessible to the current user only, since the cached config is applied as is.
+
+    :param path: YAML file to load
+    :param key: Key of the file, if already known
+    :return: Parsed config
+    :raises FileNotFoundError: if the file doesn't exist
+    """
+    key = key or file_key(path)
+    content = path.read_bytes()
+    digest = hashlib.sha256(content).hexdigest()
+    cache_file = CACHE_DIRECTORY.joinpath(hashlib.sha1(key[0].encode()).hexdigest() + ".json")
+    try:
+        # Checked before reading, so a cache directory others can write to is never trusted
+        private_directory(CACHE_DIRECTORY)
+        with open(cache_file, "r") as f:
+            cached = json.load(f)
+        if cached["sha256"] == digest:
+            return cached["config"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    # Imported only on a cache miss, it's one of the slowest imports of the app
+    import yaml
+    config = yaml.safe_load(content)
+    try:
+        partial_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(partial_file, "w") as f:
+            json.dump({"sha256": digest, "config": config}, f)
+        os.replace(partial_file, cache_file)
+    except (OSError, TypeError, ValueError):
+        # Configs that can't be stored as JSON, or an unwritable cache, only cost the parsing next time
+        pass
+    return config
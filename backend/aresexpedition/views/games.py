@@ -0,0 +1,188 @@
+from typing import Iterator, Optional
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+
+from ..models import GameException
+from ..services.game_registry import GameNotFoundException, get_game_registry
+from ..services.game_store import record_moves
+from ..services.move_schedulers import get_move_schedulers
+from ..services.projections import get_projections
+from ..services.seats import PlayerNotAuthorizedException, SeatTakenException, get_seats, parse_token
+from ..services.state_stream import diff_state, encode_poll_response, format_stream_cursor, get_state_stream, \
+    parse_stream_cursor, publish_game, watch_game
+
+# Response headers of the streamed and long-polled responses, which must reach the client unbuffered and uncached
+STREAM_HEADERS: dict[str, str] = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+games = Blueprint('games', __name__, url_prefix="/games")
+
+
+@games.errorhandler(GameNotFoundException)
+def game_not_found(error: GameNotFoundException):
+    return jsonify(error=str(error)), 404
+
+
+@games.errorhandler(PlayerNotAuthorizedException)
+def player_not_authorized(error: PlayerNotAuthorizedException):
+    return jsonify(error=str(error)), 403
+
+
+@games.errorhandler(SeatTakenException)
+def seat_taken(error: SeatTakenException):
+    return jsonify(error=str(error)), 409
+
+
+def authorize_player(game_id: str, player: Optional[str]) -> None:
+    """
+    Checks that the request carries the seat token of the player it acts as. Spectators need no token.
+
+    :raises PlayerNotAuthorizedException: if it doesn't
+    """
+    if player is not None:
+        get_seats().authorize(game_id, player, parse_token(request.headers.get("Authorization"),
+                                                           request.args.get("token")))
+
+
+@games.route("/<game_id>/seats", methods=["POST"])
+def take_seat(game_id: str):
+    """
+    Takes the seat of a player, given as {"player": "Mars"}, and returns the token of the seat. The token
+    has to be sent along, as a bearer token in the Authorization header or in the token query parameter,
+    with the moves of the player and with the requests for the private state of the player.
+    Every seat can be taken only once.
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or not isinstance(body.get("player"), str):
+        return jsonify(error="Request body must be a JSON object with the player."), 400
+    player = body["player"]
+    with get_game_registry().checkout(game_id) as game:
+        try:
+            game.get_player(player)
+        except GameException as e:
+            return jsonify(error=str(e)), 404
+        return jsonify(player=player, token=get_seats().take(game_id, player))
+
+
+@games.route("/<game_id>/state")
+def state(game_id: str):
+    """
+    Returns the game as seen by the player given in the player query parameter: the public state,
+    and the private state of the player, which requires the seat token of the player.
+    Spectators, who don't give any player, get the public state only.
+    """
+    player = request.args.get("player")
+    authorize_player(game_id, player)
+    with get_game_registry().checkout(game_id) as game:
+        try:
+            view = get_projections().view_json(game_id, game, player)
+        except GameException as e:
+            return jsonify(error=str(e)), 404
+        return Response(view, mimetype="application/json")
+
+
+@games.route("/<game_id>/moves", methods=["POST"])
+def move(game_id: str):
+    """
+    Applies a move of a player. The body is a JSON object with the player name and the move,
+    i.e. {"player": "Mars", "move": {"action": "PlayGreenCard", "cards": [12]}}.
+    The request must carry the seat token of the player. Moves other players submit at the same time
+    are resolved along with it, in player order.
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or not isinstance(body.get("player"), str) \
+            or not isinstance(body.get("move"), dict):
+        return jsonify(error="Request body must be a JSON object with the player and the move."), 400
+    authorize_player(game_id, body["player"])
+    try:
+        version = get_move_schedulers().submit(game_id, body["player"], body["move"])
+    except GameException as e:
+        return jsonify(error=str(e)), 400
+    return jsonify(version=version)
+
+
+@games.route("/<game_id>/moves/batch", methods=["POST"])
+def move_batch(game_id: str):
+    """
+    Applies a list of moves of a player in order, all or none of them, i.e. all the moves of a player's turn.
+    The body is a JSON object with the player name and the moves,
+    i.e. {"player": "Mars", "moves": [{"action": "PlayRedOrBlueCard", "cards": [3]}, {"action": "SellProjectCards",
+    "cards": [5, 8]}]}. The request must carry the seat token of the player. If any of the moves is not allowed,
+    the game is left as it was. Otherwise the response has the changes of the public state and of the player's
+    private state made by all the moves together, as JSON Merge Patches.
+    """
+    body = request.get_json(silent=True)
+    limit = current_app.config["MOVE_BATCH_LIMIT"]
+    if not isinstance(body, dict) or not isinstance(body.get("player"), str) \
+            or not isinstance(body.get("moves"), list) or not all(isinstance(m, dict) for m in body["moves"]):
+        return jsonify(error="Request body must be a JSON object with the player and the list of moves."), 400
+    if not 0 < len(body["moves"]) <= limit:
+        return jsonify(error=f"A batch must have 1 to {limit} moves."), 400
+    player = body["player"]
+    authorize_player(game_id, player)
+    projections = get_projections()
+    with get_game_registry().checkout(game_id) as game:
+        try:
+            public = projections.public(game_id, game).data
+            private = projections.private(game_id, game, player).data
+            game.apply_dicts(player, body["moves"])
+        except GameException as e:
+            return jsonify(error=str(e)), 400
+        record_moves(game_id, game, [(player, m) for m in body["moves"]])
+        publish_game(game_id, game)
+        return jsonify(version=game.version,
+                       delta=diff_state(public, projections.public(game_id, game).data),
+                       private_delta=diff_state(private, projections.private(game_id, game, player).data))
+
+
+@games.route("/<game_id>/events")
+def events(game_id: str):
+    """
+    Streams the game state as server-sent events. The first event carries the full state, every following one
+    only the fields changed since the previous event, as a JSON Merge Patch. The public state comes in state
+    and delta events. If the player query parameter is given, the private state of the player comes along
+    in private_state and private_delta events, given the seat token of the player. Reconnecting clients
+    resume from the Last-Event-ID header, or from the since query parameter.
+    """
+    player = request.args.get("player")
+    authorize_player(game_id, player)
+    try:
+        watch_game(game_id, player)
+    except GameException as e:
+        return jsonify(error=str(e)), 404
+    stream = get_state_stream()
+    since = parse_stream_cursor(request.headers.get("Last-Event-ID", request.args.get("since")), player)
+    keepalive = current_app.config["STATE_STREAM_KEEPALIVE"]
+
+    def generate() -> Iterator[str]:
+        while True:
+            state_events = stream.wait(game_id, since, timeout=keepalive)
+            if not state_events:
+                # Comment lines keep the connection open through proxies, and detect disconnected clients
+                yield ": keepalive\n\n"
+                continue
+            for event in state_events:
+                since[event.player] = event.version
+                yield event.to_sse(format_stream_cursor(since, player))
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers=STREAM_HEADERS)
+
+
+@games.route("/<game_id>/poll")
+def poll(game_id: str):
+    """
+    Long-polling alternative to the event stream: waits until the game state moves past the since cursor,
+    and returns the same events the stream would send, together with the cursor to poll with next.
+    An empty list of events means the poll timed out.
+    """
+    player = request.args.get("player")
+    authorize_player(game_id, player)
+    try:
+        watch_game(game_id, player)
+    except GameException as e:
+        return jsonify(error=str(e)), 404
+    since = parse_stream_cursor(request.args.get("since"), player)
+    state_events = get_state_stream().wait(game_id, since, timeout=current_app.config["STATE_POLL_TIMEOUT"])
+    for event in state_events:
+        since[event.player] = event.version
+    return Response(encode_poll_response(state_events, format_stream_cursor(since, player)),
+                    mimetype="application/json", headers=STREAM_HEADERS)
@@ -0,0 +1,13 @@
+from flask import Blueprint, Response
+
+from ..models.instrumentation import REGISTRY
+
+metrics = Blueprint('metrics', __name__)
+
+
+@metrics.route("/metrics")
+def scrape():
+    """
+    Exposes the counters and histograms of the rules engine and of the request handling to Prometheus.
+    """
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
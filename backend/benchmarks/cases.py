@@ -0,0 +1,112 @@
+import os
+import random
+import sys
+from typing import Callable
+
+# The rules engine modules import each other by their bare names
+MODELS_DIRECTORY: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                     "aresexpedition", "models")
+if MODELS_DIRECTORY not in sys.path:
+    sys.path.insert(0, MODELS_DIRECTORY)
+
+# A case prepares its state and returns the operation to time, called over and over on the same state
+Case = Callable[[], Callable[[], None]]
+
+CASES: dict[str, Case] = dict[str, Case]()
+
+
+def benchmark(name: str) -> Callable[[Case], Case]:
+    def register(case: Case) -> Case:
+        CASES[name] = case
+        return case
+    return register
+
+
+@benchmark("turn_manager.next_turn")
+def next_turn() -> Callable[[], None]:
+    from enums import Phase, RoundStep
+    from game import TurnManager
+
+    manager = TurnManager()
+    manager.next_turn()
+
+    def operation() -> None:
+        if manager.turn.step == RoundStep.Planning:
+            manager.set_phases(list(Phase))
+        manager.next_turn()
+    return operation
+
+
+@benchmark("deck.draw")
+def draw() -> Callable[[], None]:
+    from deck import Deck
+
+    # Cards go straight back to the discard pile, so the deck reshuffles it once every 100 draws
+    deck = Deck(list(range(200)), random.Random(0))
+    return lambda: deck.discard(deck.draw(2))
+
+
+@benchmark("deck.restore_discard_pile")
+def restore_discard_pile() -> Callable[[], None]:
+    from deck import Deck
+
+    # Every draw finds the deck empty and the whole deck in the discard pile
+    deck = Deck(list(range(200)), random.Random(0))
+    return lambda: deck.discard(deck.draw(200))
+
+
+def _started_game():
+    from enums import PlayerColor
+    from game import Game
+    from player import Player
+
+    players = [Player(name=f"Player {i + 1}", color=color) for i, color in zip(range(2), PlayerColor)]
+    game = Game(players, banned_corporations=[], banned_projects=[], seed=0)
+    game.start()
+    return game
+
+
+@benchmark("player.get_available_actions")
+def get_available_actions() -> Callable[[], None]:
+    from enums import PlayerStateChange
+
+    player = _started_game().players[0]
+
+    def operation() -> None:
+        player.invalidate_actions(PlayerStateChange.All)
+        player.get_available_actions()
+    return operation
+
+
+@benchmark("player.get_available_actions.cached")
+def get_cached_available_actions() -> Callable[[], None]:
+    player = _started_game().players[0]
+    return player.get_available_actions
+
+
+@benchmark("global_requirements.increase_parameter")
+def increase_parameter() -> Callable[[], None]:
+    from enums import Phase, RoundStep
+    from game import Turn
+    from global_requirements import GlobalRequirements, Temperature
+
+    requirements = GlobalRequirements(random.Random(0))
+    initial = requirements.snapshot()
+    temperature = requirements.get_parameter(Temperature)
+    turn = Turn(1, Phase.Action, RoundStep.ResolvePhases)
+
+    def operation() -> None:
+        if temperature.is_maxed():
+            requirements.restore(initial)
+        requirements.increase_parameter(Temperature, turn)
+    return operation
+
+
+@benchmark("simulation.play_game")
+def play_game() -> Callable[[], None]:
+    from simulation import RandomPolicy, SimulationTask, Simulator, play_game as play
+
+    task = SimulationTask(game_id=0, seed=0, player_count=2, policy_type=RandomPolicy,
+                          max_rounds=Simulator.DEFAULT_MAX_ROUNDS,
+                          max_moves_per_turn=Simulator.DEFAULT_MAX_MOVES_PER_TURN)
+    return lambda: play(task)
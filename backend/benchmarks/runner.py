@@ -0,0 +1,129 @@
+"""
+Times the hot paths of the rules engine and compares them against a baseline from an earlier run.
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --baseline results.json
+
+Results are stored as JSON, keyed by benchmark name, with the times of a single operation in nanoseconds.
+When a baseline is given, any benchmark slower than the baseline by more than the tolerance is reported
+as a regression and the runner exits with status 1.
+"""
+import argparse
+import fnmatch
+import json
+import platform
+import statistics
+import time
+import timeit
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from .cases import CASES
+
+FORMAT_VERSION: int = 1
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    # Operations per timed run, picked so that a run takes at least 0.2 seconds
+    number: int
+    # Time of a single operation in the fastest and in the median run, in nanoseconds
+    best: float
+    median: float
+
+
+@dataclass
+class Regression:
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def slowdown(self) -> float:
+        return self.current / self.baseline - 1
+
+
+def measure(name: str, repeat: int = 5) -> BenchmarkResult:
+    """
+    :param name: Name of the benchmark, one of CASES
+    :param repeat: Number of timed runs
+    :return: Timings of the benchmark
+    """
+    timer = timeit.Timer(CASES[name]())
+    number, _ = timer.autorange()
+    runs = [t / number * 1e9 for t in timer.repeat(repeat, number)]
+    return BenchmarkResult(name, number, min(runs), statistics.median(runs))
+
+
+def compare(results: list[BenchmarkResult], baseline: dict, tolerance: float) -> list[Regression]:
+    """
+    Compares the fastest runs, which are the least affected by noise from the rest of the machine.
+    Benchmarks missing from the baseline are skipped.
+
+    :param results: Current results
+    :param baseline: Results loaded from an earlier run
+    :param tolerance: Allowed slowdown, i.e. 0.25 for 25%
+    :return: Benchmarks slower than their baseline by more than the tolerance
+    """
+    regressions = list[Regression]()
+    for result in results:
+        previous = baseline["results"].get(result.name)
+        if previous is not None and result.best > previous["best"] * (1 + tolerance):
+            regressions.append(Regression(result.name, previous["best"], result.best))
+    return regressions
+
+
+def to_json(results: list[BenchmarkResult]) -> dict:
+    return {"format": FORMAT_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": {r.name: asdict(r) for r in results}}
+
+
+def _format_time(ns: float) -> str:
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.2f} {unit}"
+    return f"{ns:.0f} ns"
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", "--select", default="*", help="Glob pattern of the benchmarks to run")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs per benchmark")
+    parser.add_argument("--output", help="File to write the results to")
+    parser.add_argument("--baseline", help="Results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("format") != FORMAT_VERSION:
+            parser.error(f"Unsupported baseline format {baseline.get('format')}.")
+    names = [n for n in CASES if fnmatch.fnmatchcase(n, args.select)]
+    if not names:
+        parser.error(f"No benchmark matches {args.select}.")
+
+    results = list[BenchmarkResult]()
+    for name in names:
+        result = measure(name, args.repeat)
+        results.append(result)
+        line = f"{name:<45} {_format_time(result.best):>10} {_format_time(result.median):>10}"
+        if baseline is not None and name in baseline["results"]:
+            line += f" {result.best / baseline['results'][name]['best'] - 1:>+8.1%}"
+        print(line, flush=True)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(to_json(results), f, indent=2)
+    if baseline is None:
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression.name}: {_format_time(regression.baseline)} -> "
+              f"{_format_time(regression.current)} ({regression.slowdown:+.1%})")
+    return 1 if regressions else 0
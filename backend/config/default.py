@@ -1 +1,38 @@
 DEBUG = False
+
+# Live games kept in memory, the least recently used ones are spilled to disk beyond this number
+GAME_REGISTRY_CAPACITY = 2048
+# Independently locked parts of the game registry
+GAME_REGISTRY_SHARDS = 64
+# Directory for the spilled games, defaults to the games directory in the instance folder.
+# Spilled games are unpickled, so it must not be writable by anyone but the user running the server
+GAME_REGISTRY_SPILL_DIRECTORY = None
+
+# Store the games in an SQLite database, so they survive a restart of the server
+GAME_STORE_ENABLED = True
+# Directory of the database, defaults to the store directory in the instance folder.
+# Stored games are unpickled, so it must not be writable by anyone but the user running the server
+GAME_STORE_DIRECTORY = None
+# Seconds the moves are collected for before being committed together, a crash loses at most this much play
+GAME_STORE_DURABILITY_WINDOW = 0.2
+# Moves of a game between two stored snapshots of its state, the moves since the last one are replayed on load
+GAME_STORE_CHECKPOINT_INTERVAL = 32
+
+# Number of recent state deltas kept per game, for streaming clients that fall behind
+STATE_STREAM_HISTORY = 64
+# Seconds between keepalive messages on idle state streams
+STATE_STREAM_KEEPALIVE = 15
+# Seconds a long-polling request waits for the game state to change
+STATE_POLL_TIMEOUT = 30
+
+# Most moves a player can submit in a single batch
+MOVE_BATCH_LIMIT = 64
+
+# Number of games to keep the cached per-player state projections of
+PROJECTION_CACHE_CAPACITY = 2048
+
+# Threads running the game logic and the other blocking work when served through the ASGI adapter
+ASGI_EXECUTOR_WORKERS = 32
+
+# Record request metrics and expose all metrics on the /metrics endpoint, in the Prometheus text format
+METRICS_ENABLED = True
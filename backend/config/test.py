@@ -1,2 +1,3 @@
 TESTING = True
 DEBUG = True
+GAME_STORE_ENABLED = False
@@ -0,0 +1,80 @@
+import asyncio
+import json
+from typing import Optional
+
+import pytest
+from flask import Flask
+from aresexpedition import create_app
+from aresexpedition.asgi import AsgiAdapter
+from aresexpedition.services.game_registry import get_game_registry
+from test_games import FakeGame
+
+
+@pytest.fixture
+def app() -> Flask:
+    return create_app(test=True)
+
+
+@pytest.fixture
+def game_id(app: Flask) -> str:
+    with app.app_context():
+        return get_game_registry().add(FakeGame())
+
+
+async def request(adapter: AsgiAdapter, method: str, path: str, query: str = "",
+                  body: Optional[dict] = None, token: Optional[str] = None) -> tuple[int, bytes]:
+    headers = [(b"content-type", b"application/json")] if body is not None else []
+    if token is not None:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    scope = {"type": "http", "method": method, "path": path, "query_string": query.encode(), "headers": headers}
+    messages = [{"type": "http.request", "body": json.dumps(body).encode() if body is not None else b""}]
+    sent = list()
+
+    async def receive() -> dict:
+        return messages.pop(0) if messages else await asyncio.Future()
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    await adapter(scope, receive, send)
+    return sent[0]["status"], b"".join(m.get("body", b"") for m in sent[1:])
+
+
+def test_other_endpoints_are_served_by_flask(app: Flask):
+    status, body = asyncio.run(request(AsgiAdapter(app), "GET", "/"))
+    assert status == 200
+    assert b'Terraforming Mars: Ares Expedition' in body.title()
+
+
+def test_poll_waits_for_the_next_move(app: Flask, game_id: str):
+    async def scenario() -> tuple[int, bytes]:
+        adapter = AsgiAdapter(app)
+        poll = asyncio.ensure_future(request(adapter, "GET", f"/games/{game_id}/poll", "since=0"))
+        await asyncio.sleep(0.1)
+        assert not poll.done()
+        _, seat = await request(adapter, "POST", f"/games/{game_id}/seats", body={"player": "Mars"})
+        status, _ = await request(adapter, "POST", f"/games/{game_id}/moves",
+                                  body={"player": "Mars", "move": {"action": "RaiseTemperature"}},
+                                  token=json.loads(seat)["token"])
+        assert status == 200
+        return await asyncio.wait_for(poll, 5)
+
+    status, body = asyncio.run(scenario())
+    assert status == 200
+    assert json.loads(body) == {"cursor": "1", "events": [{"event": "delta", "data": {"version": 1, "heat": 1}}]}
+
+
+def test_private_state_requires_the_seat_token(app: Flask, game_id: str):
+    adapter = AsgiAdapter(app)
+    status, _ = asyncio.run(request(adapter, "GET", f"/games/{game_id}/poll", "player=Mars&since=0.0"))
+    assert status == 403
+    _, seat = asyncio.run(request(adapter, "POST", f"/games/{game_id}/seats", body={"player": "Mars"}))
+    status, body = asyncio.run(request(adapter, "GET", f"/games/{game_id}/poll", "player=Mars&since=0.-1",
+                                       token=json.loads(seat)["token"]))
+    assert status == 200
+    assert json.loads(body)["events"][0]["event"] == "private_state"
+
+
+def test_unknown_game(app: Flask):
+    status, _ = asyncio.run(request(AsgiAdapter(app), "GET", "/games/nope/poll"))
+    assert status == 404
@@ -0,0 +1,197 @@
+import copy
+import json
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from aresexpedition import create_app
+from aresexpedition.models import GameException
+from aresexpedition.services.game_registry import get_game_registry
+
+
+class FakePlayer:
+    def __init__(self, name: str):
+        self.name = name
+        self.private_version = 0
+        self.project_cards = [1, 2, 3]
+
+    def to_private_dict(self) -> dict:
+        return {"project_cards": list(self.project_cards)}
+
+
+class FakeGame:
+    """
+    Stands in for the rules engine, providing the interface the game views rely on.
+    """
+    def __init__(self):
+        self.version = 0
+        self.heat = 0
+        self.players = [FakePlayer("Mars"), FakePlayer("Venus")]
+
+    def get_player(self, name: str) -> FakePlayer:
+        player = next((p for p in self.players if p.name == name), None)
+        if player is None:
+            raise GameException(f"Player {name} is not part of this game.")
+        return player
+
+    def apply_dict(self, player_name: str, move: dict) -> None:
+        player = self.get_player(player_name)
+        if move.get("action") == "RaiseTemperature":
+            self.heat += 1
+        elif move.get("action") == "SellProjectCards":
+            player.project_cards = [c for c in player.project_cards if c not in move["cards"]]
+            player.private_version += 1
+        else:
+            raise GameException(f"Cannot perform action {move.get('action')}.")
+        self.version += 1
+
+    def apply_dicts(self, player_name: str, moves: list[dict]) -> None:
+        state = copy.deepcopy(self.__dict__)
+        try:
+            for move in moves:
+                self.apply_dict(player_name, move)
+        except GameException:
+            self.__dict__ = state
+            raise
+
+    def to_dict(self) -> dict:
+        return {"version": self.version, "heat": self.heat,
+                "players": {p.name: {"hand_size": len(p.project_cards)} for p in self.players}}
+
+
+@pytest.fixture
+def app() -> Flask:
+    return create_app(test=True)
+
+
+@pytest.fixture
+def game_id(app: Flask) -> str:
+    with app.app_context():
+        return get_game_registry().add(FakeGame())
+
+
+def take_seat(client: FlaskClient, game_id: str, player: str) -> dict[str, str]:
+    token = client.post(f'/games/{game_id}/seats', json={"player": player}).json["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_unknown_game(app: Flask):
+    assert app.test_client().get('/games/nope/state').status_code == 404
+
+
+def test_players_see_only_their_own_hand(app: Flask, game_id: str):
+    client: FlaskClient = app.test_client()
+    mars = take_seat(client, game_id, "Mars")
+    assert client.get(f'/games/{game_id}/state?player=Mars', headers=mars).json["private"] == \
+        {"project_cards": [1, 2, 3]}
+    assert client.get(f'/games/{game_id}/state').json["private"] is None
+    assert client.get(f'/games/{game_id}/state?player=Venus', headers=mars).status_code == 403
+    assert client.get(f'/games/{game_id}/state?player=Venus').status_code == 403
+
+
+def test_seats_are_taken_once(app: Flask, game_id: str):
+    client: FlaskClient = app.test_client()
+    token = client.post(f'/games/{game_id}/seats', json={"player": "Mars"}).json["token"]
+    assert client.post(f'/games/{game_id}/seats', json={"player": "Mars"}).status_code == 409
+    assert client.post(f'/games/{game_id}/seats', json={"player": "Jupiter"}).status_code == 404
+    assert client.get(f'/games/{game_id}/state?player=Mars&token={token}').status_code == 200
+    assert client.get(f'/games/{game_id}/state?player=Mars&token=guess').status_code == 403
+    assert client.post(f'/games/{game_id}/moves', json={"player": "Mars", "move": {"action": "RaiseTemperature"}}) \
+        .status_code == 403
+
+
+def test_moves_are_streamed_as_deltas(app: Flask, game_id: str):
+    client: FlaskClient = app.test_client()
+    mars = take_seat(client, game_id, "Mars")
+    assert client.post(f'/games/{game_id}/moves', json={"player": "Mars", "move": {"action": "Research"}},
+                       headers=mars).status_code == 400
+    res = client.post(f'/games/{game_id}/moves', json={"player": "Mars", "move": {"action": "RaiseTemperature"}},
+                      headers=mars)
+    assert res.json == {"version": 1}
+    stream = client.get(f'/games/{game_id}/events?since=0').response
+    assert next(stream) == b'id: 1\nevent: state\n' \
+                           b'data: {"version": 1, "heat": 1, "players": {"Mars": {"hand_size": 3}, ' \
+                           b'"Venus": {"hand_size": 3}}}\n\n'
+    client.post(f'/games/{game_id}/moves', json={"player": "Mars", "move": {"action": "RaiseTemperature"}},
+                headers=mars)
+    assert next(stream) == b'id: 2\nevent: delta\ndata: {"version": 2, "heat": 2}\n\n'
+
+
+def test_private_state_is_streamed_to_the_player(app: Flask, game_id: str):
+    client: FlaskClient = app.test_client()
+    venus = take_seat(client, game_id, "Venus")
+    stream = client.get(f'/games/{game_id}/events?player=Venus', headers=venus).response
+    assert next(stream).startswith(b'id: 0.-1\nevent: state\n')
+    assert next(stream).startswith(b'id: 0.0\nevent: private_state\n')
+    client.post(f'/games/{game_id}/moves', json={"player": "Venus", "move": {"action": "SellProjectCards",
+                                                                             "cards": [2]}}, headers=venus)
+    events = [next(stream).decode().split("\n") for _ in range(2)]
+    assert [e[:2] for e in events] == [["id: 1.0", "event: delta"], ["id: 1.1", "event: private_delta"]]
+    assert json.loads(events[1][2][len("data: "):]) == {"project_cards": [1, 3]}
+
+
+def test_removed_games_are_forgotten(app: Flask, game_id: str):
+    client: FlaskClient = app.test_client()
+    mars = take_seat(client, game_id, "Mars")
+    client.get(f'/games/{game_id}/state?player=Mars', headers=mars)
+    client.post(f'/games/{game_id}/moves', json={"player": "Mars", "move": {"action": "RaiseTemperature"}},
+                headers=mars)
+    with app.app_context():
+        get_game_registry().remove(game_id)
+    assert game_id not in app.extensions["projections"]._games
+    assert game_id not in app.extensions["state_stream"]._channels
+    assert game_id not in app.extensions["seats"]._seats
+    assert game_id not in app.extensions["move_schedulers"]._schedulers
+
+
+def test_move_batches_are_applied_together(app: Flask, game_id: str):
+    client: FlaskClient = app.test_client()
+    mars = take_seat(client, game_id, "Mars")
+    res = client.post(f'/games/{game_id}/moves/batch', headers=mars,
+                      json={"player": "Mars", "moves": [{"action": "RaiseTemperature"},
+                                                        {"action": "SellProjectCards", "cards": [1, 3]},
+                                                        {"action": "RaiseTemperature"}]})
+    assert res.json == {"version": 3,
+                        "delta": {"version": 3, "heat": 2, "players": {"Mars": {"hand_size": 1}}},
+                        "private_delta": {"project_cards": [2]}}
+
+
+def test_move_batches_are_all_or_nothing(app: Flask, game_id: str):
+    client: FlaskClient = app.test_client()
+    mars = take_seat(client, game_id, "Mars")
+    moves = [{"action": "RaiseTemperature"}, {"action": "Research"}]
+    assert client.post(f'/games/{game_id}/moves/batch', json={"player": "Mars", "moves": moves},
+                       headers=mars).status_code == 400
+    assert client.post(f'/games/{game_id}/moves/batch', json={"player": "Mars", "moves": moves[:1]}).status_code == 403
+    assert client.post(f'/games/{game_id}/moves/batch', json={"player": "Mars", "moves": []},
+                       headers=mars).status_code == 400
+    assert client.get(f'/games/{game_id}/state').json["public"] == \
+        {"version": 0, "heat": 0, "players": {"Mars": {"hand_size": 3}, "Venus": {"hand_size": 3}}}
+
+
+def test_failed_batches_leave_the_engine_game_untouched(app: Flask):
+    from enums import PlayerColor
+    from game import Game
+    from player import Player
+
+    game = Game([Player(name=name, color=color) for name, color in zip(["Mars", "Venus"], PlayerColor)],
+                banned_corporations=[], banned_projects=[], seed=0)
+    game.start()
+    hand, private_version = list(game.get_player("Mars").project_cards), game.get_player("Mars").private_version
+    with app.app_context():
+        game_id = get_game_registry().add(game)
+    client: FlaskClient = app.test_client()
+    mars = take_seat(client, game_id, "Mars")
+    before = client.get(f'/games/{game_id}/state?player=Mars', headers=mars).json
+    # The redraw is allowed at the start of the game, producing isn't, so the redraw must be undone
+    res = client.post(f'/games/{game_id}/moves/batch', headers=mars,
+                      json={"player": "Mars", "moves": [{"action": "RedrawProjectCards"}, {"action": "Produce"}]})
+    assert res.status_code == 400 and "error" in res.json
+    assert client.get(f'/games/{game_id}/state?player=Mars', headers=mars).json == before
+    with app.app_context(), get_game_registry().checkout(game_id) as checked_out:
+        assert checked_out.version == 0
+        assert checked_out.get_player("Mars").project_cards == hand
+        assert checked_out.get_player("Mars").private_version == private_version
+    res = client.post(f'/games/{game_id}/moves/batch', headers=mars,
+                      json={"player": "Mars", "moves": [{"action": "RedrawProjectCards"}]})
+    assert res.status_code == 200 and res.json["version"] == 1
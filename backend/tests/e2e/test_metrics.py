@@ -0,0 +1,14 @@
+from flask.testing import FlaskClient
+from aresexpedition import create_app
+
+
+def test_requests_are_counted():
+    client: FlaskClient = create_app(test=True).test_client()
+    client.get('/')
+    res = client.get('/metrics')
+    assert res.status_code == 200
+    assert res.mimetype == "text/plain"
+    lines = res.data.decode().splitlines()
+    assert "# TYPE ares_http_request_seconds histogram" in lines
+    assert any(line.startswith('ares_http_requests_total{method="GET",endpoint="homepage.home",status="200"} ')
+               for line in lines)
@@ -0,0 +1,21 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The rules engine modules import each other by their bare names
+MODELS_DIRECTORY = Path(__file__).resolve().parents[3].joinpath("aresexpedition", "models")
+if str(MODELS_DIRECTORY) not in sys.path:
+    sys.path.insert(0, str(MODELS_DIRECTORY))
+
+
+@pytest.fixture
+def game():
+    from enums import PlayerColor
+    from game import Game
+    from player import Player
+
+    players = [Player(name=f"Player {i + 1}", color=color) for i, color in zip(range(2), PlayerColor)]
+    game = Game(players, banned_corporations=[], banned_projects=[], seed=0)
+    game.start()
+    return game
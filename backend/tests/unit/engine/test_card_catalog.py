@@ -0,0 +1,72 @@
+import pytest
+
+from card_catalog import CardCatalog, ProjectCatalog, CorporationCatalog, tag_bit, tag_mask
+from card_definitions import compile_definitions
+from enums import Tag
+from exceptions import GameException
+
+DEFINITIONS = {
+    "projects": [{"name": "Lichen", "color": "Green", "cost": 7, "tags": ["Plant", "Plant"]},
+                 {"name": "Steelworks", "color": "Blue", "cost": 15, "tags": ["Building"]},
+                 {"name": "Comet", "color": "Red", "cost": 21, "tags": ["Space", "Event"]},
+                 {"name": "Ice Cap", "color": "Red", "cost": 9}],
+    "corporations": [{"name": "Ecoline", "megacredits": 36, "tags": ["Plant"]}],
+}
+
+
+@pytest.fixture
+def catalog() -> ProjectCatalog:
+    return ProjectCatalog(compile_definitions(DEFINITIONS))
+
+
+def test_ids_follow_the_definitions(catalog: ProjectCatalog):
+    assert len(catalog) == 4
+    assert [catalog.id_by_name(name) for name in ("Lichen", "Steelworks", "Comet", "Ice Cap")] == [0, 1, 2, 3]
+    # IDs only depend on the definitions, so another compilation gives the same ones
+    recompiled = ProjectCatalog(compile_definitions(DEFINITIONS))
+    assert recompiled.id_by_name("Comet") == 2 and recompiled.id_of(catalog[2]) == 2
+    assert catalog[2].card_id == 2 and catalog[2].name == "Comet"
+    with pytest.raises(GameException):
+        catalog.id_by_name("Moon")
+
+
+def test_ids_excluding(catalog: ProjectCatalog):
+    assert catalog.ids_excluding([]) == [0, 1, 2, 3]
+    assert catalog.ids_excluding([2, 0]) == [1, 3]
+    assert catalog.ids_excluding(range(4)) == []
+
+
+def test_tag_masks(catalog: ProjectCatalog):
+    assert tag_bit(Tag.Science) == 1 and tag_bit(Tag.Plant) == 1 << 6
+    assert tag_mask([Tag.Space, Tag.Event, Tag.Space]) == tag_bit(Tag.Space) | tag_bit(Tag.Event)
+    # A tag printed twice sets its bit once
+    assert catalog.tag_masks.tolist() == [tag_bit(Tag.Plant), tag_bit(Tag.Building),
+                                          tag_bit(Tag.Space) | tag_bit(Tag.Event), 0]
+    assert catalog.has_tag(2, Tag.Event) and not catalog.has_tag(2, Tag.Plant)
+
+
+def test_with_tags_keeps_the_order(catalog: ProjectCatalog):
+    assert catalog.with_tags([3, 2, 1, 0], [Tag.Plant, Tag.Space]) == [2, 0]
+    assert catalog.with_tags([1, 1], [Tag.Building]) == [1, 1]
+    assert catalog.with_tags([0, 1, 2, 3], [Tag.Animal]) == []
+    assert catalog.with_tags([], [Tag.Plant]) == []
+
+
+def test_count_tags(catalog: ProjectCatalog):
+    assert catalog.count_tags([0], Tag.Plant) == 2
+    assert catalog.count_tags([0, 1, 2, 3, 0], Tag.Plant) == 4
+    assert catalog.count_tags([1, 2], Tag.Plant) == 0
+    assert catalog.count_tags([], Tag.Plant) == 0
+    assert catalog[0].tags == [Tag.Plant, Tag.Plant]
+
+
+def test_corporation_catalog():
+    catalog = CorporationCatalog(compile_definitions(DEFINITIONS))
+    assert len(catalog) == 1
+    assert catalog.count_tags([0], Tag.Plant) == 1
+    assert catalog[0].name == "Ecoline"
+
+
+def test_card_catalog_is_abstract():
+    with pytest.raises(TypeError):
+        CardCatalog(compile_definitions(DEFINITIONS), "projects_")
@@ -0,0 +1,116 @@
+import os
+
+import pytest
+
+import card_definitions
+from card_catalog import ProjectCatalog, PROJECT_CATALOG
+from card_definitions import load_card_arrays, compile_definitions, DEFINITIONS_FILE
+from enums import CardColor, Tag, Phase
+from exceptions import GameException
+from global_requirements import Oxygen
+
+DEFINITIONS = """
+projects:
+  - name: Lichen
+    color: Green
+    cost: 7
+    tags: [Plant, Plant]
+    requirements: {Oxygen: {min: 3}}
+"""
+
+
+@pytest.fixture
+def definitions(tmp_path):
+    path = tmp_path / "cards.yaml"
+    path.write_text(DEFINITIONS)
+    return path
+
+
+@pytest.fixture
+def compilations(monkeypatch):
+    calls = list()
+
+    def counting_compile(definitions):
+        calls.append(definitions)
+        return compile_definitions(definitions)
+    monkeypatch.setattr(card_definitions, "compile_definitions", counting_compile)
+    return calls
+
+
+def test_compiled_cards_are_cached(definitions, compilations):
+    arrays = load_card_arrays(definitions)
+    assert definitions.parent.joinpath("__pycache__", "cards.npz").exists()
+    cached = load_card_arrays(definitions)
+    assert len(compilations) == 1
+    assert arrays.keys() == cached.keys()
+    assert cached["projects_names"].tolist() == ["Lichen"]
+    assert cached["projects_tag_counts"][0, Tag.Plant.value - 1] == 2
+
+
+def test_edited_definitions_are_recompiled(definitions, compilations):
+    load_card_arrays(definitions)
+    definitions.write_text(DEFINITIONS.replace("cost: 7", "cost: 8"))
+    assert load_card_arrays(definitions)["projects_costs"].tolist() == [8]
+    assert len(compilations) == 2
+
+
+def test_touched_definitions_reuse_the_cache(definitions, compilations, monkeypatch):
+    load_card_arrays(definitions)
+    stat = definitions.stat()
+    os.utime(definitions, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    load_card_arrays(definitions)
+    assert len(compilations) == 1
+    # The cache was rewritten with the new modification time, so the next load doesn't hash the definitions
+    hashes = list()
+    monkeypatch.setattr(card_definitions.hashlib, "sha256", lambda *args: hashes.append(args))
+    assert load_card_arrays(definitions)["projects_costs"].tolist() == [7]
+    assert hashes == [] and len(compilations) == 1
+
+
+def test_corrupt_cache_is_recompiled(definitions, compilations):
+    load_card_arrays(definitions)
+    definitions.parent.joinpath("__pycache__", "cards.npz").write_bytes(b"garbage")
+    assert load_card_arrays(definitions)["projects_names"].tolist() == ["Lichen"]
+    assert len(compilations) == 2
+
+
+@pytest.mark.parametrize("definitions", [{"projects": [{"name": "A", "color": "Red"}, {"name": "A", "color": "Red"}]},
+                                         {"projects": [{"name": "A", "color": "Purple"}]},
+                                         {"projects": [{"name": "A", "color": "Red", "tags": ["Dragon"]}]},
+                                         {"projects": [{"name": "A", "color": "Red", "action": "Nothing"}]},
+                                         {"projects": [{"name": "A", "color": "Red",
+                                                        "requirements": {"Venus": {"min": 2}}}]},
+                                         {"projects": [{"name": "A", "color": "Red",
+                                                        "requirements": {"Oxygen": {"min": "3"}}}]},
+                                         {"projects": [{"name": "A", "color": "Red",
+                                                        "requirements": {"Oxygen": {"max": 2.5}}}]},
+                                         {"projects": [{"name": "A", "color": "Red",
+                                                        "requirements": {"Oceans": {"min": True}}}]},
+                                         {"projects": [{"name": "A", "color": "Red",
+                                                        "requirements": {"Temperature": {"min": 40000}}}]},
+                                         {"projects": [{"name": "A", "color": "Red",
+                                                        "requirements": {"Oxygen": {"min": 5, "max": 3}}}]}])
+def test_invalid_definitions_are_rejected(definitions):
+    with pytest.raises(GameException):
+        compile_definitions(definitions)
+
+
+def test_cards_are_built_when_looked_up(definitions, game, monkeypatch):
+    catalog = ProjectCatalog(load_card_arrays(definitions))
+    assert catalog._cards == [None]
+    card = catalog[catalog.id_by_name("Lichen")]
+    assert catalog[0] is card
+    assert card.card_id == 0 and card.color == CardColor.Green and card.tags == [Tag.Plant, Tag.Plant]
+
+    player = game.players[0]
+    player.board.add_megacredits(card.cost)
+    monkeypatch.setattr(game, "get_current_phase", lambda: Phase.Development)
+    assert not card.player_meets_conditions(player)
+    game.global_requirements.get_parameter(Oxygen).set_value(3)
+    assert card.player_meets_conditions(player)
+
+
+def test_catalog_matches_the_definitions_file():
+    arrays = load_card_arrays(DEFINITIONS_FILE)
+    assert PROJECT_CATALOG.names.tolist() == arrays["projects_names"].tolist()
+    assert PROJECT_CATALOG[PROJECT_CATALOG.id_by_name("Steelworks")].points == 1
@@ -0,0 +1,63 @@
+import random
+
+from deck import Deck
+
+
+def test_draws_move_the_cursor():
+    deck = Deck(list(range(10)))
+    assert deck.draw(3) == [0, 1, 2]
+    assert deck.draw(2) == [3, 4]
+    assert deck.count() == 5 and not deck.empty()
+    assert deck.draw(0) == []
+    assert deck.draw(5) == [5, 6, 7, 8, 9]
+    assert deck.empty()
+
+
+def test_draws_at_the_end_of_the_deck_are_partial():
+    deck = Deck([1, 2, 3])
+    deck.draw(2)
+    assert deck.draw(4) == [3]
+    assert deck.draw(1) == []
+    assert deck.empty()
+
+
+def test_discard_pile_is_reshuffled_once_the_deck_runs_out():
+    deck = Deck([1, 2, 3], random.Random(0))
+    deck.draw(2)
+    deck.discard([7, 8, 9])
+    drawn = deck.draw(3)
+    # The rest of the deck comes first, then the shuffled discard pile
+    assert drawn[0] == 3 and set(drawn[1:]) <= {7, 8, 9}
+    assert deck.count() == 1 and set(drawn[1:] + deck.draw(1)) == {7, 8, 9}
+    assert deck.draw(1) == []
+
+
+def test_shuffle_keeps_only_the_undrawn_cards():
+    deck = Deck(list(range(10)), random.Random(0))
+    deck.draw(4)
+    deck.shuffle()
+    assert sorted(deck.draw(10)) == [4, 5, 6, 7, 8, 9]
+
+
+def test_every_draw_is_reported():
+    deck = Deck([1, 2, 3])
+    deck.discard([4])
+    reported = list()
+    deck.on_draw = reported.append
+    deck.draw(2)
+    deck.draw(2)
+    deck.draw(1)
+    assert reported == [[1, 2], [3, 4], []]
+
+
+def test_same_seed_gives_the_same_order():
+    def drawn(seed: int) -> list[int]:
+        deck = Deck(list(range(50)), random.Random(seed))
+        deck.shuffle()
+        cards = deck.draw(40)
+        deck.discard(cards)
+        return cards + deck.draw(50)
+
+    assert drawn(7) == drawn(7)
+    assert drawn(7) != drawn(8)
+    assert sorted(drawn(7)[:50]) == list(range(50))
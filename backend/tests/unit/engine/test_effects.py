@@ -0,0 +1,66 @@
+from card_catalog import PROJECT_CATALOG
+from effect import Effect, EffectIndex
+from enums import EffectTrigger, Tag, Phase, CardColor
+from global_requirements import Oxygen, Temperature
+
+
+class RecordingEffect(Effect):
+    TRIGGERS = ((EffectTrigger.TagPlayed, Tag.Space),
+                (EffectTrigger.GlobalParameterRaised, Oxygen),
+                (EffectTrigger.PhaseStarted, Phase.Action))
+
+    def __init__(self):
+        self.events = list()
+
+    def resolve(self, owner, card_id, event):
+        self.events.append((owner.name, card_id, event.trigger, event.subject))
+
+
+def test_events_reach_only_their_subscribers(game):
+    effect = RecordingEffect()
+    game.effects.subscribe(game.players[1], 7, effect)
+    assert game.effects.fire(EffectTrigger.TagPlayed, Tag.Plant, game.players[0]) == 0
+    game.players[0].increase_global_parameter(Temperature)
+    assert effect.events == []
+    game.players[0].increase_global_parameter(Oxygen)
+    assert effect.events == [(game.players[1].name, 7, EffectTrigger.GlobalParameterRaised, Oxygen)]
+
+
+def test_effects_resolve_in_player_order(game):
+    effect = RecordingEffect()
+    game.effects.subscribe(game.players[1], 2, effect)
+    game.effects.subscribe(game.players[0], 1, effect)
+    game.effects.subscribe(game.players[1], 0, effect)
+    game.effects.fire(EffectTrigger.PhaseStarted, Phase.Action)
+    assert [card_id for _, card_id, _, _ in effect.events] == [1, 2, 0]
+
+
+def test_played_cards_subscribe_after_their_own_tags(game, monkeypatch):
+    effect = RecordingEffect()
+    steelworks = PROJECT_CATALOG.id_by_name("Steelworks")
+    europa = PROJECT_CATALOG.id_by_name("Water Import From Europa")
+    monkeypatch.setattr(PROJECT_CATALOG[europa], "effect", effect)
+    monkeypatch.setattr(game, "get_current_phase", lambda: Phase.Construction)
+    player = game.players[0]
+    player.current_phase_card = Phase.Construction
+    player.project_cards = [europa, steelworks]
+    player.board.add_megacredits(100)
+
+    player.play_project_card(europa)
+    assert effect.events == []
+    assert game.effects.fire(EffectTrigger.TagPlayed, Tag.Building, player) == 0
+    game.effects.fire(EffectTrigger.TagPlayed, Tag.Space, player)
+    assert effect.events == [(player.name, europa, EffectTrigger.TagPlayed, Tag.Space)]
+
+
+def test_restored_games_resubscribe_the_played_cards(game, monkeypatch):
+    effect = RecordingEffect()
+    card_id = PROJECT_CATALOG.with_colors(range(len(PROJECT_CATALOG)), [CardColor.Blue])[0]
+    monkeypatch.setattr(PROJECT_CATALOG[card_id], "effect", effect)
+    game.players[1].played_project_cards.append(card_id)
+    snapshot = game.snapshot()
+    game.effects = EffectIndex(game)
+
+    game.restore(snapshot)
+    game.effects.fire(EffectTrigger.PhaseStarted, Phase.Action)
+    assert effect.events == [(game.players[1].name, card_id, EffectTrigger.PhaseStarted, Phase.Action)]
@@ -0,0 +1,34 @@
+from enums import PlayerAction
+from event_log import EventLog, replay
+from move import Move
+
+
+def test_records_are_flushed_as_they_are_appended(game, tmp_path):
+    log = EventLog(tmp_path / "game.log")
+    log.attach(game)
+    game.advance()
+    # The log is still open, a crash now must not lose what has been recorded
+    assert replay(tmp_path / "game.log").snapshot() == game.snapshot()
+    log.close()
+
+
+def test_records_are_flushed_in_batches(game, tmp_path):
+    path = tmp_path / "game.log"
+    log = EventLog(path, flush_records=3)
+    log.attach(game)
+    size = path.stat().st_size
+    log.append_advance([])
+    assert path.stat().st_size == size
+    log.append_production([])
+    assert path.stat().st_size > size
+    log.close()
+
+
+def test_records_are_flushed_after_the_interval(game, tmp_path):
+    path = tmp_path / "game.log"
+    log = EventLog(path, flush_records=100, flush_interval=0.0)
+    log.attach(game)
+    size = path.stat().st_size
+    log.append_move(0, Move(PlayerAction.ChoosePhaseCard), [])
+    assert path.stat().st_size > size
+    log.close()
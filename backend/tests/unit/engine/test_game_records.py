@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from enums import Phase
+from game_records import GameRecords
+from simulation import GameResult, Simulator
+
+
+def result(game_id: int, winner: str, rounds: int, cards: dict[str, list[int]]) -> GameResult:
+    return GameResult(game_id=game_id, seed=game_id, finished=True, rounds=rounds, winners=[winner],
+                      terraforming_ratings={"Mars": 20, "Venus": 25},
+                      victory_points={"Mars": 30, "Venus": 35},
+                      phase_cards={"Mars": [Phase.Action] * rounds, "Venus": [Phase.Research] * rounds},
+                      played_cards=cards,
+                      global_parameter_timelines={"Temperature": list(range(-30, -30 + 2 * rounds, 2)),
+                                                  "Oxygen": [0] * rounds, "Oceans": [0] * rounds})
+
+
+@pytest.fixture
+def records() -> GameRecords:
+    records = GameRecords(chunk_size=2)
+    records.extend([result(0, "Mars", 2, {"Mars": [3, 5], "Venus": [5]}),
+                    result(1, "Venus", 4, {"Mars": [3], "Venus": [7]}),
+                    result(2, "Venus", 3, {"Mars": [], "Venus": [5, 7]})])
+    return records
+
+
+def test_aggregates_span_chunks(records: GameRecords):
+    assert len(records) == 3
+    assert records.average_rounds() == 3
+    statistics = records.card_statistics()
+    assert statistics.card_ids.tolist() == [3, 5, 7]
+    assert statistics.plays.tolist() == [2, 3, 2]
+    assert statistics.win_rates.tolist() == [0.5, 2 / 3, 1.0]
+    assert records.phase_pick_frequencies() == {Phase.Development: 0.0, Phase.Construction: 0.0,
+                                                Phase.Action: 0.5, Phase.Production: 0.0, Phase.Research: 0.5}
+    assert records.average_timeline("Temperature").tolist() == [-30, -28, -26, -24]
+
+
+def test_records_survive_saving(records: GameRecords, tmp_path: Path):
+    records.save(tmp_path.joinpath("records.npz"))
+    loaded = GameRecords.load(tmp_path.joinpath("records.npz"))
+    loaded.append(result(3, "Mars", 1, {"Mars": [9], "Venus": []}))
+    assert len(loaded) == 4
+    assert loaded.names == ["Mars", "Venus"]
+    assert loaded.card_statistics().card_ids.tolist() == [3, 5, 7, 9]
+    players = loaded.table("players")
+    assert np.array_equal(players["game"], [0, 0, 1, 1, 2, 2, 3, 3])
+
+
+def test_simulated_games_are_recorded():
+    results = list(Simulator(processes=1).run(4))
+    records = GameRecords()
+    records.extend(results)
+    assert records.average_rounds() == sum(r.rounds for r in results) / len(results)
+    assert records.card_statistics().plays.sum() == sum(len(c) for r in results for c in r.played_cards.values())
+    assert sum(records.phase_pick_frequencies().values()) == pytest.approx(1)
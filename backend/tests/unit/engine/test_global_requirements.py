@@ -0,0 +1,83 @@
+import pytest
+
+from enums import RoundStep
+from exceptions import GlobalRequirementException
+from global_requirements import GlobalRequirements, GlobalParameterColor, ParameterCrossing, Temperature, Oxygen, \
+    Oceans
+from turn import Turn
+
+TURN = Turn(1, None, RoundStep.Planning)
+
+
+@pytest.fixture
+def requirements() -> GlobalRequirements:
+    return GlobalRequirements()
+
+
+def subscribe(requirements: GlobalRequirements, parameter_type, thresholds=()) -> list:
+    crossings = list()
+    requirements.subscribe(parameter_type, lambda p, crossing: crossings.append((p.value, crossing)), thresholds)
+    return crossings
+
+
+def test_color_bands_are_crossed_once(requirements: GlobalRequirements):
+    crossings = subscribe(requirements, Oxygen)
+    for _ in range(8):
+        requirements.increase_parameter(Oxygen, TURN)
+    # Oxygen bands start at 3 and 7, the increases in between notify nobody
+    assert crossings == [(3, ParameterCrossing.Color), (7, ParameterCrossing.Color)]
+    assert requirements.get_parameter(Oxygen).get_color() == GlobalParameterColor.Yellow
+
+
+def test_maximum_is_crossed_once(requirements: GlobalRequirements):
+    crossings = subscribe(requirements, Oxygen)
+    oxygen = requirements.get_parameter(Oxygen)
+    oxygen.set_value(13)
+    requirements.increase_parameter(Oxygen, TURN)
+    requirements.increase_parameter(Oxygen, TURN)
+    assert crossings == [(14, ParameterCrossing.Max)]
+
+
+def test_several_bands_are_crossed_in_one_increase(requirements: GlobalRequirements):
+    crossings = subscribe(requirements, Temperature)
+    temperature = requirements.get_parameter(Temperature)
+    temperature.step = 25
+    requirements.increase_parameter(Temperature, TURN)
+    # From Purple at -30 past Red to Yellow, notified once
+    assert crossings == [(-5, ParameterCrossing.Color)]
+    assert temperature.get_color() == GlobalParameterColor.Yellow
+    requirements.increase_parameter(Temperature, TURN)
+    # Into White and the maximum at once, both in one notification
+    assert crossings[1:] == [(8, ParameterCrossing.Color | ParameterCrossing.Max)]
+    assert temperature.get_color() == GlobalParameterColor.White
+
+
+def test_thresholds_notify_their_subscriber_only(requirements: GlobalRequirements):
+    watching = subscribe(requirements, Oceans, thresholds=[5, 2])
+    other = subscribe(requirements, Oceans)
+    for _ in range(6):
+        requirements.increase_parameter(Oceans, TURN)
+    # Oceans have no color bands
+    assert watching == [(2, ParameterCrossing.Threshold), (5, ParameterCrossing.Threshold)]
+    assert other == []
+
+
+def test_other_parameters_are_not_notified(requirements: GlobalRequirements):
+    crossings = subscribe(requirements, Temperature)
+    requirements.get_parameter(Oxygen).set_value(2)
+    requirements.increase_parameter(Oxygen, TURN)
+    assert crossings == []
+
+
+def test_compare_to_color(requirements: GlobalRequirements):
+    temperature = requirements.get_parameter(Temperature)
+    assert temperature.compare_to_color(GlobalParameterColor.Purple) == 0
+    assert temperature.compare_to_color(GlobalParameterColor.Red) == -1
+    temperature.set_value(-18)
+    assert temperature.compare_to_color(GlobalParameterColor.Purple) == 1
+    assert temperature.compare_to_color(GlobalParameterColor.Red) == 0
+    assert temperature.compare_to_color(GlobalParameterColor.White) == -1
+    temperature.set_value(8)
+    assert temperature.compare_to_color(GlobalParameterColor.Yellow) == 1
+    with pytest.raises(GlobalRequirementException):
+        requirements.get_parameter(Oceans).compare_to_color(GlobalParameterColor.Red)
@@ -0,0 +1,72 @@
+import random
+import time
+
+from mcts import MonteCarloPolicy, SearchSettings, TreeSearch, _search, candidate_moves
+from serialization import encode_snapshot
+from simulation import MANDATORY_ACTIONS, RandomPolicy, play_rounds
+
+SETTINGS = SearchSettings(exploration=1.4, rollout_rounds=10, samples=2, max_moves_per_turn=50)
+
+
+def deciding_player(game):
+    # Plays on until a player has a choice between several moves
+    policies = {p.name: RandomPolicy(random.Random(i)) for i, p in enumerate(game.players)}
+    for _ in range(20):
+        for player in game.players:
+            actions = player.get_available_actions()
+            if actions and len(candidate_moves(player, actions, random.Random(0), SETTINGS.samples)) > 1:
+                return player
+        play_rounds(game, policies, game.get_current_round(), 50)
+    raise AssertionError("No player had a choice to make.")
+
+
+def test_candidates_include_passing_unless_an_action_is_mandatory(game):
+    for _ in range(5):
+        for player in game.players:
+            actions = player.get_available_actions()
+            if not actions:
+                continue
+            candidates = candidate_moves(player, actions, random.Random(0), SETTINGS.samples)
+            assert len(candidates) == len(set(candidates))
+            assert (None in candidates) != any(a in MANDATORY_ACTIONS for a in actions)
+        play_rounds(game, {p.name: RandomPolicy(random.Random(0)) for p in game.players},
+                    game.get_current_round(), 50)
+
+
+def test_search_keeps_to_the_deadline(game):
+    player = deciding_player(game)
+    search = TreeSearch(game, player.name, SETTINGS, seed=0)
+    start = time.perf_counter()
+    statistics = search.run(start + 0.01)
+    # Rollouts are cut short, so the search overruns the deadline by a few moves at most
+    assert time.perf_counter() - start < 0.03
+    assert sum(s.visits for s in statistics) == search.iterations
+
+
+def test_searches_starting_after_the_deadline_give_up(game):
+    player = deciding_player(game)
+    data = encode_snapshot(game.snapshot())
+    assert _search(data, player.name, SETTINGS, 0, time.time() - 1) == []
+    assert _search(data, player.name, SETTINGS, 0, time.time() + 0.05)
+
+
+def test_policy_picks_one_of_the_candidates(game):
+    player = deciding_player(game)
+    actions = player.get_available_actions()
+    snapshot = game.snapshot()
+    policy = MonteCarloPolicy(random.Random(0), time_budget=0.05, processes=1, samples=SETTINGS.samples)
+    move = policy.choose_move(player, actions)
+    assert game.snapshot() == snapshot
+    assert move is None or move.action in actions
+
+
+def test_pooled_search_merges_the_workers(game):
+    player = deciding_player(game)
+    policy = MonteCarloPolicy(random.Random(0), time_budget=0.5, processes=2)
+    try:
+        assert sum(s.visits for s in policy.search(player)) > 0
+        start = time.perf_counter()
+        policy.search(player)
+        assert time.perf_counter() - start < 1.0
+    finally:
+        policy.close()
@@ -0,0 +1,146 @@
+import random
+
+import pytest
+
+from card_catalog import PROJECT_CATALOG
+from card_definitions import PARAMETERS, NO_MAXIMUM
+from card_requirements import RedBlueThresholdRequirements
+from enums import Phase, PlayerAction, PlayerColor, VictoryPointSource
+from exceptions import GameException
+from game import Game
+from global_requirements import Oxygen
+from move import Move
+from player import Player
+from points import Score
+from simulation import RandomPolicy, play_rounds
+
+
+def test_cards_listed_twice_are_not_discarded(game):
+    player = game.players[0]
+    card = player.project_cards[0]
+    hand = list(player.project_cards)
+    with pytest.raises(GameException):
+        player.sell_project_cards([card, card])
+    assert player.project_cards == hand
+
+
+def test_research_cards_listed_twice_are_not_kept(game):
+    player = game.players[0]
+    player.current_phase_card = Phase.Research
+    # The catalog has only a few cards, all of them dealt already
+    player.research_cards = player.project_cards[:2]
+    player.project_cards = player.project_cards[2:]
+    hand = list(player.project_cards)
+    with pytest.raises(GameException):
+        player.keep_research_cards([player.research_cards[0]] * 2)
+    assert player.project_cards == hand
+
+
+def test_phase_card_must_be_given(game):
+    player = game.players[0]
+    while PlayerAction.ChoosePhaseCard not in player.get_available_actions():
+        game.advance()
+    with pytest.raises(GameException):
+        game.apply(player, Move(PlayerAction.ChoosePhaseCard))
+    assert not player.has_picked_phase_card
+    game.apply(player, Move(PlayerAction.ChoosePhaseCard, phase=Phase.Action))
+    assert player.current_phase_card == Phase.Action
+
+
+def test_victory_points_follow_the_scored_state(game, monkeypatch):
+    player = game.players[0]
+    steelworks = PROJECT_CATALOG.id_by_name("Steelworks")
+    resources_per_point = PROJECT_CATALOG.resources_per_point.copy()
+    resources_per_point[steelworks] = 2
+    monkeypatch.setattr(PROJECT_CATALOG, "resources_per_point", resources_per_point)
+    monkeypatch.setattr(game, "get_current_phase", lambda: Phase.Construction)
+    player.project_cards.append(steelworks)
+    player.board.add_megacredits(100)
+
+    player.play_project_card(steelworks)
+    player.add_greenery_token()
+    player.increase_global_parameter(Oxygen)
+    player.add_card_resources(steelworks, 5)
+    player.deduct_terraforming_rating(2)
+    with pytest.raises(GameException):
+        player.add_card_resources(steelworks, -6)
+    assert player.score.breakdown() == {VictoryPointSource.TerraformingRating: 4,
+                                        VictoryPointSource.GreeneryTokens: 1,
+                                        VictoryPointSource.CardPoints: 1,
+                                        VictoryPointSource.CardResources: 2}
+    assert player.get_total_vp() == 8
+
+    player.add_card_resources(steelworks, -2)
+    assert player.score.get(VictoryPointSource.CardResources) == 1
+    recomputed = Score()
+    recomputed.recompute(player)
+    assert recomputed.breakdown() == player.score.breakdown() and recomputed.total == player.get_total_vp()
+
+
+def test_restored_players_are_scored_again(game):
+    player = game.players[0]
+    snapshot = game.snapshot()
+    player.add_terraforming_rating(3)
+    player.add_greenery_token()
+    game.restore(snapshot)
+    assert player.get_total_vp() == player.terraforming_rating == 5
+
+
+def test_playable_cards_follow_requirement_thresholds(monkeypatch):
+    card_id = PROJECT_CATALOG.id_by_name("Steelworks")
+    minimums = PROJECT_CATALOG.requirement_minimums.copy()
+    # Oxygen 5 is no color band, its bands start at 3 and 7
+    minimums[card_id, PARAMETERS.index(Oxygen)] = 5
+    monkeypatch.setattr(PROJECT_CATALOG, "requirement_minimums", minimums)
+    monkeypatch.setattr(PROJECT_CATALOG[card_id], "requirements", RedBlueThresholdRequirements({Oxygen: (5, NO_MAXIMUM)}))
+    # Games read the thresholds of the catalog when they are created
+    game = Game([Player(name="Mars", color=PlayerColor.Red), Player(name="Venus", color=PlayerColor.Blue)],
+                banned_corporations=[], banned_projects=[], seed=0)
+    game.start()
+    monkeypatch.setattr(game, "get_current_phase", lambda: Phase.Construction)
+    raising, waiting = game.players
+    waiting.project_cards.append(card_id)
+    waiting.board.add_megacredits(100)
+    game.global_requirements.get_parameter(Oxygen).set_value(4)
+    assert card_id not in waiting.get_playable_cards()
+
+    raising.increase_global_parameter(Oxygen)
+    assert card_id in waiting.get_playable_cards()
+
+
+def cached_and_fresh_actions(player: Player) -> tuple[tuple, tuple]:
+    def actions() -> tuple:
+        return player.get_available_actions(), player.get_playable_cards(), player.get_cards_with_playable_actions()
+    cached = actions()
+    player._available_actions_stale = True
+    player._playable_cards = None
+    player._cards_with_playable_actions = None
+    return cached, actions()
+
+
+def test_cached_actions_match_a_recomputation(game, monkeypatch):
+    applied = list[PlayerAction]()
+
+    def checked(step):
+        def checked_step(*args):
+            step(*args)
+            for player in game.players:
+                cached, fresh = cached_and_fresh_actions(player)
+                assert cached == fresh, f"Stale actions of {player.name} after {applied[-1:]}"
+        return checked_step
+
+    apply = game.apply
+    monkeypatch.setattr(game, "apply", checked(lambda player, move: applied.append(move.action) or apply(player, move)))
+    productions = list[int]()
+    produce_all = game.produce_all
+    monkeypatch.setattr(game, "produce_all", checked(lambda: productions.append(game.get_current_round()) or produce_all()))
+    monkeypatch.setattr(game, "advance", checked(game.advance))
+    for player in game.players:
+        # Rich players can afford their cards, so what they hold and the phase decide what they can play
+        player.board.add_megacredits(500)
+    policies = {p.name: RandomPolicy(random.Random(i)) for i, p in enumerate(game.players)}
+    play_rounds(game, policies, 40, 50)
+    # The moves went through phase changes, production, cards and standard actions
+    assert {PlayerAction.ChoosePhaseCard, PlayerAction.Research, PlayerAction.PlayRedOrBlueCard,
+            PlayerAction.ResolveActionAbilities, PlayerAction.StandardActionFlipOcean} <= set(applied)
+    assert productions
@@ -0,0 +1,129 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from exceptions import GameException
+from scheduler import MoveScheduler, order_batch, _Submission
+
+
+class NamedPlayer:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class RecordingGame:
+    def __init__(self, players: list[str]):
+        self.players = [NamedPlayer(p) for p in players]
+        self.version = 0
+        self.applied = list()
+
+    def apply_dict(self, player: str, move: dict) -> None:
+        if move.get("action") == "Illegal":
+            raise GameException("Illegal move.")
+        self.applied.append((player, move["action"]))
+        self.version += 1
+
+
+class LockedGame:
+    def __init__(self, game):
+        self.game = game
+        self.lock = threading.Lock()
+        self.checkouts = 0
+
+    @contextmanager
+    def checkout(self):
+        with self.lock:
+            self.checkouts += 1
+            yield self.game
+
+
+def wait_for(condition) -> None:
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_batches_are_resolved_in_ticks_of_player_order():
+    arrivals = [_Submission(p, {"action": a}) for p, a in (("C", "c1"), ("A", "a1"), ("C", "c2"), ("B", "b1"))]
+    assert [s.move["action"] for s in order_batch(["A", "B", "C"], arrivals)] == ["a1", "b1", "c1", "c2"]
+
+
+def test_simultaneous_moves_are_resolved_in_one_checkout():
+    game = LockedGame(RecordingGame(["Mars", "Venus", "Earth", "Io"]))
+    resolved = list()
+    scheduler = MoveScheduler(game.checkout, lambda g, moves: resolved.append((g.version, [p for p, _ in moves])))
+    results = dict()
+    game.lock.acquire()
+    threads = [threading.Thread(target=lambda p=p: results.setdefault(p, scheduler.submit(p, {"action": p})))
+               for p in ("Io", "Earth", "Venus", "Mars")]
+    for thread in threads:
+        thread.start()
+        # Arrival order is the reverse of the player order
+        wait_for(lambda: scheduler.pending() == threads.index(thread) + 1)
+    game.lock.release()
+    for thread in threads:
+        thread.join()
+    assert game.game.applied == [(p, p) for p in ("Mars", "Venus", "Earth", "Io")]
+    assert results == {"Mars": 1, "Venus": 2, "Earth": 3, "Io": 4}
+    assert game.checkouts == 1 and resolved == [(4, ["Mars", "Venus", "Earth", "Io"])]
+
+
+def test_rejected_moves_fail_on_their_own():
+    game = LockedGame(RecordingGame(["Mars", "Venus"]))
+    scheduler = MoveScheduler(game.checkout)
+    with pytest.raises(GameException):
+        scheduler.submit("Mars", {"action": "Illegal"})
+    assert scheduler.submit("Venus", {"action": "Legal"}) == 1
+
+
+def test_failed_checkouts_fail_the_waiting_moves():
+    @contextmanager
+    def missing_game():
+        raise LookupError("Game does not exist.")
+        yield
+
+    scheduler = MoveScheduler(missing_game)
+    with pytest.raises(LookupError):
+        scheduler.submit("Mars", {"action": "Legal"})
+    assert scheduler.pending() == 0
+
+
+def test_submitters_resolve_one_batch_each():
+    game = RecordingGame(["Mars", "Venus"])
+    first_applied, release = threading.Event(), threading.Event()
+    appliers = dict()
+    apply_dict = game.apply_dict
+
+    def blocking_apply_dict(player: str, move: dict) -> None:
+        appliers[player] = threading.current_thread().name
+        if player == "Mars":
+            first_applied.set()
+            release.wait(5)
+        apply_dict(player, move)
+
+    game.apply_dict = blocking_apply_dict
+    scheduler = MoveScheduler(LockedGame(game).checkout)
+    mars = threading.Thread(target=scheduler.submit, args=("Mars", {"action": "m"}), name="Mars")
+    venus = threading.Thread(target=scheduler.submit, args=("Venus", {"action": "v"}), name="Venus")
+    mars.start()
+    first_applied.wait(5)
+    venus.start()
+    wait_for(lambda: scheduler.pending() == 1)
+    release.set()
+    mars.join()
+    venus.join()
+    # Mars resolved the batch with its own move only, the move submitted meanwhile was left to its submitter
+    assert appliers == {"Mars": "Mars", "Venus": "Venus"}
+    assert game.applied == [("Mars", "m"), ("Venus", "v")]
+
+
+def test_failed_callbacks_keep_the_moves_applied():
+    def failing_callback(game, moves):
+        raise RuntimeError("Could not publish.")
+
+    scheduler = MoveScheduler(LockedGame(RecordingGame(["Mars"])).checkout, failing_callback)
+    assert scheduler.submit("Mars", {"action": "Legal"}) == 1
+    assert scheduler.submit("Mars", {"action": "Legal"}) == 2
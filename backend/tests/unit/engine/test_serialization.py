@@ -0,0 +1,55 @@
+import dataclasses
+import random
+
+import pytest
+
+from exceptions import SerializationException
+from serialization import decode_game, decode_snapshot, encode_snapshot
+
+
+def corrupt(snapshot, **changes) -> bytes:
+    return encode_snapshot(dataclasses.replace(snapshot, **changes))
+
+
+def corrupt_player(snapshot, **changes) -> bytes:
+    players = (dataclasses.replace(snapshot.players[0], **changes),) + snapshot.players[1:]
+    return corrupt(snapshot, players=players)
+
+
+def test_encoded_game_decodes_to_the_same_snapshot(game):
+    snapshot = game.snapshot()
+    assert decode_snapshot(encode_snapshot(snapshot)) == snapshot
+
+
+@pytest.mark.parametrize("changes", [dict(color=9), dict(current_phase_card=7), dict(project_cards=(999,)),
+                                     dict(corporation_card=999), dict(card_resources=((999, 1),))])
+def test_corrupt_players_are_rejected(game, changes):
+    with pytest.raises(SerializationException):
+        decode_snapshot(corrupt_player(game.snapshot(), **changes))
+
+
+def test_corrupt_game_state_is_rejected(game):
+    snapshot = game.snapshot()
+    round_number, _, step = snapshot.turn
+    for data in (corrupt(snapshot, turn=(round_number, 9, step)),
+                 corrupt(snapshot, turn=(round_number, 0, 9)),
+                 corrupt(snapshot, phases=(0,)),
+                 corrupt(snapshot, banned_projects=(999,)),
+                 corrupt(snapshot, project_deck=dataclasses.replace(snapshot.project_deck, cursor=999)),
+                 corrupt(snapshot, global_requirements=dataclasses.replace(snapshot.global_requirements,
+                                                                           ocean_prizes=(99,)))):
+        with pytest.raises(SerializationException):
+            decode_snapshot(data)
+
+
+def test_damaged_data_fails_with_serialization_errors_only(game):
+    data = encode_snapshot(game.snapshot(), include_rng=False)
+    rng = random.Random(0)
+    for _ in range(500):
+        damaged = bytearray(data)
+        for _ in range(3):
+            damaged[rng.randrange(len(damaged))] = rng.randrange(256)
+        try:
+            decode_game(bytes(damaged))
+        except SerializationException:
+            pass
@@ -0,0 +1,30 @@
+from simulation import Simulator
+
+
+def test_games_are_played_to_the_end():
+    results = sorted(Simulator(processes=1, player_count=4).run(10), key=lambda r: r.game_id)
+    assert all(r.finished for r in results)
+    assert all(r.winners and set(r.winners) <= set(r.terraforming_ratings) for r in results)
+    assert all({r.victory_points[w] for w in r.winners} == {max(r.victory_points.values())} for r in results)
+
+
+def test_seeded_games_are_reproducible():
+    def play():
+        return sorted(Simulator(processes=1).run(3, seed=7), key=lambda r: r.game_id)
+
+    first, second = play(), play()
+    assert [(r.rounds, r.terraforming_ratings) for r in first] == [(r.rounds, r.terraforming_ratings) for r in second]
+
+
+def test_process_pool_plays_the_same_games():
+    in_process = sorted(Simulator(processes=1).run(4), key=lambda r: r.game_id)
+    pooled = sorted(Simulator(processes=2, chunksize=1).run(4), key=lambda r: r.game_id)
+    assert [r.terraforming_ratings for r in pooled] == [r.terraforming_ratings for r in in_process]
+
+
+def test_array_boards_play_the_same_games():
+    def play(array_boards: bool):
+        return sorted(Simulator(processes=1, player_count=4, array_boards=array_boards).run(5, seed=3),
+                      key=lambda r: r.game_id)
+
+    assert [r.terraforming_ratings for r in play(True)] == [r.terraforming_ratings for r in play(False)]
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from enums import PlayerAction
+from event_log import EventLog, replay
+from exceptions import GameException
+from game import Game
+from move import Move
+from serialization import decode_snapshot, encode_snapshot
+from simulation import RandomPolicy, play_rounds
+
+
+def play(game, rounds: int, seed: int = 0) -> None:
+    policies = {p.name: RandomPolicy(random.Random(seed + i)) for i, p in enumerate(game.players)}
+    play_rounds(game, policies, game.get_current_round() + rounds - 1, 50)
+
+
+def test_restored_games_continue_the_same_way(game):
+    play(game, 3)
+    snapshot = game.snapshot()
+    play(game, 5, seed=1)
+    finished = game.snapshot()
+
+    game.restore(snapshot)
+    play(game, 5, seed=1)
+    assert game.snapshot() == finished
+
+    copy = Game.from_snapshot(decode_snapshot(encode_snapshot(snapshot)))
+    play(copy, 5, seed=1)
+    assert copy.snapshot() == finished
+
+
+def test_event_log_replays_the_game(game, tmp_path):
+    log = EventLog(tmp_path / "game.log")
+    log.attach(game)
+    play(game, 6)
+    log.close()
+    assert replay(tmp_path / "game.log").snapshot() == game.snapshot()
+
+
+def test_move_batches_are_rolled_back_as_a_whole(game, tmp_path):
+    log = EventLog(tmp_path / "game.log")
+    log.attach(game)
+    player = game.players[0]
+    before, version = game.snapshot(), game.version
+    redraw = Move(PlayerAction.RedrawProjectCards, cards=tuple(player.project_cards[:2]))
+    with pytest.raises(GameException, match="Move 2 of 2"):
+        game.apply_all(player, [redraw, Move(PlayerAction.Produce)])
+    assert game.snapshot() == before and game.version == version
+
+    game.apply_all(player, [redraw])
+    assert len(game.drawn_cards) == 2
+    log.close()
+    assert replay(tmp_path / "game.log").snapshot() == game.snapshot()
+
+
+def test_pickled_games_leave_the_board_store_behind():
+    import pickle
+    from enums import PlayerColor
+    from player import Player
+    from player_board import BoardStore
+
+    store = BoardStore(capacity=4096)
+    players = [Player(name=f"Player {i + 1}", color=color) for i, color in zip(range(2), PlayerColor)]
+    game = Game(players, banned_corporations=[], banned_projects=[], board_store=store, seed=0)
+    game.start()
+    play(game, 2)
+    data = pickle.dumps(game)
+    assert len(data) < store.rows.nbytes
+    copy = pickle.loads(data)
+    assert copy.board_store is None
+    assert copy.snapshot() == game.snapshot()
+    play(copy, 3, seed=1)
@@ -0,0 +1,21 @@
+import timeit
+
+import pytest
+
+from benchmarks.cases import CASES
+from benchmarks.runner import BenchmarkResult, compare
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_every_case_runs(name: str):
+    timeit.Timer(CASES[name]()).timeit(number=1)
+
+
+def test_slowdowns_beyond_the_tolerance_are_regressions():
+    baseline = {"results": {"deck.draw": {"best": 100.0}, "deck.restore_discard_pile": {"best": 100.0}}}
+    results = [BenchmarkResult("deck.draw", 1000, 120.0, 125.0),
+               BenchmarkResult("deck.restore_discard_pile", 1000, 130.0, 131.0),
+               BenchmarkResult("simulation.play_game", 1, 5e7, 5e7)]
+    regressions = compare(results, baseline, tolerance=0.25)
+    assert [r.name for r in regressions] == ["deck.restore_discard_pile"]
+    assert round(regressions[0].slowdown, 2) == 0.3
@@ -0,0 +1,99 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from aresexpedition.services.game_registry import GameRegistry, GameNotFoundException
+
+
+@pytest.fixture
+def registry(tmp_path: Path) -> GameRegistry:
+    return GameRegistry(tmp_path, capacity=2, shards=1)
+
+
+def test_least_recently_used_games_are_spilled(registry: GameRegistry):
+    first = registry.add({"round": 1})
+    second = registry.add({"round": 2})
+    with registry.checkout(first):
+        pass
+    third = registry.add({"round": 3})
+    assert registry.resident_count() == 2
+    assert len(registry) == 3
+    assert registry.spill_directory.joinpath(second + GameRegistry.SPILL_FILE_SUFFIX).exists()
+    with registry.checkout(second) as game:
+        assert game == {"round": 2}
+    assert registry.resident_count() == 2
+    assert third in registry
+
+
+def test_games_in_use_are_not_spilled(registry: GameRegistry):
+    first = registry.add({"round": 1})
+    with registry.checkout(first) as game:
+        registry.add({"round": 2})
+        registry.add({"round": 3})
+        game["round"] = 4
+    with registry.checkout(first) as game:
+        assert game == {"round": 4}
+
+
+def test_spilled_games_survive_restart(registry: GameRegistry):
+    games = [registry.add({"round": i}) for i in range(3)]
+    restarted = GameRegistry(registry.spill_directory, capacity=2, shards=1)
+    spilled = [g for g in games if g in restarted]
+    assert len(spilled) == 1
+    with restarted.checkout(spilled[0]) as game:
+        assert game["round"] == games.index(spilled[0])
+
+
+def test_remove(registry: GameRegistry):
+    games = [registry.add({"round": i}) for i in range(3)]
+    for game_id in games:
+        registry.remove(game_id)
+    assert len(registry) == 0
+    assert not list(registry.spill_directory.iterdir())
+    with pytest.raises(GameNotFoundException):
+        with registry.checkout(games[0]):
+            pass
+
+
+def test_games_failing_to_spill_stay_in_memory(tmp_path: Path):
+    def dump(game) -> bytes:
+        raise OSError("Disk full")
+
+    registry = GameRegistry(tmp_path, capacity=1, shards=1, dump=dump)
+    first = registry.add({"round": 1})
+    registry.add({"round": 2})
+    assert registry.resident_count() == 2
+    assert not list(tmp_path.iterdir())
+    with registry.checkout(first) as game:
+        assert game == {"round": 1}
+
+
+def test_spill_directory_is_private(tmp_path: Path):
+    spill_directory = tmp_path / "games"
+    spill_directory.mkdir(mode=0o777)
+    spill_directory.chmod(0o777)
+    GameRegistry(spill_directory)
+    assert spill_directory.stat().st_mode & 0o777 == 0o700
+
+
+def test_concurrent_checkouts_are_exclusive(tmp_path: Path):
+    registry = GameRegistry(tmp_path, capacity=4, shards=2)
+    games = [registry.add({"moves": 0}) for _ in range(8)]
+
+    def play():
+        for _ in range(50):
+            for game_id in games:
+                with registry.checkout(game_id) as game:
+                    moves = game["moves"]
+                    game["moves"] = moves + 1
+
+    threads = [threading.Thread(target=play) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for game_id in games:
+        with registry.checkout(game_id) as game:
+            assert game["moves"] == 200
+    assert registry.resident_count() <= 4
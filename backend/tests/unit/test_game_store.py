@@ -0,0 +1,127 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from aresexpedition.services.game_registry import GameRegistry, GameNotFoundException
+from aresexpedition.services.game_store import GameStore
+from aresexpedition.services.seats import PlayerNotAuthorizedException, SeatRegistry, SeatTakenException
+
+
+class CountingGame:
+    def __init__(self):
+        self.moves = list()
+
+    @property
+    def version(self) -> int:
+        return len(self.moves)
+
+    def apply_dict(self, player: str, move: dict) -> None:
+        self.moves.append((player, move["action"]))
+
+
+def play(store: GameStore, game_id: str, game: CountingGame, *actions: str) -> None:
+    moves = [("Mars", {"action": a}) for a in actions]
+    for player, move in moves:
+        game.apply_dict(player, move)
+    store.record(game_id, game, moves)
+
+
+def stored_moves(store: GameStore, game_id: str) -> list[int]:
+    with sqlite3.connect(store.path) as connection:
+        return [s for s, in connection.execute("SELECT sequence FROM moves WHERE game_id = ? ORDER BY sequence",
+                                               (game_id,))]
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> GameStore:
+    store = GameStore(tmp_path.joinpath("games.sqlite3"), durability_window=60, checkpoint_interval=4)
+    yield store
+    store.close()
+
+
+def test_moves_are_written_behind(store: GameStore):
+    game = CountingGame()
+    play(store, "first", game, "a")
+    play(store, "first", game, "b", "c")
+    # Still within the durability window
+    assert stored_moves(store, "first") == []
+    store.flush()
+    # The first move was stored in the base checkpoint
+    assert stored_moves(store, "first") == [2, 3]
+
+
+def test_games_survive_a_restart(store: GameStore):
+    game = CountingGame()
+    play(store, "first", game, "a")
+    play(store, "first", game, "b", "c")
+    store.close()
+    restarted = GameStore(store.path, durability_window=60, checkpoint_interval=4)
+    try:
+        loaded = restarted.load("first")
+        assert loaded.moves == game.moves
+        play(restarted, "first", loaded, "d")
+        restarted.flush()
+        assert stored_moves(restarted, "first") == [2, 3, 4]
+        assert restarted.load("missing") is None
+    finally:
+        restarted.close()
+
+
+def test_checkpoints_bound_the_replayed_moves(store: GameStore):
+    game = CountingGame()
+    play(store, "first", game, "a")
+    play(store, "first", game, "b", "c", "d")
+    # Four moves after the base checkpoint, the fifth one follows the new checkpoint
+    play(store, "first", game, "e")
+    play(store, "first", game, "f")
+    store.flush()
+    assert stored_moves(store, "first") == [6]
+    assert store.load("first").moves == game.moves
+
+
+def test_deleted_games_are_not_loaded(store: GameStore):
+    play(store, "first", CountingGame(), "a", "b")
+    store.delete("first")
+    assert store.load("first") is None
+    assert stored_moves(store, "first") == []
+
+
+def test_registry_loads_unknown_games_from_the_store(store: GameStore, tmp_path: Path):
+    game = CountingGame()
+    play(store, "first", game, "a", "b")
+    registry = GameRegistry(tmp_path.joinpath("games"), capacity=2, shards=1)
+    registry.loader = store.load
+    registry.removal_listeners.append(store.delete)
+    assert "first" in registry
+    with registry.checkout("first") as loaded:
+        assert loaded.moves == game.moves
+    registry.remove("first")
+    with pytest.raises(GameNotFoundException):
+        with registry.checkout("first"):
+            pass
+
+
+def test_seats_survive_a_restart(store: GameStore):
+    play(store, "first", CountingGame(), "a")
+    seats = SeatRegistry()
+    seats.loader, seats.recorder = store.load_seats, store.record_seat
+    token = seats.take("first", "Mars")
+    # Committed right away, not within the durability window
+    assert list(store.load_seats("first")) == ["Mars"]
+    store.close()
+    restarted = GameStore(store.path, durability_window=60, checkpoint_interval=4)
+    try:
+        seats = SeatRegistry()
+        seats.loader, seats.recorder = restarted.load_seats, restarted.record_seat
+        with pytest.raises(SeatTakenException):
+            seats.take("first", "Mars")
+        seats.authorize("first", "Mars", token)
+        with pytest.raises(PlayerNotAuthorizedException):
+            seats.authorize("first", "Venus", token)
+        venus = seats.take("first", "Venus")
+        seats.authorize("first", "Venus", venus)
+        restarted.delete("first")
+        assert restarted.load_seats("first") == {}
+    finally:
+        restarted.close()
@@ -0,0 +1,26 @@
+import threading
+
+from aresexpedition.models.instrumentation import MetricsRegistry
+
+
+def test_thread_buckets_are_merged_on_scrape():
+    registry = MetricsRegistry()
+    counter = registry.counter("moves_total", "Moves.", ("action",))
+    histogram = registry.histogram("move_seconds", "Move time.", buckets=(0.1, 1.0))
+
+    def record():
+        for _ in range(100):
+            counter.inc("Research")
+        histogram.observe(0.5)
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    counter.inc("Produce", amount=2)
+    lines = registry.render().splitlines()
+    assert 'moves_total{action="Research"} 400' in lines
+    assert 'moves_total{action="Produce"} 2' in lines
+    assert lines[-5:] == ['move_seconds_bucket{le="0.1"} 0', 'move_seconds_bucket{le="1"} 4',
+                          'move_seconds_bucket{le="+Inf"} 4', 'move_seconds_sum 2', 'move_seconds_count 4']
@@ -0,0 +1,53 @@
+import logging
+import threading
+
+from aresexpedition.log_queue import install_log_queue, stop_log_queue
+
+
+class SlowHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.unblock = threading.Event()
+        self.messages = list()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.started.set()
+        self.unblock.wait()
+        self.messages.append(record.getMessage())
+
+
+def slow_logger(name: str) -> tuple[logging.Logger, SlowHandler]:
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    handler = SlowHandler()
+    logger.handlers = [handler]
+    return logger, handler
+
+
+def test_full_queue_drops_records_instead_of_blocking():
+    logger, handler = slow_logger("test_log_queue_drop")
+    install_log_queue({"capacity": 2, "policy": "drop"}, loggers=[logger])
+    queue_handler = logger.handlers[0]
+    try:
+        logger.warning("move 0")
+        # The listener thread holds the first record while the handler is stuck, two more fit in the queue
+        assert handler.started.wait(5)
+        for i in range(1, 10):
+            logger.warning("move %d", i)
+        assert queue_handler.dropped == 7
+    finally:
+        handler.unblock.set()
+        stop_log_queue()
+    assert handler.messages == ["move 0", "move 1", "move 2"]
+
+
+def test_stop_waits_for_room_in_a_full_queue():
+    logger, handler = slow_logger("test_log_queue_stop")
+    install_log_queue({"capacity": 1, "policy": "drop"}, loggers=[logger])
+    logger.warning("move 0")
+    assert handler.started.wait(5)
+    logger.warning("move 1")
+    threading.Timer(0.1, handler.unblock.set).start()
+    stop_log_queue()
+    assert handler.messages == ["move 0", "move 1"]
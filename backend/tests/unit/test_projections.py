@@ -0,0 +1,49 @@
+from aresexpedition.services.projections import ProjectionCache
+
+
+class CountingPlayer:
+    def __init__(self):
+        self.private_version = 0
+        self.builds = 0
+
+    def to_private_dict(self) -> dict:
+        self.builds += 1
+        return {"project_cards": [1, 2]}
+
+
+class CountingGame:
+    def __init__(self):
+        self.version = 0
+        self.builds = 0
+        self.player = CountingPlayer()
+
+    def get_player(self, name: str) -> CountingPlayer:
+        return self.player
+
+    def to_dict(self) -> dict:
+        self.builds += 1
+        return {"version": self.version}
+
+
+def test_views_are_built_once_per_version():
+    cache = ProjectionCache()
+    game = CountingGame()
+    for viewer in ("Mars", "Mars", None, None):
+        cache.view_json("g", game, viewer)
+    assert (game.builds, game.player.builds) == (1, 1)
+    # Only the public state changed, the private state is reused
+    game.version += 1
+    assert cache.view_json("g", game, "Mars") == '{"public": {"version": 1}, "private": {"project_cards": [1, 2]}}'
+    assert (game.builds, game.player.builds) == (2, 1)
+    game.player.private_version += 1
+    cache.view_json("g", game, "Mars")
+    assert (game.builds, game.player.builds) == (2, 2)
+
+
+def test_least_recently_used_games_are_dropped():
+    cache = ProjectionCache(capacity=1)
+    first, second = CountingGame(), CountingGame()
+    cache.public("first", first)
+    cache.public("second", second)
+    cache.public("first", first)
+    assert first.builds == 2
@@ -0,0 +1,43 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from aresexpedition import startup
+
+
+@pytest.fixture(autouse=True)
+def cache_directory(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(startup, "CACHE_DIRECTORY", tmp_path / "cache")
+
+
+def test_parsed_config_is_cached_until_the_file_changes(tmp_path: Path):
+    config_file = tmp_path / "logging.yaml"
+    config_file.write_text("version: 1\nroot:\n  level: DEBUG\n")
+    assert startup.load_yaml_config(config_file) == {"version": 1, "root": {"level": "DEBUG"}}
+    cache_files = list((tmp_path / "cache").iterdir())
+    assert len(cache_files) == 1
+    assert startup.load_yaml_config(config_file) == {"version": 1, "root": {"level": "DEBUG"}}
+
+    # Same size and modification time, only the content tells the change
+    stat = config_file.stat()
+    config_file.write_text("version: 1\nroot:\n  level: WARN\n")
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert startup.load_yaml_config(config_file) == {"version": 1, "root": {"level": "WARN"}}
+
+
+def test_cache_directory_is_private(tmp_path: Path):
+    config_file = tmp_path / "logging.yaml"
+    config_file.write_text("version: 1\n")
+    (tmp_path / "cache").mkdir(mode=0o777)
+    (tmp_path / "cache").chmod(0o777)
+    startup.load_yaml_config(config_file)
+    assert (tmp_path / "cache").stat().st_mode & 0o777 == 0o700
+
+
+def test_startup_stages_are_timed():
+    from aresexpedition import create_app
+
+    app = create_app(test=True)
+    assert list(app.extensions["startup_timings"]) == ["environment", "logging", "configuration", "services",
+                                                       "views"]
@@ -0,0 +1,78 @@
+import json
+import threading
+import time
+
+from aresexpedition.services.projections import Projection
+from aresexpedition.services.state_stream import StateStream, diff_state
+
+
+def test_diff_state_keeps_only_changes():
+    old = {"round": 1, "players": {"Mars": {"board": {"heat": 2, "plants": 1}, "cards": [1, 2]}}, "phase": "Action"}
+    new = {"round": 1, "players": {"Mars": {"board": {"heat": 5, "plants": 1}, "cards": [1, 2, 3]}}}
+    assert diff_state(old, new) == {"players": {"Mars": {"board": {"heat": 5}, "cards": [1, 2, 3]}}, "phase": None}
+    assert diff_state(new, new) == {}
+
+
+def test_subscribers_get_deltas_or_full_state():
+    stream = StateStream(history=2)
+    stream.publish("g", Projection(1, {"round": 1, "heat": 0}))
+    stream.publish("g", Projection(2, {"round": 1, "heat": 2}))
+    stream.publish("g", Projection(3, {"round": 2, "heat": 2}))
+    assert [(e.kind, json.loads(e.data)) for e in stream.wait("g", {None: 2})] == [("delta", {"round": 2})]
+    assert [e.kind for e in stream.wait("g", {None: 1})] == ["delta", "delta"]
+    stream.publish("g", Projection(4, {"round": 2, "heat": 4}))
+    # The delta from version 1 fell out of the history
+    assert [(e.kind, e.version) for e in stream.wait("g", {None: 1})] == [("state", 4)]
+    assert stream.wait("g", {None: 4}, timeout=0) == []
+
+
+def test_subscribers_ahead_of_the_state_start_over():
+    stream = StateStream()
+    stream.publish("g", Projection(5, {"round": 2, "heat": 4}))
+    stream.publish("g", Projection(3, {"cards": [1]}), "Mars")
+    stream.close("g")
+    # Reloaded without its last moves, the game publishes lower versions than the subscriber has seen
+    stream.publish("g", Projection(4, {"round": 2, "heat": 2}))
+    stream.publish("g", Projection(2, {"cards": [1, 2]}), "Mars")
+    state_events = stream.wait("g", {None: 5, "Mars": 3}, timeout=0)
+    assert [(e.kind, e.version, json.loads(e.data)) for e in state_events] == \
+        [("state", 4, {"round": 2, "heat": 2}), ("private_state", 2, {"cards": [1, 2]})]
+    assert stream.wait("g", {None: 4, "Mars": 2}, timeout=0) == []
+    # Nothing published yet is nothing to start over with
+    assert stream.wait("h", {None: 5}, timeout=0) == []
+
+
+def test_private_states_are_streamed_to_their_player_only():
+    stream = StateStream()
+    stream.watch("g", "Mars")
+    stream.publish("g", Projection(1, {"round": 1}))
+    stream.publish("g", Projection(5, {"cards": [1]}), "Mars")
+    assert [(e.kind, e.player) for e in stream.wait("g", {None: -1})] == [("state", None)]
+    assert [(e.kind, e.player) for e in stream.wait("g", {None: 1, "Mars": -1})] == [("private_state", "Mars")]
+    assert stream.watched_players("g") == ["Mars"]
+
+
+def test_waiting_subscriber_is_woken_up():
+    stream = StateStream()
+    stream.publish("g", Projection(1, {"round": 1}))
+    received = list()
+    subscriber = threading.Thread(target=lambda: received.extend(stream.wait("g", {None: 1}, timeout=5)))
+    subscriber.start()
+    stream.publish("g", Projection(2, {"round": 2}))
+    subscriber.join()
+    assert [e.version for e in received] == [2]
+
+
+def test_closing_the_game_wakes_up_subscribers():
+    stream = StateStream()
+    stream.publish("g", Projection(1, {"round": 1}))
+    received = list()
+    subscriber = threading.Thread(target=lambda: received.append(stream.wait("g", {None: 1}, timeout=5)))
+    subscriber.start()
+    # Closing before the subscriber waits would only let it start over in a new channel
+    while not stream._channels["g"].condition._waiters:
+        time.sleep(0.001)
+    stream.close("g")
+    subscriber.join()
+    assert received == [[]]
+    assert stream.version("g") == -1